@@ -0,0 +1,316 @@
+"""
+End-to-end load test without a token or network. Builds the Application with
+build_application(), the same as main(), but its Bot API transport is an
+httpx.MockTransport that answers locally. It then replays a generated update
+stream through the real handlers, update processor, SQLite database and
+outbound queue.
+
+Each admin-table size runs in a fresh subprocess and working directory, so
+the database and the peak-memory figures start from zero. Admins are seeded
+with one EVM address (stored lowercase, which skips 100k Keccak hashes) and one
+UPI ID each. The stream is --verify-share /verify calls in the verification
+group, for a mix of registered and unknown details, with owner-side admin
+mutations making up the rest. The mutations cycle through /add_admin,
+/setadmin_upi, /removeadmin_payment and /remove_admin.
+
+Updates are dispatched the way the Application's update fetcher does. At most
+max(1, CONCURRENT_UPDATES) are in flight, and each update's latency runs from
+dispatch to its handler finishing. Replies go to the outbound queue as in
+production. They are not drained, since its rate limits model Telegram's and
+would only measure those.
+
+Results are printed as JSON on stdout (or written to --output) for comparing
+releases:
+
+    python benchmarks/bench_load.py [--sizes 10,1000,10000,100000] [--updates 5000]
+        [--verify-share 0.95] [--concurrency 1] [--api-latency 0] [--output FILE]
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+import httpx
+import sqlalchemy
+import telegram
+from telegram import Update
+
+from botmodule import load_bot
+
+BOT_USER = {"id": 1000000001, "is_bot": True, "first_name": "Verification Bot", "username": "bench_verify_bot"}
+GROUP_USERS = 1000  # Distinct members sending /verify
+HEX = "0123456789abcdef"
+
+
+class FakeBotAPI:
+    """
+    Stands in for api.telegram.org: getMe returns BOT_USER, message-sending
+    calls return a plausible Message, anything else returns True. Each call
+    waits `latency` seconds first.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = collections.Counter()
+        self.message_id = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        method = request.url.path.rsplit("/", 1)[-1]
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method == "getMe":
+            result = BOT_USER
+        elif method in ("sendMessage", "editMessageText", "sendDocument"):
+            params = {}
+            if request.headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+                params = dict(urllib.parse.parse_qsl(request.content.decode()))
+            chat_id = int(params.get("chat_id", 1))
+            self.message_id += 1
+            result = {
+                "message_id": self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        else:
+            result = True
+        return httpx.Response(200, json={"ok": True, "result": result})
+
+
+def random_evm(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choice(HEX) for _ in range(40))
+
+
+def command_update(update_id: int, chat: dict, user_id: int, text: str) -> dict:
+    command = text.split(" ", 1)[0]
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": chat,
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": f"user{user_id}"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
+
+
+def generate_stream(bot, rng: random.Random, addresses: list, count: int, verify_share: float) -> list:
+    """(kind, update dict) pairs; kind is "verify" or the mutating command's name."""
+    group = {"id": bot.VERIFICATION_GROUP_ID, "type": "supergroup", "title": "Verification"}
+    owner = {"id": bot.OWNER_ID, "type": "private", "first_name": "Owner"}
+    mutations = ("add_admin", "setadmin_upi", "removeadmin_payment", "remove_admin")
+    stream, mutation_count = [], 0
+    for update_id in range(1, count + 1):
+        if rng.random() < verify_share:
+            roll = rng.random()
+            if roll < 0.3:
+                value = rng.choice(addresses)  # Registered EVM address
+            elif roll < 0.6:
+                value = f"admin{rng.randrange(len(addresses))}@okaxis"  # Registered UPI ID
+            elif roll < 0.8:
+                value = random_evm(rng)
+            else:
+                value = f"stranger{rng.randrange(10 ** 6)}@ybl"
+            user_id = 10_000 + rng.randrange(GROUP_USERS)
+            stream.append(("verify", command_update(update_id, group, user_id, f"/verify {value}")))
+        else:
+            name = mutations[mutation_count % len(mutations)]
+            username = f"bench{mutation_count // len(mutations)}"
+            argument = {
+                "add_admin": f"@{username}",
+                "setadmin_upi": f"@{username} {username}@okaxis",
+                "removeadmin_payment": f"{username}@okaxis",
+                "remove_admin": f"@{username}",
+            }[name]
+            # Private chats have the user's id as their chat id.
+            stream.append((name, command_update(update_id, owner, bot.OWNER_ID, f"/{name} {argument}")))
+            mutation_count += 1
+    return stream
+
+
+async def seed_admins(bot, size: int, rng: random.Random) -> list:
+    """Inserts `size` admins with an EVM address and a UPI ID each; returns the addresses."""
+    await bot.init_db()
+    addresses = [random_evm(rng) for _ in range(size)]
+    async with bot.engine.begin() as conn:
+        for start in range(0, size, 10_000):
+            chunk = range(start, min(size, start + 10_000))
+            ids = await conn.execute(
+                sqlalchemy.insert(bot.Admin).returning(bot.Admin.id),
+                [{"group_id": bot.VERIFICATION_GROUP_ID, "username": f"admin{n}", "is_super_admin": False} for n in chunk],
+            )
+            methods = []
+            for n, (admin_id,) in zip(chunk, ids.all()):
+                for kind, value in (("crypto", addresses[n]), ("upi", f"admin{n}@okaxis")):
+                    methods.append({
+                        "admin_id": admin_id, "group_id": bot.VERIFICATION_GROUP_ID,
+                        "kind": kind, "value": value, "lookup_key": value,
+                    })
+            await conn.execute(sqlalchemy.insert(bot.PaymentMethod), methods)
+    return addresses
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def latency_summary(seconds: list) -> dict:
+    seconds = sorted(seconds)
+    return {
+        "count": len(seconds),
+        "p50_ms": round(percentile(seconds, 0.50) * 1e3, 3),
+        "p99_ms": round(percentile(seconds, 0.99) * 1e3, 3),
+        "max_ms": round(seconds[-1] * 1e3, 3),
+    }
+
+
+def totals(metrics) -> tuple:
+    """Handler calls, errors and DB queries so far, summed over all handlers."""
+    stats = metrics.handlers.values()
+    return sum(s.calls for s in stats), sum(s.errors for s in stats), sum(s.db_queries for s in stats)
+
+
+async def replay(app, stream: list) -> tuple:
+    """Feeds updates like Application's update fetcher; returns (wall seconds, {kind: [latency]})."""
+    processor = app.update_processor
+    window = asyncio.Semaphore(max(1, processor.max_concurrent_updates))
+    latencies = collections.defaultdict(list)
+
+    async def run(kind: str, update: Update) -> None:
+        try:
+            started = time.perf_counter()
+            await processor.process_update(update, app.process_update(update))
+            latencies[kind].append(time.perf_counter() - started)
+        finally:
+            window.release()
+
+    tasks = []
+    started = time.perf_counter()
+    for kind, data in stream:
+        await window.acquire()
+        tasks.append(asyncio.create_task(run(kind, Update.de_json(data, app.bot))))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started, latencies
+
+
+async def run_size(args) -> dict:
+    bot = load_bot()
+    bot.CONCURRENT_UPDATES = args.concurrency
+    rng = random.Random(args.seed)
+    addresses = await seed_admins(bot, args.size, rng)
+
+    api = FakeBotAPI(args.api_latency)
+    request = bot.InstrumentedRequest(httpx_kwargs={"transport": httpx.MockTransport(api)})
+    app = bot.build_application(request)
+    await app.initialize()
+    await app.post_init(app)
+    await app.start()
+    try:
+        started = time.perf_counter()
+        await bot.groups.get(bot.VERIFICATION_GROUP_ID)
+        load_seconds = time.perf_counter() - started
+
+        warmup = generate_stream(bot, rng, addresses, args.warmup, 1.0)
+        await replay(app, warmup)
+        before = totals(bot.metrics)
+        stream = generate_stream(bot, rng, addresses, args.updates, args.verify_share)
+        for kind, data in stream:
+            data["update_id"] += len(warmup)
+        elapsed, latencies = await replay(app, stream)
+        calls, errors, db_queries = (after - earlier for after, earlier in zip(totals(bot.metrics), before))
+    finally:
+        await bot.outbox.stop(timeout=0)  # Rate-limited backlog; see the module docstring
+        await app.stop()
+        await app.post_shutdown(app)
+        await app.shutdown()
+
+    every = [seconds for values in latencies.values() for seconds in values]
+    return {
+        "admins": args.size,
+        "updates": len(stream),
+        "concurrency": max(1, args.concurrency),
+        "index_load_seconds": round(load_seconds, 3),
+        "updates_per_sec": round(len(stream) / elapsed, 1),
+        "latency": latency_summary(every),
+        "latency_by_kind": {
+            "verify": latency_summary(latencies["verify"]),
+            "mutation": latency_summary([s for kind, v in latencies.items() if kind != "verify" for s in v]),
+        },
+        "handler_calls": calls,
+        "handler_errors": errors,
+        "db_queries_per_update": round(db_queries / len(stream), 2),
+        "api_calls": dict(api.calls),
+        # ru_maxrss is in KiB on Linux, bytes on macOS.
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 ** 2), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,10000,100000", help="comma-separated admin-table sizes")
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--warmup", type=int, default=200, help="unmeasured /verify updates first")
+    parser.add_argument("--verify-share", type=float, default=0.95)
+    parser.add_argument("--concurrency", type=int, default=1, help="CONCURRENT_UPDATES for the run")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds the fake Bot API takes per call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)  # Set for the per-size subprocess
+    args = parser.parse_args()
+
+    if args.size is not None:
+        print(json.dumps(asyncio.run(run_size(args))))
+        return
+
+    runs = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        print(f"admins={size}: replaying {args.updates} updates...", file=sys.stderr)
+        command = [
+            sys.executable, os.path.abspath(__file__), "--size", str(size),
+            "--updates", str(args.updates), "--warmup", str(args.warmup),
+            "--verify-share", str(args.verify_share), "--concurrency", str(args.concurrency),
+            "--api-latency", str(args.api_latency), "--seed", str(args.seed),
+        ]
+        with tempfile.TemporaryDirectory() as workdir:
+            env = {**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))}
+            done = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+        if done.returncode:
+            sys.stderr.write(done.stderr)
+            sys.exit(f"admins={size}: benchmark run failed")
+        runs.append(json.loads(done.stdout.strip().splitlines()[-1]))
+        print(f"  {runs[-1]['updates_per_sec']} updates/s, p99 {runs[-1]['latency']['p99_ms']} ms", file=sys.stderr)
+
+    report = {
+        "benchmark": "bench_load",
+        "python": platform.python_version(),
+        "python_telegram_bot": telegram.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "settings": {
+            "updates": args.updates, "warmup": args.warmup, "verify_share": args.verify_share,
+            "concurrency": args.concurrency, "api_latency": args.api_latency, "seed": args.seed,
+        },
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as out:
+            out.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Lookalike search benchmark: 100k stored addresses, timing near-miss, vanity and
+unrelated queries against LookalikeIndex.
+
+    python benchmarks/bench_lookalike.py [--size 100000] [--queries 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from botmodule import load_bot
+
+HEX = "0123456789abcdef"
+
+
+def random_address(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choice(HEX) for _ in range(40))
+
+
+def mutate(rng: random.Random, value: str, edits: int) -> str:
+    mutated = value
+    while mutated == value:  # Two edits can cancel out
+        mutated = _apply_edits(rng, value, edits)
+    return mutated
+
+
+def _apply_edits(rng: random.Random, value: str, edits: int) -> str:
+    chars = list(value)
+    for _ in range(edits):
+        position = rng.randrange(2, len(chars))
+        operation = rng.choice(("substitute", "insert", "delete"))
+        if operation == "substitute":
+            chars[position] = rng.choice([c for c in HEX if c != chars[position]])
+        elif operation == "insert":
+            chars.insert(position, rng.choice(HEX))
+        else:
+            del chars[position]
+    return "".join(chars)
+
+
+def vanity(rng: random.Random, value: str, affix: int) -> str:
+    middle = "".join(rng.choice(HEX) for _ in range(len(value) - 2 * affix))
+    return value[:affix] + middle + value[-affix:]
+
+
+def timed(index, queries):
+    timings, found = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        matches = index.search(query)
+        timings.append(time.perf_counter() - started)
+        found += bool(matches)
+    timings.sort()
+    return {
+        "found": f"{found}/{len(queries)}",
+        "mean_us": round(statistics.fmean(timings) * 1e6, 1),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1] * 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    bot = load_bot()
+    rng = random.Random(args.seed)
+    stored = [random_address(rng) for _ in range(args.size)]
+    index = bot.LookalikeIndex()
+    started = time.perf_counter()
+    for key in stored:
+        index.add(key)
+    print(f"Indexed {args.size} addresses in {time.perf_counter() - started:.2f}s")
+
+    targets = [rng.choice(stored) for _ in range(args.queries)]
+    cases = {
+        "1 edit": [mutate(rng, t, 1) for t in targets],
+        "2 edits": [mutate(rng, t, 2) for t in targets],
+        "vanity (same prefix+suffix)": [vanity(rng, t, bot.LOOKALIKE_AFFIX_LENGTH) for t in targets],
+        "unrelated": [random_address(rng) for _ in targets],
+    }
+    for name, queries in cases.items():
+        print(f"{name:>28}: {timed(index, queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Cost of the handler instrumentation: the per-call overhead of the
+Metrics.instrument wrapper, the SQLAlchemy cursor hooks and the API-call
+counter, next to a trivial SQLite query for scale. The DB hooks are called
+directly with a real execution context: end to end, aiosqlite's thread hop
+adds far more jitter per query than the hooks cost. Each figure is the best
+of --repeat runs.
+
+    python benchmarks/bench_metrics.py [--calls 200000] [--queries 50000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import create_engine, event, text
+
+from botmodule import load_bot
+
+
+async def handler(update, context):
+    return None
+
+
+async def per_call(callback, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await callback(None, None)
+    return (time.perf_counter() - started) / calls
+
+
+def per_query(engine, queries: int) -> float:
+    with engine.connect() as connection:
+        started = time.perf_counter()
+        for _ in range(queries):
+            connection.execute(text("SELECT 1"))
+        return (time.perf_counter() - started) / queries
+
+
+def per_hook_pair(bot, connection, context, queries: int) -> float:
+    started = time.perf_counter()
+    for _ in range(queries):
+        bot._query_started(connection, None, "SELECT 1", (), context, False)
+        bot._query_finished(connection, None, "SELECT 1", (), context, False)
+    return (time.perf_counter() - started) / queries
+
+
+async def run(bot, calls: int, queries: int, repeat: int) -> None:
+    wrapped_handler = bot.metrics.instrument("bench", handler)
+    bare = min([await per_call(handler, calls) for _ in range(repeat)])
+    wrapped = min([await per_call(wrapped_handler, calls) for _ in range(repeat)])
+
+    engine = create_engine("sqlite://")
+    plain_query = min(per_query(engine, queries) for _ in range(repeat))
+    contexts = []
+    event.listen(engine, "before_cursor_execute", lambda *args: contexts.append(args[4]))
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        hooks = min(per_hook_pair(bot, connection, contexts[0], queries) for _ in range(repeat))
+
+    timing = bot.Timing(bot.metrics.handlers["bench"])
+    token = bot.command_timing.set(timing)
+    started = time.perf_counter()
+    for _ in range(calls):
+        bot.metrics.record_api_call("sendMessage", 0.05)
+    api_hook = (time.perf_counter() - started) / calls
+    bot.command_timing.reset(token)
+
+    print(f"handler wrapper:  {(wrapped - bare) * 1e6:>8.2f} µs per update  (bare await {bare * 1e6:.2f} µs)")
+    print(f"DB cursor hooks:  {hooks * 1e6:>8.2f} µs per query   (SELECT 1 {plain_query * 1e6:.1f} µs)")
+    print(f"API call hook:    {api_hook * 1e6:>8.2f} µs per call    (a Bot API round trip is ~50,000 µs)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(load_bot(), args.calls, args.queries, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Group-scanner throughput: messages per second through find_payment_details,
+parse_payment_detail and check_payment_detail, for ordinary chat and for
+messages carrying addresses.
+
+    python benchmarks/bench_scanner.py [--messages 200000] [--admins 1000]
+"""
+import argparse
+import random
+import time
+
+from botmodule import load_bot
+
+CHAT_LINES = [
+    "gm everyone, anyone selling USDT today?",
+    "price is 91 per dollar, dm me",
+    "ok bro sent, check pls",
+    "What time does the admin come online? Need 500 urgently",
+    "lol 😂😂",
+    "join the main group link in bio, rates updated at 10:30",
+    "can someone vouch for @trustedseller123",
+    "payment done via bank transfer, ref no. 4482193301",
+]
+
+
+def random_evm(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40))
+
+
+def throughput(bot, index, messages) -> float:
+    started = time.perf_counter()
+    for text in messages:
+        for value in bot.find_payment_details(text):
+            try:
+                detail = bot.parse_payment_detail(value)
+            except bot.InvalidPaymentDetail:
+                continue
+            bot.check_payment_detail(detail, index)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--admins", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    bot = load_bot()
+    rng = random.Random(args.seed)
+    registered = [random_evm(rng) for _ in range(args.admins)]
+    index = bot.VerificationIndex()
+    for n, address in enumerate(registered):
+        index.add_payment(f"admin{n}", False, bot.canonical_payment_key(address))
+
+    plain = [rng.choice(CHAT_LINES) for _ in range(args.messages)]
+    with_address = [
+        f"send to {rng.choice(registered) if rng.random() < 0.5 else random_evm(rng)} and ping me, or upi seller{n}@okaxis"
+        for n in range(args.messages // 10)
+    ]
+    print(f"plain chat:          {throughput(bot, index, plain):>12,.0f} msg/s")
+    print(f"with payment detail: {throughput(bot, index, with_address):>12,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
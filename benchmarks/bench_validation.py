@@ -0,0 +1,206 @@
+"""
+Payment-detail validation: a correctness pass over a fixed corpus (EIP-55,
+BIP 173/350 and known-address vectors: valid, other chains and invalid), then
+parse_payment_detail throughput per network on generated addresses, and how
+many single-character typos each format catches. Exits non-zero if any corpus
+entry or generated address is judged wrongly.
+
+    python benchmarks/bench_validation.py [--count 5000] [--seed 7]
+"""
+import argparse
+import hashlib
+import random
+import sys
+import time
+
+import botmodule  # noqa: F401  Puts the repository root on sys.path
+import payment_details
+
+# (input, canonical value) pairs that must be accepted.
+VALID = [
+    ("0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed", "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"),
+    ("0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359", "0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359"),
+    ("0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB", "0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB"),
+    ("0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb", "0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb"),
+    ("0x52908400098527886E0F7030069857D2E4169EE7", "0x52908400098527886E0F7030069857D2E4169EE7"),
+    ("0xde709f2102306220921060314715629080e2fb77", "0xde709f2102306220921060314715629080e2fb77"),
+    ("0x5aaeb6053f3e94c9b9a09f33669435e7ef1beaed", "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"),
+    ("0X5AAEB6053F3E94C9B9A09F33669435E7EF1BEAED", "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"),
+    (" 0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed\n", "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"),
+    ("1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"),
+    ("3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy", "3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy"),
+    ("1111111111111111111114oLvT2", "1111111111111111111114oLvT2"),
+    ("BC1QW508D6QEJXTDG4Y5R3ZARVARY0C5XW7KV8F3T4", "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4"),
+    ("bc1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3qccfmv3",
+     "bc1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3qccfmv3"),
+    ("bc1pw508d6qejxtdg4y5r3zarvary0c5xw7kw508d6qejxtdg4y5r3zarvary0c5xw7kt5nd6y",
+     "bc1pw508d6qejxtdg4y5r3zarvary0c5xw7kw508d6qejxtdg4y5r3zarvary0c5xw7kt5nd6y"),
+    ("BC1SW50QGDZ25J", "bc1sw50qgdz25j"),
+    ("bc1zw508d6qejxtdg4y5r3zarvaryvaxxpcs", "bc1zw508d6qejxtdg4y5r3zarvaryvaxxpcs"),
+    ("bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0",
+     "bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0"),
+    ("TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t", "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"),
+    ("TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7", "TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7"),
+    ("john.doe@okaxis", "john.doe@okaxis"),
+    ("Shop_99-Store@YBL", "shop_99-store@ybl"),
+    ("9876543210 @paytm", "9876543210@paytm"),
+    ("upi://pay?pa=Shop.Name@ybl&pn=Shop%20Name&am=10", "shop.name@ybl"),
+    ("UPI://pay?pn=x&pa=merchant%40icici", "merchant@icici"),
+]
+
+# Addresses of other chains (and strings shaped like none of the checked
+# formats): accepted as written, with no network.
+OTHER = [
+    "LQL9pVH1LsMfKwt3E1NjM4QGkS2Ba4tdC9",  # Litecoin
+    "ltc1qg82tjmlc3h8x7jmzs7jv8ssr7v0dx7l8qnlq5n",  # Litecoin SegWit
+    "7EcDhSYGxXyscszYEp35KHN8vvw3svAuLKTzXwCFLtV",  # Solana
+    "EQDtFpEwcFAEcRe5mLVh2N6C0x-_hJEM7W61_JLnSF74p4q2",  # TON
+    "0x5d47c8e2cd2f3ad0e2a7a5a7b8a9d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8",  # Sui / Aptos (0x + 64 hex digits)
+    "5aaeb6053f3e94c9b9a09f33669435e7ef1beaed",  # 40 hex digits without 0x
+    "tc1qw508d6qejxtdg4y5r3zarvary0c5xw7kg3g4ty",  # Not a Bitcoin prefix
+]
+
+# Inputs that must be rejected.
+INVALID = [
+    "",
+    "hello",
+    "ltc1 q",  # Too short for another chain's address
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeD",  # EIP-55 case flipped
+    "0x5aaeb6053f3e94c9b9a09f33669435e7ef1beae",  # 39 digits
+    "0x5aaeb6053f3e94c9b9a09f33669435e7ef1beaedd",  # 41 digits
+    "0xg5aeb6053f3e94c9b9a09f33669435e7ef1beaed",
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb",  # Checksum
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfN0",  # '0' is not base58
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNaa",
+    "3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLY",
+    "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6T",
+    "T92i5aCwmPamVJDPwNJyBYTEbAsi7Hsfqy",  # Valid base58check, but version 0x40 is not TRON
+    "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6tX",  # One character too many
+    "0x5aaeb6053f3e94c9b9a09f",  # Half an EVM address
+    "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t5",  # Checksum
+    "BC13W508D6QEJXTDG4Y5R3ZARVARY0C5XW7KN40WF2",  # v0 with bech32m-style program length
+    "bc1rw5uspcuh",
+    "bc10w508d6qejxtdg4y5r3zarvary0c5xw7kw508d6qejxtdg4y5r3zarvary0c5xw7kw5rljs90",
+    "BC1QR508D6QEJXTDG4Y5R3ZARVARYV98GJ9P",
+    "bc1zw508d6qejxtdg4y5r3zarvaryvqyzf3du",  # Non-zero padding
+    "bc1gmk9yu",
+    "bc1QW508D6QEJXTDG4Y5R3ZARVARY0C5XW7KV8F3T4",  # Mixed case
+    "bc1p38j9r5y49hruaue7wxjce0updqjuyyx0kh56v8s25huc6995vvpql3jow4",  # 'o' is not bech32
+    "bc1pw5dgrnzv",  # Program too short
+    "bc1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3pjxtptv",  # v0 address with bech32m checksum
+    "x@y",
+    "foo@bar.com",
+    "name@bank1",
+    "upi://pay?pn=Shop",
+    "upi://pay?pa=not-an-id",
+]
+
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BECH32 = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+
+def base58check(version: int, payload: bytes) -> str:
+    raw = bytes([version]) + payload
+    raw += hashlib.sha256(hashlib.sha256(raw).digest()).digest()[:4]
+    number, digits = int.from_bytes(raw, "big"), ""
+    while number:
+        number, digit = divmod(number, 58)
+        digits = BASE58[digit] + digits
+    return "1" * (len(raw) - len(raw.lstrip(b"\0"))) + digits
+
+
+def segwit(version: int, program: bytes) -> str:
+    data, accumulator, bits = [version], 0, 0
+    for byte in program:
+        accumulator, bits = accumulator << 8 | byte, bits + 8
+        while bits >= 5:
+            bits -= 5
+            data.append(accumulator >> bits & 31)
+    if bits:
+        data.append(accumulator << (5 - bits) & 31)
+    constant = payment_details.BECH32_CONSTANT if version == 0 else payment_details.BECH32M_CONSTANT
+    polymod = payment_details.bech32_polymod([3, 3, 0, 2, 3] + data + [0] * 6) ^ constant
+    data += [polymod >> 5 * (5 - i) & 31 for i in range(6)]
+    return "bc1" + "".join(BECH32[d] for d in data)
+
+
+def generate(rng: random.Random, count: int) -> dict:
+    """network -> list of (input, canonical value)."""
+    evm = ["".join(rng.choice("0123456789abcdef") for _ in range(40)) for _ in range(count)]
+    checksummed = [payment_details.eip55_address(digits) for digits in evm]
+    return {
+        "EVM lowercase": [("0x" + digits, value) for digits, value in zip(evm, checksummed)],
+        "EVM EIP-55": [(value, value) for value in checksummed],
+        "Bitcoin base58": [(a, a) for a in (base58check(rng.choice((0, 5)), rng.randbytes(20)) for _ in range(count))],
+        "Bitcoin bech32": [(a, a) for a in (segwit(0, rng.randbytes(20)) for _ in range(count))],
+        "Bitcoin bech32m": [(a, a) for a in (segwit(1, rng.randbytes(32)) for _ in range(count))],
+        "TRON": [(a, a) for a in (base58check(0x41, rng.randbytes(20)) for _ in range(count))],
+        "UPI": [(f"User.{n}@OKAXIS", f"user.{n}@okaxis") for n in range(count)],
+    }
+
+
+def typo(rng: random.Random, value: str) -> str:
+    """`value` with one character replaced by another one valid in its format."""
+    if value.startswith("0x"):
+        alphabet = "0123456789abcdef" if value == value.lower() else "0123456789abcdefABCDEF"
+    else:
+        alphabet = BECH32 if value.startswith("bc1") else BASE58
+    position = rng.randrange(3, len(value) - 1) if "@" not in value else rng.randrange(len(value.split("@")[0]))
+    return value[:position] + rng.choice([c for c in alphabet if c != value[position]]) + value[position + 1:]
+
+
+def accepts(value: str):
+    try:
+        return payment_details.parse_payment_detail(value)
+    except payment_details.InvalidPaymentDetail:
+        return None
+
+
+def check_corpus() -> int:
+    failures = 0
+    for value, expected in VALID:
+        detail = accepts(value)
+        if detail is None or detail.value != expected or detail.lookup_key != payment_details.canonical_payment_key(expected):
+            print(f"  WRONG: {value!r} -> {detail and detail.value!r}, expected {expected!r}")
+            failures += 1
+    for value in OTHER:
+        detail = accepts(value)
+        if detail is None or detail.network is not None or detail.value != value or detail.lookup_key != payment_details.canonical_payment_key(value):
+            print(f"  WRONG: {value!r} -> {detail and (detail.network, detail.value)!r}, expected another chain")
+            failures += 1
+    for value in INVALID:
+        detail = accepts(value)
+        if detail is not None:
+            print(f"  WRONG: {value!r} accepted as {detail.value!r}")
+            failures += 1
+    total = len(VALID) + len(OTHER) + len(INVALID)
+    print(f"corpus: {total - failures}/{total} judged correctly")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = check_corpus()
+
+    print(f"{'network':>16} {'parses/s':>10} {'µs each':>8}  typos caught")
+    for network, cases in generate(rng, args.count).items():
+        payment_details.eip55_address.cache_clear()  # Time the cold path: every address is new
+        started = time.perf_counter()
+        details = [accepts(value) for value, _ in cases]
+        elapsed = time.perf_counter() - started
+        wrong = sum(detail is None or detail.value != expected for detail, (_, expected) in zip(details, cases))
+        if wrong:
+            print(f"  WRONG: {wrong} generated {network} details misjudged")
+            failures += wrong
+        caught = sum(accepts(typo(rng, value)) is None for value, _ in cases)
+        print(f"{network:>16} {len(cases) / elapsed:>10,.0f} {elapsed / len(cases) * 1e6:>8.1f}  {caught / len(cases):.1%}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
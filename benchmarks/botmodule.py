@@ -0,0 +1,24 @@
+"""Loads the bot script as a module so benchmarks can use its classes and handlers."""
+import importlib.util
+import logging
+import pathlib
+import sys
+
+BOT_PATH = pathlib.Path(__file__).resolve().parent.parent / "import pw bot py.py"
+
+# Running the script puts its directory (and so payment_details.py) on
+# sys.path; importing it by path does not.
+if str(BOT_PATH.parent) not in sys.path:
+    sys.path.insert(0, str(BOT_PATH.parent))
+
+
+def load_bot():
+    """Imports the bot script once (its file name is not a valid module name)."""
+    if "pw_bot" in sys.modules:
+        return sys.modules["pw_bot"]
+    spec = importlib.util.spec_from_file_location("pw_bot", BOT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["pw_bot"] = module
+    spec.loader.exec_module(module)
+    logging.getLogger().setLevel(logging.WARNING)
+    return module
@@ -1,93 +1,2110 @@
+import csv
+import datetime
+import asyncio
+import bisect
+import collections
+import contextvars
+import functools
+import hashlib
+import heapq
+import html
+import io
+import json
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InlineQueryResultsButton,
+    InputTextMessageContent,
+    ReplyParameters,
+    Update,
+)
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
+    BaseUpdateProcessor,
+    CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
+    InlineQueryHandler,
+    MessageHandler,
     filters,
 )
 from telegram.constants import ParseMode
-from sqlalchemy import create_engine, Column, String, Integer, Boolean
-from sqlalchemy.orm import declarative_base, sessionmaker, Session as SQLAlchemySession
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+from telegram.request import HTTPXRequest
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Integer, String, UniqueConstraint,
+    and_, bindparam, event, func, insert, inspect, or_, select, text,
+)
+from sqlalchemy import update as sql_update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from payment_details import InvalidPaymentDetail, PaymentDetail, canonical_payment_key, parse_payment_detail
+
+# =============================================================================
+# 1. SETUP LOGGING
+# =============================================================================
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# 2. CONFIGURATION
+# =============================================================================
+# IMPORTANT: Replace with your actual bot token (or set BOT_TOKEN)
+TOKEN = os.environ.get("BOT_TOKEN", "8146817570:AAH6k5ZcmTGYJlFEfx7PxhZeDSj5dl6lRHs")
+OWNER_ID = int(os.environ.get("OWNER_ID", "549086084"))
+VERIFICATION_GROUP_ID = int(os.environ.get("VERIFICATION_GROUP_ID", "-1001219085941"))
+MAIN_GROUP_LINK = os.environ.get("MAIN_GROUP_LINK", "https://t.me/+4Yc9OHxB87NlOTNl")
+
+# Several communities from one process: a JSON file such as
+#   [{"chat_id": -1001234, "name": "pagal", "title": "Pagal World", "link": "https://t.me/+..."}]
+# Without it the bot serves the single group above. Admins created before
+# groups existed belong to VERIFICATION_GROUP_ID.
+GROUPS_FILE = os.environ.get("GROUPS_FILE", "")
+
+# Serving mode: "polling" (default) or "webhook".
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+# Webhook settings (only used when BOT_MODE=webhook).
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")  # Public HTTPS base URL Telegram posts to
+WEBHOOK_LISTEN = os.environ.get("WEBHOOK_LISTEN", "127.0.0.1")  # Local interface of the HTTP listener
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "telegram")
+# Required in webhook mode: Telegram sends it as X-Telegram-Bot-Api-Secret-Token
+# and the listener refuses POSTs without it, so nobody can forge updates.
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+# Leave these empty when a reverse proxy terminates TLS in front of the listener.
+WEBHOOK_CERT = os.environ.get("WEBHOOK_CERT", "")
+WEBHOOK_KEY = os.environ.get("WEBHOOK_KEY", "")
+
+# How many updates may be handled at once (writes stay serialized, see section 18).
+# 0 or 1 keeps strictly sequential processing.
+CONCURRENT_UPDATES = int(os.environ.get("CONCURRENT_UPDATES", "32"))
+
+# Memory-mapped file of known scam addresses (built with /blocklist_load or --load-blocklist).
+BLOCKLIST_PATH = os.environ.get("BLOCKLIST_PATH", "scam_blocklist.bin")
+
+# UPI handles (the part after '@') the group scanner recognizes besides the
+# common ones in UPI_HANDLES, comma-separated, e.g. "okbizaxis,myBank".
+EXTRA_UPI_HANDLES = os.environ.get("EXTRA_UPI_HANDLES", "")
+
+# Prometheus text endpoint at http://METRICS_LISTEN:METRICS_PORT/metrics. 0 disables it.
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_LISTEN = os.environ.get("METRICS_LISTEN", "127.0.0.1")
+
+
+# =============================================================================
+# 3. PAYMENT DETAILS
+# =============================================================================
+# Parsing, checksums and lookup keys live in payment_details.py next to this
+# script (imported at the top); see parse_payment_detail.
+
+
+# =============================================================================
+# 4. DATABASE SETUP
+# =============================================================================
+Base = declarative_base()
+
+class Admin(Base):
+    """An admin of one verification group. The same person may be an admin of several groups."""
+    __tablename__ = 'admins'
+    __table_args__ = (
+        UniqueConstraint('group_id', 'username'),
+        UniqueConstraint('group_id', 'user_id'),
+    )
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, nullable=False)  # chat_id of the verification group
+    user_id = Column(Integer, nullable=True, index=True)
+    username = Column(String, nullable=False, index=True)
+    is_super_admin = Column(Boolean, default=False)
+    payment_methods = relationship(
+        "PaymentMethod", back_populates="admin", cascade="all, delete-orphan", lazy="selectin"
+    )
+
+class PaymentMethod(Base):
+    """One crypto address or UPI ID owned by an admin. An admin may have many."""
+    __tablename__ = 'payment_methods'
+    __table_args__ = (UniqueConstraint('group_id', 'lookup_key'),)
+    id = Column(Integer, primary_key=True)
+    admin_id = Column(Integer, ForeignKey('admins.id', ondelete='CASCADE'), nullable=False, index=True)
+    group_id = Column(Integer, nullable=False)  # Copy of admin.group_id, for the per-group unique key
+    kind = Column(String, nullable=False)  # "crypto" or "upi"
+    network = Column(String, nullable=True)  # PaymentDetail.network: "EVM", "Bitcoin", "TRON" or "UPI"; None if unknown
+    value = Column(String, nullable=False)  # Canonical form, see parse_payment_detail
+    lookup_key = Column(String, nullable=False, index=True)  # canonical_payment_key(value)
+    admin = relationship("Admin", back_populates="payment_methods", lazy="joined")
+
+class ScamReport(Base):
+    """A payment detail a super admin reported as a scam through the bot."""
+    __tablename__ = 'scam_reports'
+    id = Column(Integer, primary_key=True)
+    value = Column(String, nullable=False)
+    lookup_key = Column(String, nullable=False, unique=True)
+    reported_by = Column(Integer, nullable=False)
+    reported_at = Column(DateTime, nullable=False, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+
+class VerificationLog(Base):
+    """Append-only record of one verification lookup. Written in batches by AuditLog."""
+    __tablename__ = 'verification_log'
+    id = Column(Integer, primary_key=True)
+    checked_at = Column(DateTime, nullable=False, index=True)
+    source = Column(String, nullable=False)  # "verify" or "inline"
+    group_id = Column(Integer, nullable=True, index=True)  # Group checked against; NULL for old inline rows
+    chat_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    value = Column(String, nullable=False)
+    lookup_key = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # Verdict.status
+
+class VerificationTally(Base):
+    """Lookups per group, payment detail, verdict and hour; kept in step with verification_log."""
+    __tablename__ = 'verification_tallies'
+    group_id = Column(Integer, primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    lookup_key = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    value = Column(String, nullable=False)  # Most recent spelling, for display
+    checks = Column(Integer, nullable=False, default=0)
+
+# All database work goes through an async engine (aiosqlite) so that a slow
+# query never blocks the event loop that is serving other updates.
+engine = create_async_engine('sqlite+aiosqlite:///payment_verification.db', pool_pre_ping=True)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+async def init_db():
+    """Creates the tables if needed. Exits the process if the database is unreachable."""
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(migrate_legacy_payment_columns)
+            await conn.run_sync(migrate_group_scoping)
+            await conn.run_sync(migrate_canonical_payment_values)
+            await conn.run_sync(migrate_payment_networks)
+            await conn.run_sync(migrate_case_sensitive_keys)
+            await conn.run_sync(migrate_audit_group_scoping)
+        logger.info("Database connection established and tables are ready.")
+    except Exception as e:
+        logger.critical(f"FATAL: Could not connect to the database. Exiting. Error: {e}")
+        raise SystemExit(1)
+
+def migrate_legacy_payment_columns(conn) -> None:
+    """
+    Moves the old one-per-admin `crypto_address` / `upi_id` columns into the
+    payment_methods table and drops them. A no-op once the columns are gone.
+    """
+    legacy = {"crypto_address": "crypto", "upi_id": "upi"}
+    columns = {c["name"] for c in inspect(conn).get_columns("admins")}
+    present = [c for c in legacy if c in columns]
+    if not present:
+        return
+
+    seen = set(conn.execute(text("SELECT lookup_key FROM payment_methods")).scalars())
+    moved = 0
+    for column in present:
+        rows = conn.execute(text(f"SELECT id, {column} FROM admins WHERE {column} IS NOT NULL AND {column} != ''"))
+        for admin_id, value in rows.all():
+            key = canonical_payment_key(value)
+            if key in seen:
+                logger.warning(f"Migration: skipping duplicate payment value '{value}' of admin id {admin_id}.")
+                continue
+            seen.add(key)
+            # payment_methods was just created by create_all, so it already has group_id.
+            conn.execute(
+                text("INSERT INTO payment_methods (admin_id, group_id, kind, value, lookup_key) VALUES (:a, :g, :k, :v, :l)"),
+                {"a": admin_id, "g": VERIFICATION_GROUP_ID, "k": legacy[column], "v": value, "l": key},
+            )
+            moved += 1
+    for column in present:
+        conn.execute(text(f"ALTER TABLE admins DROP COLUMN {column}"))
+    logger.info(f"Migration: moved {moved} legacy payment values into payment_methods.")
+
+def migrate_group_scoping(conn) -> None:
+    """
+    Recreates admins and payment_methods with a group_id column and per-group
+    unique keys (SQLite cannot change constraints in place), assigning every
+    existing row to VERIFICATION_GROUP_ID. A no-op once the column exists.
+    """
+    if "group_id" in {c["name"] for c in inspect(conn).get_columns("admins")}:
+        return
+    admins = conn.execute(text("SELECT id, user_id, username, is_super_admin FROM admins")).mappings().all()
+    methods = conn.execute(text("SELECT id, admin_id, kind, value, lookup_key FROM payment_methods")).mappings().all()
+    PaymentMethod.__table__.drop(conn)
+    Admin.__table__.drop(conn)
+    Admin.__table__.create(conn)
+    PaymentMethod.__table__.create(conn)
+    if admins:
+        conn.execute(insert(Admin), [{**row, "group_id": VERIFICATION_GROUP_ID} for row in admins])
+    if methods:
+        conn.execute(insert(PaymentMethod), [{**row, "group_id": VERIFICATION_GROUP_ID} for row in methods])
+    logger.info(f"Migration: assigned {len(admins)} admins to group {VERIFICATION_GROUP_ID}.")
+
+
+CANONICAL_VALUES_VERSION = 1  # PRAGMA user_version once stored payment details are canonical
+
+def migrate_canonical_payment_values(conn) -> None:
+    """
+    Rewrites stored payment details and scam reports in their canonical form
+    (see parse_payment_detail) and re-derives their lookup keys, e.g. a saved
+    upi:// link becomes its UPI ID. Values that do not validate are left as
+    they are, with a warning, so they can still be found and removed. Runs
+    once: PRAGMA user_version records that it has.
+    """
+    if conn.exec_driver_sql("PRAGMA user_version").scalar() >= CANONICAL_VALUES_VERSION:
+        return
+    rewritten = 0
+    for table in (PaymentMethod.__table__, ScamReport.__table__):
+        scoped = "group_id" in table.c  # Payment keys are unique per group, scam reports globally
+        columns = [table.c.id, table.c.value, table.c.lookup_key] + ([table.c.group_id] if scoped else [])
+        rows = conn.execute(select(*columns)).all()
+        taken = {(row[3] if scoped else None, row.lookup_key) for row in rows}
+        for row in rows:
+            try:
+                detail = parse_payment_detail(row.value)
+            except InvalidPaymentDetail as e:
+                logger.warning(f"Migration: {table.name} id {row.id} '{row.value}' left unchanged: {e}")
+                continue
+            if (detail.value, detail.lookup_key) == (row.value, row.lookup_key):
+                continue
+            if detail.lookup_key != row.lookup_key:
+                scope = row[3] if scoped else None
+                if (scope, detail.lookup_key) in taken:
+                    logger.warning(f"Migration: {table.name} id {row.id} '{row.value}' duplicates {detail.value}; left unchanged.")
+                    continue
+                taken.add((scope, detail.lookup_key))
+            conn.execute(
+                sql_update(table).where(table.c.id == row.id).values(value=detail.value, lookup_key=detail.lookup_key)
+            )
+            rewritten += 1
+    conn.exec_driver_sql(f"PRAGMA user_version = {CANONICAL_VALUES_VERSION}")
+    logger.info(f"Migration: rewrote {rewritten} payment details in canonical form.")
+
+
+PAYMENT_NETWORKS_VERSION = 2  # PRAGMA user_version once payment_methods.network is filled in
+
+def migrate_payment_networks(conn) -> None:
+    """
+    Adds payment_methods.network if it is missing and fills it in for rows
+    stored before it existed. Values that do not validate keep a NULL network.
+    Runs once, like migrate_canonical_payment_values.
+    """
+    if "network" not in {c["name"] for c in inspect(conn).get_columns("payment_methods")}:
+        conn.exec_driver_sql("ALTER TABLE payment_methods ADD COLUMN network VARCHAR")
+    if conn.exec_driver_sql("PRAGMA user_version").scalar() >= PAYMENT_NETWORKS_VERSION:
+        return
+    table = PaymentMethod.__table__
+    updates = []
+    for row in conn.execute(select(table.c.id, table.c.value, table.c.lookup_key).where(table.c.network.is_(None))):
+        # An EVM key is the lowercase address, which parses without recomputing its EIP-55 checksum.
+        source = row.lookup_key if row.lookup_key.startswith("0x") else row.value
+        try:
+            updates.append({"row_id": row.id, "network": parse_payment_detail(source).network})
+        except InvalidPaymentDetail:
+            continue
+    if updates:
+        conn.execute(
+            sql_update(table).where(table.c.id == bindparam("row_id")).values(network=bindparam("network")), updates
+        )
+    conn.exec_driver_sql(f"PRAGMA user_version = {PAYMENT_NETWORKS_VERSION}")
+    logger.info(f"Migration: recorded the network of {len(updates)} payment details.")
+
+
+CASE_SENSITIVE_KEYS_VERSION = 3  # PRAGMA user_version once base58 and other chains' keys keep their case
+
+def migrate_case_sensitive_keys(conn) -> None:
+    """
+    Re-derives the lookup keys of stored payment details and scam reports:
+    keys used to be lowercased for every format, which made two base58 or
+    other-chain addresses differing only in case match each other. Keys only
+    become more distinct, so no row collides. Runs once, like
+    migrate_canonical_payment_values.
+    """
+    if conn.exec_driver_sql("PRAGMA user_version").scalar() >= CASE_SENSITIVE_KEYS_VERSION:
+        return
+    rewritten = 0
+    for table in (PaymentMethod.__table__, ScamReport.__table__):
+        updates = [
+            {"row_id": row.id, "key": key}
+            for row in conn.execute(select(table.c.id, table.c.value, table.c.lookup_key))
+            if (key := canonical_payment_key(row.value)) != row.lookup_key
+        ]
+        if updates:
+            conn.execute(
+                sql_update(table).where(table.c.id == bindparam("row_id")).values(lookup_key=bindparam("key")), updates
+            )
+        rewritten += len(updates)
+    conn.exec_driver_sql(f"PRAGMA user_version = {CASE_SENSITIVE_KEYS_VERSION}")
+    logger.info(f"Migration: restored the case of {rewritten} payment lookup keys.")
+
+
+def migrate_audit_group_scoping(conn) -> None:
+    """
+    Adds verification_log.group_id and recreates verification_tallies keyed
+    by group, so /verify_report only counts its own group's lookups. /verify
+    rows get their chat as the group; older inline rows did not record one
+    and stay out of the tallies. A no-op once the column exists.
+    """
+    if "group_id" in {c["name"] for c in inspect(conn).get_columns("verification_log")}:
+        return
+    conn.exec_driver_sql("ALTER TABLE verification_log ADD COLUMN group_id INTEGER")
+    conn.exec_driver_sql("UPDATE verification_log SET group_id = chat_id WHERE source = 'verify'")
+    conn.exec_driver_sql("CREATE INDEX ix_verification_log_group_id ON verification_log (group_id)")
+    VerificationTally.__table__.drop(conn)
+    VerificationTally.__table__.create(conn)
+    # Hours as audit_hour() stores them. With max(), SQLite takes the bare
+    # `value` from the newest row of each tally, i.e. its most recent spelling.
+    tallied = conn.exec_driver_sql("""
+        INSERT INTO verification_tallies (group_id, hour, lookup_key, status, value, checks)
+        SELECT group_id, hour, lookup_key, status, value, checks FROM (
+            SELECT group_id, substr(checked_at, 1, 13) || ':00:00.000000' AS hour, lookup_key, status,
+                   value, max(checked_at), count(*) AS checks
+            FROM verification_log WHERE group_id IS NOT NULL
+            GROUP BY group_id, hour, lookup_key, status
+        )
+    """).rowcount
+    logger.info(f"Migration: rebuilt {tallied} verification tallies per group.")
+
+
+# =============================================================================
+# 5. VERIFICATION INDEX
+# =============================================================================
+class IndexedAdmin:
+    """The slice of an Admin row that /verify needs to render its answer."""
+    __slots__ = ("username", "is_super_admin", "keys")
+
+    def __init__(self, username: str, is_super_admin: bool):
+        self.username = username
+        self.is_super_admin = is_super_admin
+        self.keys = set()  # Lookup keys of this admin's payment methods
+
+
+LOOKALIKE_MAX_DISTANCE = 2  # Edits tolerated before two values count as unrelated
+LOOKALIKE_MIN_LENGTH = 6  # Shorter values are too generic to compare
+LOOKALIKE_AFFIX_LENGTH = 5  # Prefix/suffix size compared for long addresses
+LOOKALIKE_AFFIX_MIN_LENGTH = 20  # Only crypto-length addresses get the prefix/suffix check
+
+def bounded_edit_distance(a: str, b: str, limit: int):
+    """Levenshtein distance between `a` and `b`, or None if it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    too_far = limit + 1
+    previous = [j if j <= limit else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char != b[j - 1]),
+            )
+        if min(current[low - 1:high + 1]) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+def segment_bounds(length: int):
+    """Splits a length into LOOKALIKE_MAX_DISTANCE + 1 contiguous (start, end) segments."""
+    parts = LOOKALIKE_MAX_DISTANCE + 1
+    cuts = [length * n // parts for n in range(parts + 1)]
+    return list(zip(cuts, cuts[1:]))
+
+
+class LookalikeIndex:
+    """
+    Finds stored values that are near misses of a query without scanning them all.
+
+    Uses the pigeonhole principle: split a stored value into k + 1 segments and any
+    string within k edits of it must contain at least one segment unchanged, at
+    most k positions away. Each segment is indexed by (length, position, text), so
+    a query costs a few dozen dict probes plus a banded edit-distance check on the
+    handful of candidates. Long crypto addresses are also bucketed by prefix +
+    suffix to catch "vanity" addresses that only copy both ends. UPI IDs are
+    not: unrelated handles often share a first name and a bank.
+    """
+
+    def __init__(self):
+        self._segments = {}
+        self._affixes = {}
+
+    @staticmethod
+    def _affix(key: str):
+        if len(key) < LOOKALIKE_AFFIX_MIN_LENGTH or "@" in key:  # UPI IDs are chosen, not generated
+            return None
+        return key[:LOOKALIKE_AFFIX_LENGTH] + key[-LOOKALIKE_AFFIX_LENGTH:]
+
+    def add(self, key: str) -> None:
+        if len(key) < LOOKALIKE_MIN_LENGTH:
+            return
+        for position, (start, end) in enumerate(segment_bounds(len(key))):
+            self._segments.setdefault((len(key), position, key[start:end]), set()).add(key)
+        affix = self._affix(key)
+        if affix:
+            self._affixes.setdefault(affix, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        if len(key) < LOOKALIKE_MIN_LENGTH:
+            return
+        for position, (start, end) in enumerate(segment_bounds(len(key))):
+            bucket = self._segments.get((len(key), position, key[start:end]))
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._segments[(len(key), position, key[start:end])]
+        affix = self._affix(key)
+        bucket = self._affixes.get(affix) if affix else None
+        if bucket:
+            bucket.discard(key)
+            if not bucket:
+                del self._affixes[affix]
+
+    def search(self, query: str, limit: int = 3) -> list:
+        """Returns up to `limit` (key, distance) pairs; distance is None for prefix/suffix matches."""
+        if len(query) < LOOKALIKE_MIN_LENGTH:
+            return []
+        k = LOOKALIKE_MAX_DISTANCE
+        candidates = set()
+        for length in range(max(LOOKALIKE_MIN_LENGTH, len(query) - k), len(query) + k + 1):
+            for position, (start, end) in enumerate(segment_bounds(length)):
+                for shift in range(-k, k + 1):
+                    probe_start = start + shift
+                    if probe_start < 0 or probe_start + (end - start) > len(query):
+                        continue
+                    bucket = self._segments.get((length, position, query[probe_start:probe_start + end - start]))
+                    if bucket:
+                        candidates.update(bucket)
+        candidates.discard(query)
+
+        # Short values get less slack: two edits on a 6-character handle is a different handle.
+        allowed = k if len(query) >= 12 else 1
+        matches = []
+        for key in candidates:
+            distance = bounded_edit_distance(query, key, allowed)
+            if distance is not None:
+                matches.append((key, distance))
+        matches.sort(key=lambda match: match[1])
+
+        affix = self._affix(query)
+        if affix and len(matches) < limit:
+            close = {key for key, _ in matches}
+            for key in self._affixes.get(affix, ()):
+                if key != query and key not in close:
+                    matches.append((key, None))
+        return matches[:limit]
+
+
+class VerificationIndex:
+    """
+    In-memory map of payment lookup key -> owning admin for one group, so /verify
+    never touches the database. It is built from the admins table when the group
+    is first used and kept coherent by the write handlers (write-through). Use
+    rebuild() if the DB was edited externally.
+    """
+
+    def __init__(self, group_id: int = None):
+        self.group_id = group_id
+        self._by_value = {}
+        self._by_username = {}
+        self._lookalikes = LookalikeIndex()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._by_value)
+
+    async def rebuild(self) -> None:
+        """Reloads the group's part of the admins and payment_methods tables."""
+        by_value, by_username, lookalikes = {}, {}, LookalikeIndex()
+        async with Session() as session:
+            rows = await session.execute(
+                select(Admin.username, Admin.is_super_admin, PaymentMethod.lookup_key)
+                .outerjoin(PaymentMethod)
+                .where(Admin.group_id == self.group_id)
+            )
+            for username, is_super_admin, lookup_key in rows:
+                entry = by_username.get(username)
+                if entry is None:
+                    entry = by_username[username] = IndexedAdmin(username, is_super_admin)
+                if lookup_key:
+                    entry.keys.add(lookup_key)
+                    by_value[lookup_key] = entry
+                    lookalikes.add(lookup_key)
+        # Swap in one step so lookups never observe a half-built index.
+        self._by_value, self._by_username, self._lookalikes = by_value, by_username, lookalikes
+        logger.info(f"Verification index of group {self.group_id} rebuilt with {len(by_value)} payment values.")
+
+    def lookup(self, key: str):
+        """Returns the IndexedAdmin owning the canonical lookup `key`, or None."""
+        entry = self._by_value.get(key)
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def similar(self, key: str) -> list:
+        """Returns (IndexedAdmin, distance) for registered values that look like `key` but differ."""
+        return [(self._by_value[match], distance) for match, distance in self._lookalikes.search(key)]
+
+    def add_admin(self, username: str, is_super_admin: bool = False) -> None:
+        self._by_username.setdefault(username, IndexedAdmin(username, is_super_admin))
+
+    def remove_admin(self, username: str) -> None:
+        entry = self._by_username.pop(username, None)
+        if entry:
+            for key in entry.keys:
+                if self._by_value.get(key) is entry:
+                    del self._by_value[key]
+                    self._lookalikes.remove(key)
+
+    def set_role(self, username: str, is_super_admin: bool) -> None:
+        entry = self._by_username.get(username)
+        if entry:
+            entry.is_super_admin = is_super_admin
+
+    def keys_of(self, username: str) -> set:
+        """The lookup keys registered to `username` (a copy)."""
+        entry = self._by_username.get(username)
+        return set(entry.keys) if entry else set()
+
+    def add_payment(self, username: str, is_super_admin: bool, key: str) -> None:
+        entry = self._by_username.setdefault(username, IndexedAdmin(username, is_super_admin))
+        entry.keys.add(key)
+        self._by_value[key] = entry
+        self._lookalikes.add(key)
+
+    def remove_payment(self, key: str) -> None:
+        entry = self._by_value.pop(key, None)
+        if entry:
+            entry.keys.discard(key)
+            self._lookalikes.remove(key)
+
+
+
+# =============================================================================
+# 6. SCAM BLOCKLIST
+# =============================================================================
+BLOCKLIST_MAGIC = b"PWSCAM01"
+BLOCKLIST_HEADER = struct.Struct("<8sQQI4x")  # magic, entry count, bloom bits, bloom hashes
+BLOCKLIST_RECORD_SIZE = 16  # blake2b-128 digest per entry
+BLOCKLIST_BITS_PER_ENTRY = 10  # With 7 hashes: ~0.8% of misses fall through to the binary search
+BLOCKLIST_HASHES = 7
+BLOCKLIST_RUN_SIZE = 1_000_000  # Entries sorted in memory per run while building
+BLOCKLIST_UPLOAD_MAX_BYTES = 20 * 1024 * 1024  # Telegram's getFile limit for bots
+
+def blocklist_digest(key: str) -> bytes:
+    # Case-folded so the file stays valid if the lookup-key rules change.
+    return hashlib.blake2b(key.lower().encode(), digest_size=BLOCKLIST_RECORD_SIZE).digest()
+
+def bloom_positions(digest: bytes, bits: int, hashes: int):
+    """Kirsch-Mitzenmacher double hashing on the two halves of the digest."""
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+class ScamBlocklist:
+    """
+    Known scam addresses, stored on disk as one file:
+
+        header | bloom filter | sorted 16-byte digests
+
+    The file is memory-mapped read-only, so opening it costs nothing and only
+    the pages a lookup touches become resident. Most misses are rejected by the
+    Bloom filter; the rest (and all hits) are confirmed by binary search.
+    Single reports made through the bot are kept in a small in-memory overlay
+    (persisted in scam_reports) until the next /blocklist_load writes them into
+    the file; reports the file already holds are dropped from the overlay.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._map = None
+        self._bits = 0
+        self._hashes = 0
+        self._records_at = 0
+        self._reported = set()
+
+    def __len__(self) -> int:
+        return self.count + len(self._reported)
+
+    def open(self) -> None:
+        """Maps the blocklist file (if any) and reads its header."""
+        self.close()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < BLOCKLIST_HEADER.size:
+            return
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._bits, self._hashes = BLOCKLIST_HEADER.unpack_from(self._map, 0)
+        if magic != BLOCKLIST_MAGIC:
+            logger.error(f"{self.path} is not a scam blocklist file; ignoring it.")
+            self.close()
+            return
+        self._records_at = BLOCKLIST_HEADER.size + self._bits // 8
+        self._reported = {digest for digest in self._reported if not self._file_contains(digest)}
+        logger.info(f"Scam blocklist mapped with {self.count} entries.")
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = self._file = None
+        self.count = 0
+
+    def report(self, key: str) -> None:
+        digest = blocklist_digest(key)
+        if not self._file_contains(digest):
+            self._reported.add(digest)
+
+    def contains(self, key: str) -> bool:
+        digest = blocklist_digest(key)
+        return digest in self._reported or self._file_contains(digest)
+
+    def _file_contains(self, digest: bytes) -> bool:
+        if not self.count:
+            return False
+        data = self._map
+        for position in bloom_positions(digest, self._bits, self._hashes):
+            if not data[BLOCKLIST_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._records_at + middle * BLOCKLIST_RECORD_SIZE
+            record = data[offset:offset + BLOCKLIST_RECORD_SIZE]
+            if record < digest:
+                low = middle + 1
+            elif record > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def reported_digests(self) -> list:
+        """The overlay's digests, sorted like the file's records."""
+        return sorted(self._reported)
+
+    def existing_digests(self):
+        """Yields the digests in the current file, in order, via a private file handle."""
+        if not self.count:
+            return
+        with open(self.path, "rb") as handle:
+            handle.seek(self._records_at)
+            for _ in range(self.count):
+                yield handle.read(BLOCKLIST_RECORD_SIZE)
+
+
+def write_blocklist(path: str, keys, existing: ScamBlocklist = None) -> int:
+    """
+    Writes a new blocklist file at `path` from an iterable of lookup keys,
+    merged with the entries of `existing` (its file and its overlay of single
+    reports), and returns the entry count. Input is
+    sorted in runs on disk, so millions of keys need little memory. Blocking:
+    run it in a worker thread.
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as workdir:
+        reported = existing.reported_digests() if existing else []
+        runs, chunk, upper_bound = [], [], len(existing) if existing else 0
+
+        def spill():
+            run_path = os.path.join(workdir, f"run{len(runs)}")
+            with open(run_path, "wb") as run:
+                run.writelines(sorted(chunk))
+            runs.append(run_path)
+            chunk.clear()
+
+        for key in keys:
+            chunk.append(blocklist_digest(key))
+            upper_bound += 1
+            if len(chunk) >= BLOCKLIST_RUN_SIZE:
+                spill()
+        if chunk:
+            spill()
+
+        def read_run(run_path):
+            with open(run_path, "rb") as run:
+                while record := run.read(BLOCKLIST_RECORD_SIZE):
+                    yield record
+
+        sources = [read_run(run_path) for run_path in runs]
+        if existing:
+            sources.append(existing.existing_digests())
+            sources.append(iter(reported))
+
+        bits = max(64, upper_bound * BLOCKLIST_BITS_PER_ENTRY + 7) // 8 * 8
+        bloom = bytearray(bits // 8)
+        count, previous = 0, None
+        partial = os.path.join(workdir, "blocklist.partial")
+        with open(partial, "wb") as out:
+            out.write(BLOCKLIST_HEADER.pack(BLOCKLIST_MAGIC, 0, bits, BLOCKLIST_HASHES))
+            out.write(bloom)
+            for digest in heapq.merge(*sources):
+                if digest == previous:
+                    continue
+                previous = digest
+                out.write(digest)
+                count += 1
+                for position in bloom_positions(digest, bits, BLOCKLIST_HASHES):
+                    bloom[position >> 3] |= 1 << (position & 7)
+            out.seek(0)
+            out.write(BLOCKLIST_HEADER.pack(BLOCKLIST_MAGIC, count, bits, BLOCKLIST_HASHES))
+            out.write(bloom)
+        os.replace(partial, path)
+    return count
+
+
+def blocklist_keys(lines):
+    """
+    Lookup keys from blocklist source lines: first comma-separated field, '#'
+    comments skipped. Lines are folded without parse_payment_detail: for a
+    valid detail that is the same key, and feeds often hold millions of
+    EIP-55 addresses whose pure-Python Keccak would take minutes. A malformed
+    line only costs a slot, since /verify never looks one up.
+    """
+    for line in lines:
+        value = line.split(",", 1)[0].strip()
+        if value and not value.startswith("#"):
+            yield canonical_payment_key(value)
+
+def load_blocklist_file(source: str) -> None:
+    """Command-line entry point: merges a text file of addresses into BLOCKLIST_PATH."""
+    existing = ScamBlocklist(BLOCKLIST_PATH)
+    existing.open()
+    try:
+        with open(source, encoding="utf-8", errors="replace") as lines:
+            count = write_blocklist(BLOCKLIST_PATH, blocklist_keys(lines), existing)
+    finally:
+        existing.close()
+    logger.info(f"Scam blocklist {BLOCKLIST_PATH} now holds {count} entries.")
+
+
+scam_blocklist = ScamBlocklist(BLOCKLIST_PATH)
+
+
+# =============================================================================
+# 7. AUTHORIZATION
+# =============================================================================
+class Principal:
+    """What the bot knows about a linked Telegram account."""
+    __slots__ = ("user_id", "username", "is_super_admin")
+
+    def __init__(self, user_id: int, username: str, is_super_admin: bool):
+        self.user_id = user_id
+        self.username = username
+        self.is_super_admin = is_super_admin
+
+    @property
+    def role(self) -> str:
+        return "super_admin" if self.is_super_admin else "admin"
+
+
+class PrincipalCache:
+    """
+    Complete in-memory copy of who is an admin of one group: linked accounts by
+    Telegram user_id, plus the usernames still waiting to be linked via /start.
+    Because it holds every admin, a miss means "not an admin" and needs no query.
+    """
+
+    def __init__(self, group_id: int = None):
+        self.group_id = group_id
+        self._by_user_id = {}
+        self._user_id_by_username = {}
+        self.pending_usernames = set()
+
+    async def rebuild(self) -> None:
+        """Reloads the group's principals from the admins table."""
+        by_user_id, by_username, pending = {}, {}, set()
+        async with Session() as session:
+            rows = await session.execute(
+                select(Admin.user_id, Admin.username, Admin.is_super_admin).where(Admin.group_id == self.group_id)
+            )
+            for user_id, username, is_super_admin in rows:
+                if user_id is None:
+                    pending.add(username)
+                else:
+                    by_user_id[user_id] = Principal(user_id, username, is_super_admin)
+                    by_username[username] = user_id
+        self._by_user_id, self._user_id_by_username, self.pending_usernames = by_user_id, by_username, pending
+
+    def get(self, user_id: int):
+        """Returns the Principal linked to `user_id`, or None if they are not an admin."""
+        return self._by_user_id.get(user_id)
+
+    def is_super_admin(self, user_id: int) -> bool:
+        principal = self._by_user_id.get(user_id)
+        return bool(principal and principal.is_super_admin)
+
+    def add_pending(self, username: str) -> None:
+        self.pending_usernames.add(username)
+
+    def link(self, user_id: int, username: str, is_super_admin: bool) -> None:
+        self.pending_usernames.discard(username)
+        self._by_user_id[user_id] = Principal(user_id, username, is_super_admin)
+        self._user_id_by_username[username] = user_id
+
+    def set_role(self, username: str, is_super_admin: bool) -> None:
+        principal = self._by_user_id.get(self._user_id_by_username.get(username))
+        if principal:
+            principal.is_super_admin = is_super_admin
+
+    def remove(self, username: str) -> None:
+        self.pending_usernames.discard(username)
+        self._by_user_id.pop(self._user_id_by_username.pop(username, None), None)
+
+
+def super_admin_only(handler):
+    """
+    Decorator for private-chat commands: resolves the group the sender is
+    working on (see selected_group) and replies 'Access Denied' unless they are
+    one of its super admins. The handler gets the group as its third argument.
+    """
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        group = await selected_group(update, context)
+        if group is None:
+            await reply_choose_group(update.message)
+            return
+        if not group.principals.is_super_admin(update.effective_user.id):
+            await reply(
+                update.message,
+                "🚫 <b>Access Denied</b>\nThis command is for Super Admins only.",
+                parse_mode=ParseMode.HTML
+            )
+            return
+        return await handler(update, context, group, *args, **kwargs)
+    return wrapper
+
+def owner_only(handler):
+    """Decorator that replies 'Access Denied' unless the sender is the bot owner."""
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        if update.effective_user.id != OWNER_ID:
+            await reply(
+                update.message,
+                "🚫 <b>Access Denied</b>\nThis command is for the bot owner only.",
+                parse_mode=ParseMode.HTML
+            )
+            return
+        return await handler(update, context, *args, **kwargs)
+    return wrapper
+
+
+# =============================================================================
+# 8. ADMIN ROSTER
+# =============================================================================
+ROSTER_PAGE_SIZE = 10  # Admins per /admins page
+# Longer (pre-validation) names are clipped, so ten entries always fit well
+# below Telegram's 4096-character message limit.
+ROSTER_NAME_MAX = 32
+
+ROSTER_HEADER = "👥 <b>Registered Admin Team</b> 👥\n"
+ROSTER_KEY = (
+    "\n\n— — — — — — — — — —\n"
+    "<b>Key:</b>\n"
+    "✅ - Account linked to the bot.\n"
+    "⚠️ - Admin added, but needs to /start the bot.\n"
+    "💰 - Crypto addresses, by chain (×N if several).\n"
+    "💳 - UPI ID is set (×N if several)."
+)
+
+def render_roster_entry(username: str, is_super_admin: bool, linked: bool, method_counts: dict) -> str:
+    """`method_counts` maps (kind, network) to how many such payment methods the admin has."""
+    role = "👑 Super Admin" if is_super_admin else "🛡️ Admin"
+    status_icon = "✅" if linked else "⚠️"
+    chains = ", ".join(
+        (network or "other") + (f"×{count}" if count > 1 else "")
+        for (kind, network), count in sorted(method_counts.items(), key=lambda item: item[0][1] or "~")
+        if kind == "crypto"
+    )
+    upi_count = sum(count for (kind, _), count in method_counts.items() if kind == "upi")
+    methods = []
+    if chains:
+        methods.append(f"💰 {chains}")
+    if upi_count:
+        methods.append("💳" if upi_count == 1 else f"💳×{upi_count}")
+    method_icons = " · ".join(methods) if methods else "None"
+    if len(username) > ROSTER_NAME_MAX:
+        username = username[:ROSTER_NAME_MAX - 1] + "…"
+    return (
+        f"\n• <b>@{html.escape(username)}</b>\n"
+        f"  Status: {role}\n"
+        f"  Account Linked: {status_icon}\n"
+        f"  Payment Methods: {method_icons}"
+    )
+
+
+class RosterEntry:
+    """The slice of an Admin row (and its payment methods) that /admins shows."""
+    __slots__ = ("is_super_admin", "linked", "method_counts")
+
+    def __init__(self, is_super_admin: bool, linked: bool, method_counts: dict = None):
+        self.is_super_admin = is_super_admin
+        self.linked = linked
+        self.method_counts = method_counts or {}  # (kind, network) -> count
+
+
+class RosterCache:
+    """
+    The /admins pages of one group: super admins first, then by username,
+    ROSTER_PAGE_SIZE to a page. rebuild() loads the whole group; after that
+    each write updates its one entry in memory (add_admin, set_role, ...), the
+    way VerificationIndex is kept in step, and only drops the rendered pages
+    the change can affect. Pages are rendered again when next shown, so a
+    write costs a list insert, not a re-render of the whole roster.
+    """
+
+    def __init__(self, group_id: int = None):
+        self.group_id = group_id
+        self._entries = {}  # username -> RosterEntry
+        self._order = []  # (not is_super_admin, username), sorted: the display order
+        self._rendered = {}  # page number -> its rendered entries
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def page_count(self) -> int:
+        return -(-len(self._order) // ROSTER_PAGE_SIZE)
+
+    async def rebuild(self) -> None:
+        method_counts = {}
+        async with Session() as session:
+            counts = await session.execute(
+                select(PaymentMethod.admin_id, PaymentMethod.kind, PaymentMethod.network, func.count())
+                .where(PaymentMethod.group_id == self.group_id)
+                .group_by(PaymentMethod.admin_id, PaymentMethod.kind, PaymentMethod.network)
+            )
+            for admin_id, kind, network, count in counts:
+                method_counts.setdefault(admin_id, {})[kind, network] = count
+            admins = (await session.execute(
+                select(Admin.id, Admin.username, Admin.is_super_admin, Admin.user_id)
+                .where(Admin.group_id == self.group_id)
+            )).all()
+        self._entries = {
+            username: RosterEntry(bool(is_super_admin), user_id is not None, method_counts.get(admin_id))
+            for admin_id, username, is_super_admin, user_id in admins
+        }
+        self._order = sorted((not entry.is_super_admin, username) for username, entry in self._entries.items())
+        self._rendered = {}
+
+    def _changed(self, position: int, shifted: bool) -> None:
+        """Drops the rendered page holding `position`, and every later one if entries moved."""
+        first = position // ROSTER_PAGE_SIZE
+        if shifted:
+            for number in [n for n in self._rendered if n >= first]:
+                del self._rendered[number]
+        else:
+            self._rendered.pop(first, None)
+
+    def _insert(self, username: str, entry: RosterEntry) -> None:
+        self._entries[username] = entry
+        key = (not entry.is_super_admin, username)
+        position = bisect.bisect_left(self._order, key)
+        self._order.insert(position, key)
+        self._changed(position, shifted=True)
+
+    def _remove(self, username: str):
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            position = bisect.bisect_left(self._order, (not entry.is_super_admin, username))
+            del self._order[position]
+            self._changed(position, shifted=True)
+        return entry
+
+    def _touch(self, username: str) -> None:
+        entry = self._entries[username]
+        self._changed(bisect.bisect_left(self._order, (not entry.is_super_admin, username)), shifted=False)
+
+    def add_admin(self, username: str, is_super_admin: bool = False) -> None:
+        self._remove(username)
+        self._insert(username, RosterEntry(is_super_admin, linked=False))
+
+    def remove_admin(self, username: str) -> None:
+        self._remove(username)
+
+    def set_role(self, username: str, is_super_admin: bool) -> None:
+        entry = self._remove(username)
+        if entry is not None:
+            entry.is_super_admin = is_super_admin
+            self._insert(username, entry)
+
+    def set_linked(self, username: str) -> None:
+        entry = self._entries.get(username)
+        if entry is not None:
+            entry.linked = True
+            self._touch(username)
+
+    def add_payment(self, username: str, kind: str, network) -> None:
+        entry = self._entries.get(username)
+        if entry is not None:
+            entry.method_counts[kind, network] = entry.method_counts.get((kind, network), 0) + 1
+            self._touch(username)
+
+    def remove_payment(self, username: str, kind: str, network) -> None:
+        entry = self._entries.get(username)
+        if entry is not None and entry.method_counts.get((kind, network)):
+            entry.method_counts[kind, network] -= 1
+            if not entry.method_counts[kind, network]:
+                del entry.method_counts[kind, network]
+            self._touch(username)
+
+    def page(self, number: int):
+        """Returns (text, reply_markup) for a page, clamping out-of-range numbers."""
+        total = self.page_count
+        number = max(0, min(number, total - 1))
+        body = self._rendered.get(number)
+        if body is None:
+            start = number * ROSTER_PAGE_SIZE
+            usernames = [username for _, username in self._order[start:start + ROSTER_PAGE_SIZE]]
+            body = "\n".join(
+                render_roster_entry(username, entry.is_super_admin, entry.linked, entry.method_counts)
+                for username, entry in ((username, self._entries[username]) for username in usernames)
+            )
+            self._rendered[number] = body
+        buttons = []
+        if number > 0:
+            buttons.append(InlineKeyboardButton("◀️ Previous", callback_data=f"roster:{self.group_id}:{number - 1}"))
+        if number < total - 1:
+            buttons.append(InlineKeyboardButton("Next ▶️", callback_data=f"roster:{self.group_id}:{number + 1}"))
+        text = ROSTER_HEADER + f"<i>Page {number + 1} of {total}</i>\n\n" + body + ROSTER_KEY
+        return text, InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+# =============================================================================
+# 9. GROUPS
+# =============================================================================
+class GroupConfig:
+    """One verification group (community) served by this process."""
+    __slots__ = ("chat_id", "name", "title", "link")
+
+    def __init__(self, chat_id: int, name: str, title: str, link: str):
+        self.chat_id = chat_id
+        self.name = name
+        self.title = title
+        self.link = link
+
+def load_group_configs() -> list:
+    """Reads GROUPS_FILE, or falls back to the single group in VERIFICATION_GROUP_ID."""
+    if not GROUPS_FILE:
+        return [GroupConfig(VERIFICATION_GROUP_ID, "main", "Pagal World", MAIN_GROUP_LINK)]
+    try:
+        with open(GROUPS_FILE, encoding="utf-8") as source:
+            entries = json.load(source)
+        configs = [
+            GroupConfig(int(entry["chat_id"]), str(entry["name"]).strip().lower(),
+                        str(entry.get("title") or entry["name"]), str(entry.get("link") or ""))
+            for entry in entries
+        ]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.critical(f"FATAL: Could not read the groups file {GROUPS_FILE}: {e!r}. Exiting.")
+        raise SystemExit(1)
+    if not configs or len({c.chat_id for c in configs}) != len(configs) or len({c.name for c in configs}) != len(configs):
+        logger.critical(f"FATAL: {GROUPS_FILE} must list at least one group, with unique chat_ids and names. Exiting.")
+        raise SystemExit(1)
+    return configs
+
+
+class VerificationGroup:
+    """
+    One community: its config plus its own verification index, principal cache
+    and roster. These are built on first use, so a process serving hundreds of
+    groups only pays (in startup time and memory) for the ones that are active.
+    """
+
+    def __init__(self, config: GroupConfig):
+        self.config = config
+        self.chat_id = config.chat_id
+        self.index = VerificationIndex(config.chat_id)
+        self.principals = PrincipalCache(config.chat_id)
+        self.roster = RosterCache(config.chat_id)
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def ensure_loaded(self) -> "VerificationGroup":
+        if not self.loaded:
+            async with self._load_lock:
+                if not self.loaded:
+                    await setup_owner(self.chat_id)
+                    await self.refresh()
+                    self.loaded = True
+        return self
+
+    async def refresh(self) -> None:
+        """Rebuilds every in-memory view of the group's admins from the database."""
+        await self.index.rebuild()
+        await self.principals.rebuild()
+        await self.roster.rebuild()
+
+
+class GroupRegistry:
+    """
+    All configured groups, by chat_id and by name, and the usernames waiting to
+    be linked by /start in any of them (loaded groups or not), so /start only
+    queries the admins table for a username that some group added.
+    """
+
+    def __init__(self, configs: list):
+        self._by_chat_id = {config.chat_id: VerificationGroup(config) for config in configs}
+        self._by_name = {group.config.name: group for group in self._by_chat_id.values()}
+        self._pending = None  # username -> chat_ids of the groups it is pending in; None until first needed
+
+    def __len__(self) -> int:
+        return len(self._by_chat_id)
+
+    def __contains__(self, chat_id) -> bool:
+        return chat_id in self._by_chat_id
+
+    @property
+    def chat_ids(self) -> list:
+        return list(self._by_chat_id)
+
+    def config(self, chat_id: int) -> GroupConfig:
+        return self._by_chat_id[chat_id].config
+
+    def find(self, name_or_id: str):
+        """Looks a group up by name or chat_id (unloaded), or returns None."""
+        group = self._by_name.get(name_or_id.strip().lower())
+        if group is None and re.fullmatch(r"-?\d+", name_or_id.strip()):
+            group = self._by_chat_id.get(int(name_or_id))
+        return group
+
+    async def get(self, chat_id: int):
+        """Returns the loaded group for `chat_id`, or None if it is not configured."""
+        group = self._by_chat_id.get(chat_id)
+        return await group.ensure_loaded() if group else None
+
+    def get_loaded(self, chat_id: int):
+        """Returns the group for `chat_id` if its caches are already built, without loading it."""
+        group = self._by_chat_id.get(chat_id)
+        return group if group and group.loaded else None
+
+    def loaded(self) -> list:
+        return [group for group in self._by_chat_id.values() if group.loaded]
+
+    def single_chat_id(self):
+        return next(iter(self._by_chat_id)) if len(self._by_chat_id) == 1 else None
+
+    async def is_pending(self, username: str) -> bool:
+        """True if some group has an admin row for `username` that no account is linked to yet."""
+        if self._pending is None:
+            pending = {}
+            async with Session() as session:
+                rows = await session.execute(select(Admin.username, Admin.group_id).where(Admin.user_id.is_(None)))
+                for pending_username, chat_id in rows:
+                    pending.setdefault(pending_username, set()).add(chat_id)
+            self._pending = pending
+        return username in self._pending
+
+    def add_pending(self, chat_id: int, username: str) -> None:
+        if self._pending is not None:
+            self._pending.setdefault(username, set()).add(chat_id)
+
+    def discard_pending(self, chat_id: int, username: str) -> None:
+        chat_ids = self._pending.get(username) if self._pending is not None else None
+        if chat_ids:
+            chat_ids.discard(chat_id)
+            if not chat_ids:
+                del self._pending[username]
+
+    def sync_pending(self, group: VerificationGroup) -> None:
+        """Takes a group's pending usernames from its principal cache after a rebuild."""
+        if self._pending is None:
+            return
+        for username in [u for u, chat_ids in self._pending.items() if group.chat_id in chat_ids]:
+            self.discard_pending(group.chat_id, username)
+        for username in group.principals.pending_usernames:
+            self.add_pending(group.chat_id, username)
+
+    def forget_pending(self) -> None:
+        """Drops the pending usernames, to be reloaded on the next /start (e.g. after a hand-edited DB)."""
+        self._pending = None
+
+
+groups = GroupRegistry(load_group_configs())
+
+def remembered_group_id(context: ContextTypes.DEFAULT_TYPE):
+    """The sender's /use_group choice, or the only group; None if they have to choose."""
+    chat_id = context.user_data.get("group_id") if context.user_data is not None else None
+    return chat_id if chat_id in groups else groups.single_chat_id()
+
+async def selected_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    The group a private-chat command or inline query applies to: the sender's
+    /use_group choice, else the only configured group, else the only group they
+    are an admin of (remembered for next time). None if that is ambiguous.
+    """
+    chat_id = remembered_group_id(context)
+    if chat_id is None:
+        member_of = await admin_group_ids(update.effective_user)
+        if len(member_of) != 1:
+            return None
+        chat_id = context.user_data["group_id"] = member_of[0]
+    return await groups.get(chat_id)
+
+async def admin_group_ids(user) -> list:
+    """chat_ids of the configured groups where `user` is (or is waiting to be linked as) an admin."""
+    condition = Admin.user_id == user.id
+    if user.username:
+        condition = or_(condition, and_(Admin.user_id.is_(None), Admin.username == user.username))
+    async with Session() as session:
+        found = await session.scalars(select(Admin.group_id).where(condition).distinct())
+        return sorted(chat_id for chat_id in found if chat_id in groups)
+
+async def reply_choose_group(message) -> None:
+    await reply(
+        message,
+        "🧭 <b>Choose a Group</b>\n\nThis bot serves several communities. "
+        "Send <code>/use_group NAME</code> to pick the one you mean; /use_group alone lists yours.",
+        parse_mode=ParseMode.HTML
+    )
+
+
+# =============================================================================
+# 10. VERIFICATION VERDICTS
+# =============================================================================
+# Candidate payment details inside free text. Crypto patterns are anchored on
+# their fixed prefixes; the UPI pattern only runs when the text contains '@',
+# and only IDs at a known payment app or bank handle count, so "thanks@all"
+# or "support@telegram" in chat get no reply. /verify accepts any handle.
+CRYPTO_DETAIL_PATTERN = re.compile(
+    r"(?<![0-9A-Za-z])(?:"
+    r"0[xX][0-9a-fA-F]{40}"  # EVM
+    r"|(?:bc1|BC1)[02-9ac-hj-np-zAC-HJ-NP-Z]{11,87}"  # Bitcoin bech32
+    r"|[13][1-9A-HJ-NP-Za-km-z]{25,34}"  # Bitcoin base58
+    r"|T[1-9A-HJ-NP-Za-km-z]{33}"  # TRON
+    r")(?![0-9A-Za-z])"
+)
+UPI_DETAIL_PATTERN = re.compile(
+    r"(?<![\w.\-@])[\w.\-]{2,256}@[A-Za-z]{2,64}(?![\w.\-@])"  # A trailing '.' would make it an e-mail
+)
+UPI_HANDLES = frozenset("""
+    ybl ibl axl okaxis okhdfcbank okicici oksbi paytm ptyes ptaxis pthdfc ptsbi upi apl yapl rapl
+    axisbank axisb icici hdfcbank sbi kotak kbl barodampay idfcbank idfcfirst indus federal fbl aubank
+    allbank jupiteraxis fam freecharge ikwik waicici waaxis wahdfcbank wasbi yesbank yesg ratn rbl pnb
+    unionbank uboi cnrb boi mahb centralbank cbin iob indianbank idbi dbs hsbc sc citi kvb tmb equitas
+    jio airtel pingpay timecosmos naviaxis superyes abfspay slice okbizaxis
+""".split()) | {handle.strip().lower() for handle in EXTRA_UPI_HANDLES.split(",") if handle.strip()}
+
+def find_payment_details(text: str) -> list:
+    """Extracts distinct crypto addresses and UPI IDs at known handles from a message, in order."""
+    found = CRYPTO_DETAIL_PATTERN.findall(text)
+    if "@" in text:
+        found += [
+            value for value in UPI_DETAIL_PATTERN.findall(text)
+            if value.rsplit("@", 1)[1].lower() in UPI_HANDLES
+        ]
+    return list(dict.fromkeys(found))
+
+
+class Verdict:
+    """Outcome of checking one payment detail."""
+    __slots__ = ("detail", "admin", "scam", "lookalikes")
+
+    def __init__(self, detail: PaymentDetail, admin, scam: bool, lookalikes: list):
+        self.detail = detail
+        self.admin = admin
+        self.scam = scam
+        self.lookalikes = lookalikes
+
+    @property
+    def value(self) -> str:
+        return self.detail.value
+
+    @property
+    def lookup_key(self) -> str:
+        return self.detail.lookup_key
+
+    @property
+    def status(self) -> str:
+        if self.admin:
+            return "verified"
+        if self.scam:
+            return "scam"
+        return "lookalike" if self.lookalikes else "unverified"
+
+def check_payment_detail(detail: PaymentDetail, index: VerificationIndex) -> Verdict:
+    """The single lookup path shared by /verify, inline mode and the group scanner."""
+    lookup_key = detail.lookup_key
+    admin = index.lookup(lookup_key)
+    # An admin's own detail always wins over a (mistaken) scam report.
+    scam = not admin and scam_blocklist.contains(lookup_key)
+    lookalikes = [] if admin or scam else index.similar(lookup_key)
+    return Verdict(detail, admin, scam, lookalikes)
+
+def render_verdict(verdict: Verdict) -> str:
+    """Formats a Verdict as the HTML card users see."""
+    value = html.escape(verdict.value)
+    if verdict.status == "verified":
+        role_emoji = "👑" if verdict.admin.is_super_admin else "🛡️"
+        return (
+            "✅ <b>VERIFIED & TRUSTED</b> ✅\n\n"
+            "This payment detail is confirmed and secure.\n\n"
+            "<b>Address/ID:</b>\n"
+            f"<code>{value}</code>\n\n"
+            "It belongs to our trusted admin:\n"
+            f"➡️ <b>@{html.escape(verdict.admin.username)}</b> {role_emoji}"
+        )
+    if verdict.status == "scam":
+        return (
+            "⛔ <b>KNOWN SCAM</b> ⛔\n\n"
+            "This payment detail has been <b>REPORTED AS A SCAM</b>.\n\n"
+            "<b>Address/ID Checked:</b>\n"
+            f"<code>{value}</code>\n\n"
+            "🔴 <b>DO NOT SEND FUNDS.</b> Anyone asking you to pay here is not one of our admins."
+        )
+    if verdict.status == "lookalike":
+        resembles = "\n".join(
+            f"➡️ <b>@{html.escape(admin.username)}</b> ("
+            + ("same start and end, different middle" if distance is None else f"{distance} character(s) different")
+            + ")"
+            for admin, distance in verdict.lookalikes
+        )
+        return (
+            "☠️ <b>DANGER: LOOKALIKE DETECTED</b> ☠️\n\n"
+            "This payment detail is <b>NOT</b> in our secure database, but it closely resembles "
+            "a detail registered to:\n"
+            f"{resembles}\n\n"
+            "<b>Address/ID Checked:</b>\n"
+            f"<code>{value}</code>\n\n"
+            "🔴 <b>DO NOT SEND FUNDS.</b> Scammers copy admin addresses with small changes. "
+            "Confirm the exact detail with the admin directly."
+        )
+    return (
+        "🚨 <b>WARNING: UNVERIFIED</b> 🚨\n\n"
+        "This payment detail was <b>NOT FOUND</b> in our secure database.\n\n"
+        "<b>Address/ID Checked:</b>\n"
+        f"<code>{value}</code>\n\n"
+        "🔴 <b>DO NOT SEND FUNDS.</b> This is a high-risk transaction and could be a scam."
+    )
+
+def render_invalid_detail(value: str, error: InvalidPaymentDetail) -> str:
+    """The card for input that failed validation and was never looked up."""
+    return (
+        "❓ <b>NOT A VALID ADDRESS OR UPI ID</b> ❓\n\n"
+        "<b>Address/ID Checked:</b>\n"
+        f"<code>{html.escape(value)}</code>\n\n"
+        f"{html.escape(str(error))}\n\n"
+        "Copy the detail again from its source. 🔴 <b>Never send funds to a detail you had to retype.</b>"
+    )
+
+
+# =============================================================================
+# 11. OUTBOUND MESSAGE QUEUE
+# =============================================================================
+GLOBAL_SEND_RATE = 25  # Messages per second across all chats (Telegram allows ~30)
+PRIVATE_CHAT_SEND_RATE = 1  # Messages per second into one private chat
+GROUP_CHAT_SEND_RATE = 20 / 60  # Telegram allows ~20 messages per minute into one group
+CHAT_SEND_BURST = 3  # Messages a quiet chat may receive back to back
+COALESCE_WINDOW = 10  # Seconds during which an identical reply in the same chat is dropped
+SEND_ATTEMPTS = 3  # Tries for transient network errors (RetryAfter is always honoured)
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class TokenBucket:
+    """Classic token bucket; `rate` tokens per second up to `capacity`."""
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0  # Set from RetryAfter
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class OutboundMessage:
+    __slots__ = ("text", "kwargs", "future", "attempts", "timing", "method")
+
+    def __init__(self, text: str, kwargs: dict, future, timing=None, method: str = "send_message"):
+        self.text = text  # None for documents, whose caption is in kwargs
+        self.kwargs = kwargs
+        self.future = future
+        self.attempts = 0
+        self.timing = timing  # The sending handler's Timing, so API time is charged to it
+        self.method = method  # "send_message" or "send_document"
+
+
+def same_send_options(a: dict, b: dict) -> bool:
+    """True if two send_message calls differ at most in which message they reply to."""
+    return {k: v for k, v in a.items() if k != "reply_parameters"} == \
+        {k: v for k, v in b.items() if k != "reply_parameters"}
+
+
+class OutboundScheduler:
+    """
+    Sends every bot reply through per-chat and global token buckets.
+
+    Messages for one chat go out in order; different chats are interleaved. A
+    RetryAfter from Telegram pauses only the affected chat and the message is
+    retried. Once a chat has had to wait for its bucket (it is rate limited or
+    blocked), its backlog of texts with the same options is merged into one
+    message that replies to the first of them; a chat with tokens to spare gets
+    every reply separately. Identical replies (same `coalesce_key`) to the same
+    chat within COALESCE_WINDOW seconds are sent once. `bot` only needs async
+    `send_message` and `send_document`, so a fake bot can be used in tests.
+    """
+
+    def __init__(self, bot=None):
+        self.bot = bot
+        self._global = TokenBucket(GLOBAL_SEND_RATE, GLOBAL_SEND_RATE)
+        self._buckets = {}
+        self._queues = {}
+        self._in_flight = set()
+        self._limited = set()  # Chats that waited for their bucket since their queue was last empty
+        self._recent = {}  # (chat_id, coalesce_key) -> (expires_at, future)
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self._stopping = False
+        self._sends = set()
+        self.sent = 0
+        self.coalesced = 0
+        self.merged = 0
+        self.retried = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self, bot) -> None:
+        self.bot = bot
+        if not self.running:
+            self._stopping = False
+            self._worker = asyncio.create_task(self._run(), name="outbound-scheduler")
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Waits up to `timeout` seconds for queued messages, then stops the worker."""
+        deadline = time.monotonic() + timeout
+        while (self._queues or self._sends) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._worker:
+            # On 3.11, wait_for() swallows a cancel that lands as the wakeup fires,
+            # so the flag is what actually ends the loop.
+            self._stopping = True
+            self._wakeup.set()
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        dropped = sum(len(queue) for queue in self._queues.values())
+        if dropped:
+            logger.warning(f"Outbound queue stopped with {dropped} unsent message(s).")
+        for queue in self._queues.values():
+            for item in queue:
+                item.future.set_result(None)
+        self._queues.clear()
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            # Group and channel ids are negative in the Bot API.
+            rate = GROUP_CHAT_SEND_RATE if chat_id < 0 else PRIVATE_CHAT_SEND_RATE
+            bucket = self._buckets[chat_id] = TokenBucket(rate, CHAT_SEND_BURST)
+        return bucket
+
+    def enqueue(self, chat_id: int, text: str, coalesce_key=None, method: str = "send_message", **kwargs):
+        """
+        Queues a send_message call (or, with method="send_document" and no
+        text, a send_document call) and returns a future for the sent Message
+        (None if it could not be sent). With `coalesce_key`, a duplicate of a
+        recent reply returns the earlier future instead.
+        """
+        loop = asyncio.get_running_loop()
+        if coalesce_key is not None:
+            now = time.monotonic()
+            recent = self._recent.get((chat_id, coalesce_key))
+            if recent and recent[0] > now:
+                self.coalesced += 1
+                return recent[1]
+            if len(self._recent) > 10_000:
+                self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+        future = loop.create_future()
+        if coalesce_key is not None:
+            self._recent[(chat_id, coalesce_key)] = (time.monotonic() + COALESCE_WINDOW, future)
+        self._queues.setdefault(chat_id, collections.deque()).append(
+            OutboundMessage(text, kwargs, future, command_timing.get(), method)
+        )
+        self._wakeup.set()
+        return future
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            now = time.monotonic()
+            ready, soonest = None, None
+            for chat_id in self._queues:
+                if chat_id in self._in_flight:
+                    continue
+                wait = self._bucket(chat_id).wait_time(now)
+                if wait > 0:
+                    self._limited.add(chat_id)
+                if soonest is None or wait < soonest:
+                    ready, soonest = chat_id, wait
+            if ready is not None:
+                soonest = max(soonest, self._global.wait_time(now))
+            if ready is None or soonest > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=soonest)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._bucket(ready).take()
+            self._global.take()
+            item = self._pop_batch(ready)
+            self._in_flight.add(ready)
+            task = asyncio.create_task(self._send(ready, item))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    def _pop_batch(self, chat_id: int) -> OutboundMessage:
+        """Takes the next message for a chat; if the chat is rate limited, merges queued followers with identical options."""
+        queue = self._queues[chat_id]
+        item = queue.popleft()
+        extra = []
+        mergeable = chat_id in self._limited and item.method == "send_message" and not item.kwargs.get("reply_markup")
+        while queue and mergeable and queue[0].method == "send_message":
+            follower = queue[0]
+            merged_text = "\n\n— — — — —\n\n".join([item.text, *(e.text for e in extra), follower.text])
+            if not same_send_options(follower.kwargs, item.kwargs) or len(merged_text) > TELEGRAM_MESSAGE_LIMIT:
+                break
+            extra.append(queue.popleft())
+        if not queue:
+            del self._queues[chat_id]
+            self._limited.discard(chat_id)
+        if extra:
+            self.merged += len(extra)
+            futures = [item.future, *(e.future for e in extra)]
+            shared = asyncio.get_running_loop().create_future()
+            shared.add_done_callback(
+                lambda f: [x.set_result(f.result()) for x in futures if not x.done()]
+            )
+            item = OutboundMessage(
+                "\n\n— — — — —\n\n".join([item.text, *(e.text for e in extra)]), item.kwargs, shared, item.timing
+            )
+        return item
+
+    async def _send(self, chat_id: int, item: OutboundMessage) -> None:
+        command_timing.set(item.timing)  # Each send runs in its own task context
+        try:
+            item.attempts += 1
+            if item.method == "send_document":
+                message = await self.bot.send_document(chat_id=chat_id, **item.kwargs)
+            else:
+                message = await self.bot.send_message(chat_id=chat_id, text=item.text, **item.kwargs)
+            self.sent += 1
+            item.future.set_result(message)
+        except RetryAfter as e:
+            delay = e.retry_after
+            delay = delay.total_seconds() if isinstance(delay, datetime.timedelta) else float(delay)
+            logger.warning(f"Flood control for chat {chat_id}: retrying in {delay:.0f}s.")
+            self.retried += 1
+            self._bucket(chat_id).blocked_until = time.monotonic() + delay
+            self._queues.setdefault(chat_id, collections.deque()).appendleft(item)
+        except (TimedOut, NetworkError) as e:
+            if item.attempts < SEND_ATTEMPTS:
+                self.retried += 1
+                self._queues.setdefault(chat_id, collections.deque()).appendleft(item)
+            else:
+                logger.error(f"Giving up sending to chat {chat_id}: {e}")
+                item.future.set_result(None)
+        except Exception as e:
+            logger.error(f"Failed to send message to chat {chat_id}: {e}", exc_info=True)
+            item.future.set_result(None)
+        finally:
+            self._in_flight.discard(chat_id)
+            self._wakeup.set()
+
+
+outbox = OutboundScheduler()
+
+async def reply(message, text: str, coalesce_key=None, **kwargs):
+    """
+    Replies to `message` through the outbound queue. Falls back to a direct
+    reply_text when the scheduler is not running.
+    """
+    if not outbox.running:
+        return await message.reply_text(text, **kwargs)
+    kwargs["reply_parameters"] = ReplyParameters(message_id=message.message_id, allow_sending_without_reply=True)
+    return outbox.enqueue(message.chat_id, text, coalesce_key=coalesce_key, **kwargs)
+
+async def reply_document(message, document: bytes, filename: str, **kwargs):
+    """Sends a file in reply to `message` through the outbound queue, like reply()."""
+    if not outbox.running:
+        return await message.reply_document(document=document, filename=filename, **kwargs)
+    kwargs["reply_parameters"] = ReplyParameters(message_id=message.message_id, allow_sending_without_reply=True)
+    # Bytes rather than a stream, so a retried send uploads the whole file again.
+    return outbox.enqueue(message.chat_id, None, method="send_document", document=document, filename=filename, **kwargs)
+
+
+# =============================================================================
+# 12. METRICS
+# =============================================================================
+# Log-spaced latency buckets, 0.5 ms to ~27 s; quantiles are read to within ~19%.
+LATENCY_BUCKETS = tuple(0.0005 * 2 ** (i / 4) for i in range(64))
+STATS_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Timing:
+    """One running handler call: where its DB and API time goes, and whether it failed."""
+    __slots__ = ("stats", "failed")
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.failed = False
+
+
+# Set by the instrumented handler wrapper and carried into queued replies, so
+# the DB and API hooks know which handler to charge.
+command_timing = contextvars.ContextVar("command_timing", default=None)
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "total", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (0 when empty)."""
+        if not self.total:
+            return 0.0
+        rank, seen = q * self.total, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return LATENCY_BUCKETS[min(index, len(LATENCY_BUCKETS) - 1)]
+        return LATENCY_BUCKETS[-1]
+
+
+class HandlerStats:
+    __slots__ = ("calls", "errors", "latency", "db_seconds", "db_queries", "api_seconds", "api_calls")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.api_seconds = 0.0
+        self.api_calls = 0
+
+    def record(self, elapsed: float, failed: bool) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.latency.observe(elapsed)
+
+
+class Metrics:
+    """
+    Per-handler call and error counts, latency histograms, and the DB and
+    Telegram API time each handler caused. Handlers are wrapped once at startup
+    (see instrument); DB time comes from SQLAlchemy cursor events and API time
+    from InstrumentedRequest, both charged to the handler in `command_timing`.
+    Latency covers the handler itself; replies it queued are sent afterwards, so
+    their API time is counted but not waited for. A handler counts as failed if
+    it raised or logged an error.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.handlers = {}
+        self.api_methods = {}  # method -> [calls, seconds]
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self._server = None
+
+    def instrument(self, name: str, callback):
+        """Wraps a handler callback so every call is recorded under `name`."""
+        stats = self.handlers.setdefault(name, HandlerStats())
+
+        @functools.wraps(callback)
+        async def timed(update, context):
+            timing = Timing(stats)
+            token = command_timing.set(timing)
+            started = time.perf_counter()
+            try:
+                return await callback(update, context)
+            except Exception:
+                timing.failed = True
+                raise
+            finally:
+                stats.record(time.perf_counter() - started, timing.failed)
+                command_timing.reset(token)
+        return timed
+
+    def record_query(self, seconds: float) -> None:
+        self.db_queries += 1
+        self.db_seconds += seconds
+        timing = command_timing.get()
+        if timing is not None:
+            timing.stats.db_seconds += seconds
+            timing.stats.db_queries += 1
+
+    def record_api_call(self, method: str, seconds: float) -> None:
+        totals = self.api_methods.get(method)
+        if totals is None:
+            totals = self.api_methods[method] = [0, 0.0]
+        totals[0] += 1
+        totals[1] += seconds
+        timing = command_timing.get()
+        if timing is not None:
+            # Replies are usually sent after the handler returned; charge them anyway.
+            timing.stats.api_seconds += seconds
+            timing.stats.api_calls += 1
+
+    def render_stats(self) -> str:
+        """HTML summary for /stats."""
+        uptime = datetime.timedelta(seconds=int(time.time() - self.started))
+        rows = []
+        for name, stats in sorted(self.handlers.items(), key=lambda item: -item[1].calls):
+            if not stats.calls:
+                continue
+            p50, p95, p99 = (stats.latency.quantile(q) * 1000 for q in STATS_QUANTILES)
+            rows.append(
+                f"{name[:20]:<20} {stats.calls:>6} {stats.errors:>4} "
+                f"{p50:>6.1f} {p95:>6.1f} {p99:>6.1f} "
+                f"{stats.db_seconds / stats.calls * 1000:>6.1f} {stats.api_seconds / stats.calls * 1000:>6.0f}"
+            )
+        table = "\n".join(rows) if rows else "No handler calls yet."
+        api = "\n".join(
+            f"{method[:24]:<24} {calls:>7} {seconds / calls * 1000:>7.0f} ms"
+            for method, (calls, seconds) in sorted(self.api_methods.items(), key=lambda item: -item[1][0])
+        ) or "No API calls yet."
+        return (
+            f"📊 <b>Bot Statistics</b>\n\nUptime: {uptime}\n"
+            f"DB: {self.db_queries} queries, {self.db_seconds:.2f}s total\n"
+            f"Outbox: {outbox.sent} sent, {outbox.merged} merged, {outbox.coalesced} coalesced, {outbox.retried} retried\n\n"
+            f"<b>Handlers</b> (latency in ms; DB and API are ms per call)\n"
+            f"<pre>{'handler':<20} {'calls':>6} {'err':>4} {'p50':>6} {'p95':>6} {'p99':>6} {'db':>6} {'api':>6}\n"
+            f"{html.escape(table)}</pre>\n"
+            f"<b>Telegram API</b>\n<pre>{html.escape(api)}</pre>"
+        )
+
+    def render_prometheus(self) -> str:
+        """The same data in the Prometheus text exposition format."""
+        handlers = sorted(self.handlers.items())
+        api_methods = sorted(self.api_methods.items())
+        lines = []
+
+        def family(name: str, kind: str, samples) -> None:
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        family("pwbot_handler_calls_total", "counter",
+               ((f'{{handler="{name}"}}', stats.calls) for name, stats in handlers))
+        family("pwbot_handler_errors_total", "counter",
+               ((f'{{handler="{name}"}}', stats.errors) for name, stats in handlers))
+        lines.append("# TYPE pwbot_handler_duration_seconds summary")
+        for name, stats in handlers:
+            for q in STATS_QUANTILES:
+                lines.append(
+                    f'pwbot_handler_duration_seconds{{handler="{name}",quantile="{q}"}} {stats.latency.quantile(q):.6f}'
+                )
+            lines.append(f'pwbot_handler_duration_seconds_sum{{handler="{name}"}} {stats.latency.sum:.6f}')
+            lines.append(f'pwbot_handler_duration_seconds_count{{handler="{name}"}} {stats.latency.total}')
+        family("pwbot_handler_db_seconds_total", "counter",
+               ((f'{{handler="{name}"}}', f"{stats.db_seconds:.6f}") for name, stats in handlers))
+        family("pwbot_handler_api_seconds_total", "counter",
+               ((f'{{handler="{name}"}}', f"{stats.api_seconds:.6f}") for name, stats in handlers))
+        family("pwbot_telegram_api_calls_total", "counter",
+               ((f'{{method="{method}"}}', calls) for method, (calls, _) in api_methods))
+        family("pwbot_telegram_api_seconds_total", "counter",
+               ((f'{{method="{method}"}}', f"{seconds:.6f}") for method, (_, seconds) in api_methods))
+        family("pwbot_db_queries_total", "counter", [("", self.db_queries)])
+        family("pwbot_db_seconds_total", "counter", [("", f"{self.db_seconds:.6f}")])
+        family("pwbot_outbox_messages_total", "counter", [
+            ('{outcome="sent"}', outbox.sent),
+            ('{outcome="merged"}', outbox.merged),
+            ('{outcome="coalesced"}', outbox.coalesced),
+            ('{outcome="retried"}', outbox.retried),
+        ])
+        family("process_start_time_seconds", "gauge", [("", f"{self.started:.0f}")])
+        return "\n".join(lines) + "\n"
+
+    async def start_server(self, host: str, port: int) -> None:
+        """Serves GET /metrics on host:port (plain HTTP; keep it on a local interface)."""
+        self._server = await asyncio.start_server(self._serve, host, port)
+        logger.info(f"Prometheus metrics available at http://{host}:{port}/metrics")
+
+    async def stop_server(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader, writer) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                pass  # Headers are not needed
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?", 1)[0] == b"/metrics":
+                status, body = "200 OK", self.render_prometheus().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
 
-# =============================================================================
-# 1. SETUP LOGGING
-# =============================================================================
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
-logger = logging.getLogger(__name__)
 
+class InstrumentedRequest(HTTPXRequest):
+    """The default Bot API transport, timing every call for Metrics."""
+
+    async def do_request(self, url: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().do_request(url, *args, **kwargs)
+        finally:
+            metrics.record_api_call(url.rsplit("/", 1)[-1], time.perf_counter() - started)
+
+
+class ErrorFlagHandler(logging.Handler):
+    """Marks the running handler as failed when it logs an error it has caught itself."""
+
+    def emit(self, record) -> None:
+        timing = command_timing.get()
+        if timing is not None:
+            timing.failed = True
 
-# =============================================================================
-# 2. CONFIGURATION
-# =============================================================================
-# IMPORTANT: Replace with your actual bot token
-TOKEN = "8146817570:AAH6k5ZcmTGYJlFEfx7PxhZeDSj5dl6lRHs" 
-OWNER_ID = 549086084
-VERIFICATION_GROUP_ID = -1001219085941
-MAIN_GROUP_LINK = "https://t.me/+4Yc9OHxB87NlOTNl"
+
+metrics = Metrics()
+logger.addHandler(ErrorFlagHandler(logging.ERROR))
+
+# The start time rides on the per-statement execution context (cheaper than conn.info).
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    metrics.record_query(time.perf_counter() - context._metrics_started)
+
+def instrument_handlers(application: Application) -> None:
+    """
+    Wraps the callback of every registered handler with Metrics.instrument.
+    Handlers are named after their command; other handlers sharing a command's
+    callback (e.g. document captions) are counted under that command.
+    """
+    handlers = [handler for group in application.handlers.values() for handler in group]
+    names = {}
+    for handler in handlers:
+        if isinstance(handler, CommandHandler):
+            names.setdefault(handler.callback, "/" + sorted(handler.commands)[0])
+    for handler in handlers:
+        name = names.get(handler.callback) or getattr(handler.callback, "__name__", type(handler).__name__)
+        handler.callback = metrics.instrument(name, handler.callback)
 
 
 # =============================================================================
-# 3. DATABASE SETUP
+# 13. AUDIT LOG
 # =============================================================================
-Base = declarative_base()
+AUDIT_BATCH_SIZE = 500  # Rows per write; a full batch is flushed right away
+AUDIT_FLUSH_INTERVAL = 5  # Seconds a partial batch may wait
+AUDIT_QUEUE_LIMIT = 100_000  # Oldest entries are dropped beyond this (e.g. while the DB is down)
+AUDIT_REPORT_ROWS = 15
+AUDIT_MAX_WINDOW = datetime.timedelta(days=90)
 
-class Admin(Base):
-    __tablename__ = 'admins'
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, unique=True, nullable=True)
-    username = Column(String, unique=True, nullable=False)
-    crypto_address = Column(String, nullable=True)
-    upi_id = Column(String, nullable=True)
-    is_super_admin = Column(Boolean, default=False)
 
-try:
-    engine = create_engine('sqlite:///payment_verification.db', pool_pre_ping=True)
-    Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    logger.info("Database connection established and tables are ready.")
-except Exception as e:
-    logger.critical(f"FATAL: Could not connect to the database. Exiting. Error: {e}")
-    exit()
+def audit_hour(moment: datetime.datetime) -> datetime.datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class AuditLog:
+    """
+    Append-only log of verification lookups that stays off the hot path:
+    record() only appends to an in-memory queue, and a background task writes
+    it to verification_log in batches. The same transaction adds each batch to
+    hourly per-group, per-address tallies (verification_tallies), so
+    /verify_report reads a few pre-aggregated rows instead of scanning the log.
+    """
+
+    def __init__(self):
+        self._pending = collections.deque()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._worker = None
+        self._stopping = False
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._stopping = False
+            self._worker = asyncio.create_task(self._run(), name="audit-log")
+
+    async def stop(self) -> None:
+        """Stops the background task and writes whatever is still queued."""
+        if self._worker:
+            self._stopping = True  # See OutboundScheduler.stop
+            self._wakeup.set()
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Audit log: {len(self._pending)} entries lost at shutdown: {e}")
+
+    def record(self, source: str, verdict: "Verdict", group_id: int, chat_id=None, user_id=None) -> None:
+        if len(self._pending) >= AUDIT_QUEUE_LIMIT:
+            self._pending.popleft()
+            self.dropped += 1
+            if self.dropped % 10_000 == 1:
+                logger.warning(f"Audit log queue full; {self.dropped} entries dropped so far.")
+        self._pending.append((
+            datetime.datetime.now(datetime.timezone.utc), source, group_id, chat_id, user_id,
+            verdict.value, verdict.lookup_key, verdict.status,
+        ))
+        if len(self._pending) >= AUDIT_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=AUDIT_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Audit log flush failed, will retry: {e}")
+
+    async def flush(self) -> None:
+        """Writes every queued entry now, one transaction per batch."""
+        async with self._flush_lock:
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(AUDIT_BATCH_SIZE, len(self._pending)))]
+                try:
+                    await self._write(batch)
+                except Exception:
+                    self._pending.extendleft(reversed(batch))
+                    raise
+
+    async def _write(self, batch) -> None:
+        tallies = {}
+        for checked_at, _, group_id, _, _, value, lookup_key, status in batch:
+            key = (group_id, audit_hour(checked_at), lookup_key, status)
+            tally = tallies.get(key)
+            tallies[key] = (value, tally[1] + 1 if tally else 1)
+        async with Session() as session, session.begin():
+            await session.execute(insert(VerificationLog), [
+                {"checked_at": checked_at, "source": source, "group_id": group_id, "chat_id": chat_id,
+                 "user_id": user_id, "value": value, "lookup_key": lookup_key, "status": status}
+                for checked_at, source, group_id, chat_id, user_id, value, lookup_key, status in batch
+            ])
+            upsert = sqlite_insert(VerificationTally).values([
+                {"group_id": group_id, "hour": hour, "lookup_key": lookup_key, "status": status,
+                 "value": value, "checks": checks}
+                for (group_id, hour, lookup_key, status), (value, checks) in tallies.items()
+            ])
+            await session.execute(upsert.on_conflict_do_update(
+                index_elements=[
+                    VerificationTally.group_id, VerificationTally.hour, VerificationTally.lookup_key, VerificationTally.status,
+                ],
+                set_={"checks": VerificationTally.checks + upsert.excluded.checks, "value": upsert.excluded.value},
+            ))
+
+
+audit_log = AuditLog()
 
 
 # =============================================================================
-# 4. UTILITY FUNCTIONS
+# 14. UTILITY FUNCTIONS
 # =============================================================================
-def setup_owner():
-    """Initializes or verifies the owner in the database as a super admin."""
+async def setup_owner(group_id: int):
+    """Initializes or verifies the owner in the database as a super admin of a group."""
     session = Session()
     try:
-        owner = session.query(Admin).filter(Admin.user_id == OWNER_ID).first()
+        owner = await session.scalar(select(Admin).where(Admin.group_id == group_id, Admin.user_id == OWNER_ID))
         if not owner:
             placeholder_username = f"owner_placeholder_{OWNER_ID}"
-            if not session.query(Admin).filter(Admin.username == placeholder_username).first():
-                owner = Admin(user_id=OWNER_ID, username=placeholder_username, is_super_admin=True)
+            if not await session.scalar(
+                select(Admin).where(Admin.group_id == group_id, Admin.username == placeholder_username)
+            ):
+                owner = Admin(group_id=group_id, user_id=OWNER_ID, username=placeholder_username, is_super_admin=True)
                 session.add(owner)
-                session.commit()
-                logger.info(f"Owner {OWNER_ID} added to the database as super admin.")
+                await session.commit()
+                logger.info(f"Owner {OWNER_ID} added to group {group_id} as super admin.")
         elif not owner.is_super_admin:
             owner.is_super_admin = True
-            session.commit()
-            logger.info(f"Owner {OWNER_ID}'s super admin status was restored.")
+            await session.commit()
+            logger.info(f"Owner {OWNER_ID}'s super admin status in group {group_id} was restored.")
     except SQLAlchemyError as e:
         logger.error(f"Database error during owner setup: {e}")
-        session.rollback()
+        await session.rollback()
     finally:
-        session.close()
+        await session.close()
 
-def is_super_admin(user_id: int, session: SQLAlchemySession) -> bool:
-    """Checks if a user is a super admin."""
-    admin = session.query(Admin).filter(Admin.user_id == user_id, Admin.is_super_admin == True).first()
-    return bool(admin)
+async def load_scam_blocklist() -> None:
+    """Maps the blocklist file and loads the single reports kept in the database."""
+    scam_blocklist.open()
+    async with Session() as session:
+        for lookup_key in await session.scalars(select(ScamReport.lookup_key)):
+            scam_blocklist.report(lookup_key)
+
+async def on_startup(application) -> None:
+    """Runs once before the bot starts receiving updates."""
+    await init_db()
+    # Groups load their admins on first use (VerificationGroup.ensure_loaded).
+    logger.info(f"Serving {len(groups)} verification group(s).")
+    await load_scam_blocklist()
+    outbox.start(application.bot)
+    audit_log.start()
+    if METRICS_PORT:
+        await metrics.start_server(METRICS_LISTEN, METRICS_PORT)
+
+async def on_shutdown(application) -> None:
+    """Flushes queued replies and releases pooled database connections when the bot stops."""
+    await outbox.stop()
+    await audit_log.stop()
+    await metrics.stop_server()
+    scam_blocklist.close()
+    await engine.dispose()
 
 
 # =============================================================================
-# 5. BOT COMMAND HANDLERS
+# 15. BOT COMMAND HANDLERS
 # =============================================================================
 
 # --- Core Commands ---
@@ -99,24 +2116,38 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         if chat.type == "private":
-            # Link admin accounts when they first DM the bot
-            if user.username:
-                admin_by_username = session.query(Admin).filter(Admin.username == user.username, Admin.user_id == None).first()
-                if admin_by_username:
+            # Link admin accounts when they first DM the bot, in every group
+            # that added this username. Only usernames the registry lists as
+            # pending can match, so everyone else skips the query.
+            pending = []
+            if user.username and await groups.is_pending(user.username):
+                pending = (await session.scalars(
+                    select(Admin).where(Admin.username == user.username, Admin.user_id == None)
+                )).all()
+            if pending:
+                for admin_by_username in pending:
                     admin_by_username.user_id = user.id
-                    session.commit()
-                    logger.info(f"Linked user_id {user.id} to admin @{user.username}")
-                    await update.message.reply_text(
-                        "🔑 <b>Admin Account Activated!</b>\n\n"
-                        f"Welcome, @{user.username}. Your Telegram account is now successfully linked to your admin profile.\n\n"
-                        "You can now use your assigned commands. Type /start again to see them.",
-                        parse_mode=ParseMode.HTML
-                    )
-                    return # Stop further execution to show the activation message first
+                await session.commit()
+                for admin_by_username in pending:
+                    groups.discard_pending(admin_by_username.group_id, user.username)
+                    group = groups.get_loaded(admin_by_username.group_id)
+                    if group:  # Groups not loaded yet will read the link from the DB
+                        group.principals.link(user.id, user.username, admin_by_username.is_super_admin)
+                        group.roster.set_linked(user.username)
+                    logger.info(f"Linked user_id {user.id} to admin @{user.username} of group {admin_by_username.group_id}")
+                await reply(
+                    update.message,
+                    "🔑 <b>Admin Account Activated!</b>\n\n"
+                    f"Welcome, @{user.username}. Your Telegram account is now successfully linked to your admin profile.\n\n"
+                    "You can now use your assigned commands. Type /start again to see them.",
+                    parse_mode=ParseMode.HTML
+                )
+                return # Stop further execution to show the activation message first
 
             # Check admin status after potential linking
-            admin_record = session.query(Admin).filter(Admin.user_id == user.id).first()
-            
+            group = await selected_group(update, context)
+            admin_record = group and group.principals.get(user.id)
+
             if admin_record:
                 if admin_record.is_super_admin:
                     welcome_msg = (
@@ -130,31 +2161,66 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         "➤ /admins - View all admins\n\n"
                         "<b>Payment Details:</b>\n"
                         "➤ /setadmin_crypto <code>@username ADDRESS</code>\n"
-                        "➤ /setadmin_upi <code>@username UPI_ID</code>"
+                        "➤ /setadmin_upi <code>@username UPI_ID</code>\n"
+                        "➤ /removeadmin_payment <code>VALUE</code>\n\n"
+                        "<b>Bulk:</b>\n"
+                        "➤ /import_admins <code>[dry]</code> - Upload a CSV/JSON roster\n"
+                        "➤ /export_admins <code>[csv|json]</code>\n\n"
+                        "<b>Reports:</b>\n"
+                        "➤ /verify_report <code>[24h|7d]</code> - Most-checked unverified details\n\n"
+                        "<b>Maintenance:</b>\n"
+                        "➤ /reindex - Rebuild the in-memory caches"
                     )
+                    if user.id == OWNER_ID:
+                        welcome_msg += (
+                            "\n➤ /stats - Handler latency and error counts\n\n"
+                            "<b>Scam Blocklist (all groups):</b>\n"
+                            "➤ /report_scam <code>VALUE</code>\n"
+                            "➤ /blocklist_load - Upload a file of scam addresses"
+                        )
                 else:
                     welcome_msg = (
                         "🛡️ <b>ADMIN DASHBOARD</b> 🛡️\n\n"
                         "Welcome, Admin. Here are your available commands:\n\n"
                         "➤ /admins - View the list of all admins."
                     )
-                await update.message.reply_text(welcome_msg, parse_mode=ParseMode.HTML)
+                if len(groups) > 1:
+                    welcome_msg += (
+                        f"\n\n🧭 Managing <b>{html.escape(group.config.title)}</b>. "
+                        "Switch with /use_group <code>NAME</code>."
+                    )
+                await reply(update.message, welcome_msg, parse_mode=ParseMode.HTML)
+            elif group is None:
+                # Several communities and we cannot tell which one this user belongs to
+                await reply(
+                    update.message,
+                    "🛡️ <b>Welcome to the Verification Bot!</b> 🛡️\n\n"
+                    "I am here to help you perform safe and secure transactions within our communities.\n\n"
+                    "In each community's group, use the /verify command to check if a Crypto Address or UPI ID "
+                    "belongs to one of its trusted admins. To check from any chat with "
+                    "<code>@bot ADDRESS</code>, first pick your community with /use_group <code>NAME</code>.",
+                    parse_mode=ParseMode.HTML
+                )
             else:
                 # Welcome message for regular users
-                join_button = InlineKeyboardButton(
-                    "🌍 Join Pagal World 🌍", 
-                    url=MAIN_GROUP_LINK
-                )
-                keyboard = [[join_button]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
+                title = html.escape(group.config.title)
+                reply_markup = None
+                if group.config.link:
+                    join_button = InlineKeyboardButton(
+                        f"🌍 Join {group.config.title} 🌍",
+                        url=group.config.link
+                    )
+                    keyboard = [[join_button]]
+                    reply_markup = InlineKeyboardMarkup(keyboard)
+
                 welcome_msg = (
                     "🛡️ <b>Welcome to the Verification Bot!</b> 🛡️\n\n"
-                    "I am here to help you perform safe and secure transactions within our community.\n\n"
+                    f"I am here to help you perform safe and secure transactions within {title}.\n\n"
                     "In our main group, you can use the /verify command to check if a Crypto Address or UPI ID belongs to one of our trusted admins.\n\n"
                     "Click the button below to join our main group!"
                 )
-                await update.message.reply_text(
+                await reply(
+                    update.message,
                     welcome_msg,
                     parse_mode=ParseMode.HTML,
                     reply_markup=reply_markup,
@@ -162,262 +2228,479 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
         else:
             # Message for /start in the group
+            title = groups.config(chat.id).title if chat.id in groups else "Payment"
             group_msg = (
-                "🔐 <b>Pagal World Verification Bot</b>\n\n"
+                f"🔐 <b>{html.escape(title)} Verification Bot</b>\n\n"
                 "I'm active and ready to protect you from scams!\n\n"
                 "➡️ Use <code>/verify [address or UPI]</code> to check a payment detail."
             )
-            await update.message.reply_text(group_msg, parse_mode=ParseMode.HTML)
+            await reply(update.message, group_msg, parse_mode=ParseMode.HTML)
     except Exception as e:
         logger.error("Critical error in /start command: %s", e, exc_info=True)
-        await update.message.reply_text("⚙️ An unexpected error occurred. Please try again later.")
+        await reply(update.message, "⚙️ An unexpected error occurred. Please try again later.")
     finally:
-        session.close()
+        await session.close()
 
-# --- Admin-Only Commands (Private Chat) ---
-async def list_admins(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Displays a formatted list of all registered admins."""
-    session = Session()
+async def use_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Chooses the group that private-chat commands and inline results apply to."""
     try:
-        admins = session.query(Admin).order_by(Admin.is_super_admin.desc(), Admin.username).all()
-        if not admins:
-            await update.message.reply_text("텅 No admins are currently registered in the database.")
+        if not context.args:
+            current = remembered_group_id(context)
+            lines = ["🧭 <b>Your Group</b>\n"]
+            if current is not None:
+                lines.append(f"Currently using: <b>{html.escape(groups.config(current).title)}</b>\n")
+            admin_of = await admin_group_ids(update.effective_user)
+            if admin_of:
+                lines.append("<b>Groups you manage:</b>")
+                lines.extend(
+                    f"➤ <code>{html.escape(groups.config(chat_id).name)}</code> - {html.escape(groups.config(chat_id).title)}"
+                    for chat_id in admin_of
+                )
+            lines.append("\nSend <code>/use_group NAME</code> to switch. Ask your community's admins for its name.")
+            await reply(update.message, "\n".join(lines), parse_mode=ParseMode.HTML)
             return
-            
-        admin_list = ["👥 <b>Registered Admin Team</b> 👥\n"]
-        for admin in admins:
-            role = "👑 Super Admin" if admin.is_super_admin else "🛡️ Admin"
-            status_icon = "✅" if admin.user_id else "⚠️"
-            methods = []
-            if admin.crypto_address: methods.append("💰")
-            if admin.upi_id: methods.append("💳")
-            method_icons = " ".join(methods) if methods else "None"
-            
-            admin_list.append(
-                f"\n• <b>@{admin.username}</b>\n"
-                f"  Status: {role}\n"
-                f"  Account Linked: {status_icon}\n"
-                f"  Payment Methods: {method_icons}"
+        group = groups.find(context.args[0])
+        if group is None:
+            await reply(
+                update.message,
+                f"❓ <b>Group Not Found</b>\nThere is no group called <code>{html.escape(context.args[0])}</code>.",
+                parse_mode=ParseMode.HTML
             )
-        
-        admin_list.append(
-            "\n\n— — — — — — — — — —\n"
-            "<b>Key:</b>\n"
-            "✅ - Account linked to the bot.\n"
-            "⚠️ - Admin added, but needs to /start the bot.\n"
-            "💰 - Crypto Address is set.\n"
-            "💳 - UPI ID is set."
+            return
+        context.user_data["group_id"] = group.chat_id
+        await reply(
+            update.message,
+            f"✅ <b>Group Selected</b>\n\nYour commands and inline checks now use <b>{html.escape(group.config.title)}</b>.",
+            parse_mode=ParseMode.HTML
         )
-            
-        await update.message.reply_text("\n".join(admin_list), parse_mode=ParseMode.HTML)
+    except Exception as e:
+        logger.error("Error in /use_group: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ An error occurred while selecting the group.")
+
+# --- Admin-Only Commands (Private Chat) ---
+async def list_admins(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Displays the first page of the pre-rendered admin roster."""
+    try:
+        group = await selected_group(update, context)
+        if group is None:
+            await reply_choose_group(update.message)
+            return
+        if not len(group.roster):
+            await reply(update.message, "텅 No admins are currently registered in the database.")
+            return
+        text, reply_markup = group.roster.page(0)
+        await reply(update.message, text, parse_mode=ParseMode.HTML, reply_markup=reply_markup)
     except Exception as e:
         logger.error("Error in /admins command: %s", e, exc_info=True)
-        await update.message.reply_text("⚙️ An error occurred while fetching the admin list.")
-    finally:
-        session.close()
+        await reply(update.message, "⚙️ An error occurred while fetching the admin list.")
+
+async def roster_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Flips the /admins message to another page when a navigation button is pressed."""
+    query = update.callback_query
+    try:
+        await query.answer()
+        _, chat_id, number = query.data.split(":")
+        group = await groups.get(int(chat_id))
+        if group is None or not len(group.roster):
+            return
+        text, reply_markup = group.roster.page(int(number))
+        await query.edit_message_text(text, parse_mode=ParseMode.HTML, reply_markup=reply_markup)
+    except BadRequest as e:
+        # Pressing a stale button can resolve to the page already shown.
+        if "not modified" not in str(e).lower():
+            logger.error("Error in /admins page navigation: %s", e, exc_info=True)
+    except Exception as e:
+        logger.error("Error in /admins page navigation: %s", e, exc_info=True)
 
 # --- Group Commands ---
 async def verify(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Checks a crypto address or UPI ID against the admin database."""
-    session = Session()
+    """Checks a crypto address or UPI ID against the in-memory verification index."""
     try:
         if not context.args:
-            await update.message.reply_text(
+            await reply(
+                update.message,
                 "ℹ️ <b>How to Verify</b>\n\n"
                 "Please provide an address or UPI ID to check.\n\n"
                 "<b>Example:</b>\n"
                 "<code>/verify YourCryptoAddressHere</code>\n"
-                "<code>/verify your-upi@id</code>",
+                "<code>/verify your-upi@id</code>\n\n"
+                "Works with UPI IDs, upi:// payment links and crypto addresses. EVM (0x…), Bitcoin and TRON "
+                "addresses are also checked for typos.",
                 parse_mode=ParseMode.HTML
             )
             return
 
-        address_to_check = ' '.join(context.args)
+        value = ' '.join(context.args)
+        try:
+            detail = parse_payment_detail(value)
+        except InvalidPaymentDetail as e:
+            await reply(update.message, render_invalid_detail(value, e), parse_mode=ParseMode.HTML)
+            return
+        group = await groups.get(update.effective_chat.id)
+        verdict = check_payment_detail(detail, group.index)
+        audit_log.record("verify", verdict, group.chat_id, update.effective_chat.id, update.effective_user.id)
+        await reply(
+            update.message, render_verdict(verdict), parse_mode=ParseMode.HTML,
+            coalesce_key=f"verify:{verdict.lookup_key}"
+        )
 
-        admin_found = session.query(Admin).filter(
-            (Admin.crypto_address == address_to_check) | (Admin.upi_id == address_to_check)
-        ).first()
+    except Exception as e:
+        logger.error("Error in /verify command: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ An error occurred during verification. Please try again.")
 
-        if admin_found:
-            role_emoji = "👑" if admin_found.is_super_admin else "🛡️"
-            message = (
-                "✅ <b>VERIFIED & TRUSTED</b> ✅\n\n"
-                "This payment detail is confirmed and secure.\n\n"
-                "<b>Address/ID:</b>\n"
-                f"<code>{address_to_check}</code>\n\n"
-                "It belongs to our trusted admin:\n"
-                f"➡️ <b>@{admin_found.username}</b> {role_emoji}"
-            )
-        else:
-            message = (
-                "🚨 <b>WARNING: UNVERIFIED</b> 🚨\n\n"
-                "This payment detail was <b>NOT FOUND</b> in our secure database.\n\n"
-                "<b>Address/ID Checked:</b>\n"
-                f"<code>{address_to_check}</code>\n\n"
-                "🔴 <b>DO NOT SEND FUNDS.</b> This is a high-risk transaction and could be a scam."
-            )
-        
-        await update.message.reply_text(message, parse_mode=ParseMode.HTML)
+# --- Inline mode: "@bot <address>" in any chat ---
+INLINE_MIN_QUERY_LENGTH = 6  # Shorter queries are ignored (no lookup, no answer)
+INLINE_DEBOUNCE = 0.4  # Seconds to wait for the user to stop typing before answering
+INLINE_CACHE_TIME = 10  # Seconds Telegram and our own cache may reuse an answer
+INLINE_CACHE_SIZE = 1024  # Recent queries kept in the server-side LRU
+
+
+class InlineResultCache:
+    """
+    Small LRU of (group chat_id, lookup_key) -> (Verdict, inline results), each
+    valid for INLINE_CACHE_TIME seconds.
+    """
+
+    def __init__(self, maxsize: int = INLINE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: tuple, entry: tuple) -> None:
+        self._entries[key] = (time.monotonic() + INLINE_CACHE_TIME, entry)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, lookup_keys, group_id: int = None) -> None:
+        """Drops the answers for these lookup keys, in one group or (group_id None) in every group."""
+        lookup_keys = set(lookup_keys)
+        for key in [k for k in self._entries if k[1] in lookup_keys and group_id in (None, k[0])]:
+            del self._entries[key]
+
+    def clear(self, group_id: int = None) -> None:
+        """Drops every answer of one group, or of all groups."""
+        for key in [k for k in self._entries if group_id in (None, k[0])]:
+            del self._entries[key]
 
+
+inline_cache = InlineResultCache()
+inline_latest_query = {}  # user_id -> id of their newest inline query, for debouncing
+
+def inline_verdict_result(verdict: Verdict, group: VerificationGroup) -> InlineQueryResultArticle:
+    """The verdict card as an inline result, with a one-line summary as its title."""
+    if verdict.status == "verified":
+        title = f"✅ Verified — @{verdict.admin.username}"
+    elif verdict.status == "scam":
+        title = "⛔ KNOWN SCAM — do not pay"
+    elif verdict.status == "lookalike":
+        title = f"☠️ Lookalike of @{verdict.lookalikes[0][0].username}'s detail — do not pay"
+    else:
+        title = "🚨 Not verified — do not pay"
+    return InlineQueryResultArticle(
+        id=hashlib.blake2b(f"{group.chat_id}:{verdict.lookup_key}".encode(), digest_size=16).hexdigest(),
+        title=title,
+        description=f"{verdict.value} · {group.config.title}" if len(groups) > 1 else verdict.value,
+        input_message_content=InputTextMessageContent(render_verdict(verdict), parse_mode=ParseMode.HTML),
+    )
+
+def inline_invalid_result(value: str, error: InvalidPaymentDetail) -> InlineQueryResultArticle:
+    """Tells an inline user why their query is not a checkable detail (yet)."""
+    return InlineQueryResultArticle(
+        id=hashlib.blake2b(value.encode(), digest_size=16).hexdigest(),
+        title="❓ Not a valid address or UPI ID",
+        description=str(error),
+        input_message_content=InputTextMessageContent(render_invalid_detail(value, error), parse_mode=ParseMode.HTML),
+    )
+
+async def inline_verify(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Answers "@bot <address>" with the same verdict card as /verify, checked
+    against the user's group (see selected_group). Telegram sends a query per
+    keystroke, so short queries are ignored, a query is only answered once the
+    user paused typing for INLINE_DEBOUNCE seconds (newer queries supersede
+    it), and answers are cached here and by Telegram.
+    """
+    query = update.inline_query
+    value = query.query.strip()
+    if len(canonical_payment_key(value)) < INLINE_MIN_QUERY_LENGTH:
+        return
+    user_id = query.from_user.id
+    inline_latest_query[user_id] = query.id
+    try:
+        try:
+            detail = parse_payment_detail(value)
+        except InvalidPaymentDetail as e:
+            # Usually a detail still being typed: say what is wrong once typing pauses, without a lookup.
+            await asyncio.sleep(INLINE_DEBOUNCE)
+            if inline_latest_query.get(user_id) == query.id:
+                await query.answer([inline_invalid_result(value, e)], cache_time=INLINE_CACHE_TIME)
+            return
+        lookup_key = detail.lookup_key
+        group_id = remembered_group_id(context)
+        cached = inline_cache.get((group_id, lookup_key)) if group_id is not None else None
+        if cached is None:
+            await asyncio.sleep(INLINE_DEBOUNCE)
+            if inline_latest_query.get(user_id) != query.id:
+                return  # Superseded by a later keystroke; Telegram drops unanswered queries
+            group = await selected_group(update, context)
+            if group is None:
+                await query.answer(
+                    [], cache_time=0, is_personal=True,
+                    button=InlineQueryResultsButton(text="Choose your community first", start_parameter="use_group"),
+                )
+                return
+            verdict = check_payment_detail(detail, group.index)
+            cached = (verdict, [inline_verdict_result(verdict, group)])
+            group_id = group.chat_id
+            inline_cache.put((group_id, lookup_key), cached)
+        verdict, results = cached
+        audit_log.record("inline", verdict, group_id, user_id=user_id)
+        # Personal when the answer depends on the user's chosen group.
+        await query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=len(groups) > 1)
+    except BadRequest as e:
+        # The user kept typing and the query expired before we answered.
+        logger.debug(f"Inline query not answered: {e}")
     except Exception as e:
-        logger.error("Error in /verify command: %s", e, exc_info=True)
-        await update.message.reply_text("⚙️ An error occurred during verification. Please try again.")
+        logger.error("Error in inline verification: %s", e, exc_info=True)
     finally:
-        session.close()
+        if inline_latest_query.get(user_id) == query.id:
+            del inline_latest_query[user_id]
+
+async def scan_group_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Passively checks payment details pasted in the group and warns about unverified ones."""
+    message = update.effective_message
+    try:
+        text = message.text or message.caption
+        if not text:
+            return
+        warnings, keys = [], []
+        details = {}  # lookup_key -> PaymentDetail, so two spellings of one detail warn once
+        for value in find_payment_details(text):
+            try:
+                detail = parse_payment_detail(value)
+            except InvalidPaymentDetail:
+                continue  # Shaped like an address but not one; nothing to warn about
+            details.setdefault(detail.lookup_key, detail)
+        group = await groups.get(update.effective_chat.id) if details else None
+        for detail in details.values():
+            verdict = check_payment_detail(detail, group.index)
+            if verdict.status != "verified":
+                warnings.append(render_verdict(verdict))
+                keys.append(verdict.lookup_key)
+        if warnings:
+            await reply(
+                message,
+                "🤖 <b>Automatic payment check</b>\n\n" + "\n\n— — — — —\n\n".join(warnings),
+                parse_mode=ParseMode.HTML,
+                coalesce_key="scan:" + " ".join(sorted(keys)),
+            )
+    except Exception as e:
+        logger.error("Error in group message scanner: %s", e, exc_info=True)
 
 
 # =============================================================================
-# 6. ADMIN MANAGEMENT COMMANDS (Private, Super Admin Only)
+# 16. ADMIN MANAGEMENT COMMANDS (Private, Super Admin Only)
 # =============================================================================
-async def add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
+# Telegram usernames: 5-32 letters, digits or underscores. Checked before an
+# admin is stored, so rosters and verdicts can show them as they are.
+USERNAME_PATTERN = re.compile(r"[A-Za-z0-9_]{5,32}")
+
+@super_admin_only
+async def add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
     session = Session()
     try:
-        if not is_super_admin(user_id, session):
-            await update.message.reply_text("🚫 <b>Access Denied</b>\nThis command is for Super Admins only.")
-            return
         if not context.args:
-            await update.message.reply_text("ℹ️ <b>Usage:</b> <code>/add_admin @username</code>")
+            await reply(update.message, "ℹ️ <b>Usage:</b> <code>/add_admin @username</code>")
             return
         new_username = context.args[0].lstrip('@')
-        if session.query(Admin).filter(Admin.username == new_username).first():
-            await update.message.reply_text(f"⚠️ <b>Already Exists</b>\n@{new_username} is already on the admin list.")
+        if not USERNAME_PATTERN.fullmatch(new_username):
+            await reply(
+                update.message,
+                "❌ <b>Invalid Username</b>\nTelegram usernames are 5-32 letters, digits or underscores.",
+                parse_mode=ParseMode.HTML
+            )
+            return
+        if await session.scalar(select(Admin).where(Admin.group_id == group.chat_id, Admin.username == new_username)):
+            await reply(update.message, f"⚠️ <b>Already Exists</b>\n@{new_username} is already on the admin list.")
             return
-        new_admin = Admin(username=new_username)
+        new_admin = Admin(group_id=group.chat_id, username=new_username)
         session.add(new_admin)
-        session.commit()
-        await update.message.reply_text(
+        await session.commit()
+        group.index.add_admin(new_username)
+        group.principals.add_pending(new_username)
+        groups.add_pending(group.chat_id, new_username)
+        group.roster.add_admin(new_username)
+        await reply(
+            update.message,
             f"✅ <b>Admin Added</b>\n\n`@{new_username}` is now a regular admin.\n\n"
             "<b>Action Required:</b> They must start a private chat with me (/start) to link their account and receive commands.",
             parse_mode=ParseMode.HTML
         )
     except Exception as e:
         logger.error("Error in /add_admin: %s", e, exc_info=True)
-        await update.message.reply_text("⚙️ An error occurred while adding the admin.")
+        await reply(update.message, "⚙️ An error occurred while adding the admin.")
     finally:
-        session.close()
+        await session.close()
 
-async def remove_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
+@super_admin_only
+async def remove_admin(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
     session = Session()
     try:
-        if not is_super_admin(user_id, session): 
-            await update.message.reply_text("🚫 <b>Access Denied</b>\nThis command is for Super Admins only.")
-            return
         if not context.args:
-            await update.message.reply_text("ℹ️ <b>Usage:</b> <code>/remove_admin @username</code>")
+            await reply(update.message, "ℹ️ <b>Usage:</b> <code>/remove_admin @username</code>")
             return
         target_username = context.args[0].lstrip('@')
-        target_admin = session.query(Admin).filter(Admin.username == target_username).first()
+        target_admin = await session.scalar(select(Admin).where(Admin.group_id == group.chat_id, Admin.username == target_username))
         if not target_admin:
-            await update.message.reply_text(f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
+            await reply(update.message, f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
             return
         if target_admin.user_id == OWNER_ID:
-            await update.message.reply_text("🛡️ <b>Action Blocked</b>\nThe bot owner cannot be removed.")
+            await reply(update.message, "🛡️ <b>Action Blocked</b>\nThe bot owner cannot be removed.")
             return
-        session.delete(target_admin)
-        session.commit()
-        await update.message.reply_text(f"🗑️ <b>Admin Removed</b>\n\n@{target_username} has been successfully removed from the admin list.")
+        await session.delete(target_admin)
+        await session.commit()
+        inline_cache.discard(group.index.keys_of(target_username), group.chat_id)
+        group.index.remove_admin(target_username)
+        group.principals.remove(target_username)
+        groups.discard_pending(group.chat_id, target_username)
+        group.roster.remove_admin(target_username)
+        await reply(update.message, f"🗑️ <b>Admin Removed</b>\n\n@{target_username} has been successfully removed from the admin list.")
     except Exception as e:
         logger.error("Error in /remove_admin: %s", e, exc_info=True)
-        await update.message.reply_text("⚙️ Failed to remove admin due to an internal error.")
+        await reply(update.message, "⚙️ Failed to remove admin due to an internal error.")
     finally:
-        session.close()
+        await session.close()
 
-async def promote(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
+@super_admin_only
+async def promote(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
     session = Session()
     try:
-        if not is_super_admin(user_id, session): 
-            await update.message.reply_text("🚫 <b>Access Denied</b>\nThis command is for Super Admins only.")
-            return
         if not context.args:
-            await update.message.reply_text("ℹ️ <b>Usage:</b> <code>/promote @username</code>")
+            await reply(update.message, "ℹ️ <b>Usage:</b> <code>/promote @username</code>")
             return
         target_username = context.args[0].lstrip('@')
-        target_admin = session.query(Admin).filter(Admin.username == target_username).first()
+        target_admin = await session.scalar(select(Admin).where(Admin.group_id == group.chat_id, Admin.username == target_username))
         if not target_admin:
-            await update.message.reply_text(f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
+            await reply(update.message, f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
             return
         if target_admin.is_super_admin:
-            await update.message.reply_text(f"⚠️ <b>No Change</b>\n@{target_username} is already a Super Admin.")
+            await reply(update.message, f"⚠️ <b>No Change</b>\n@{target_username} is already a Super Admin.")
             return
         target_admin.is_super_admin = True
-        session.commit()
-        await update.message.reply_text(f"🚀 <b>Promotion Successful</b>\n\n@{target_username} has been promoted to <b>Super Admin</b>.")
+        await session.commit()
+        group.index.set_role(target_username, True)
+        inline_cache.discard(group.index.keys_of(target_username), group.chat_id)  # Cards show the role
+        group.principals.set_role(target_username, True)
+        group.roster.set_role(target_username, True)
+        await reply(update.message, f"🚀 <b>Promotion Successful</b>\n\n@{target_username} has been promoted to <b>Super Admin</b>.")
     except Exception as e:
         logger.error("Error in /promote: %s", e, exc_info=True)
-        await update.message.reply_text("⚙️ Failed to promote admin due to an internal error.")
+        await reply(update.message, "⚙️ Failed to promote admin due to an internal error.")
     finally:
-        session.close()
+        await session.close()
 
-async def demote(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
+@super_admin_only
+async def demote(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
     session = Session()
     try:
-        if not is_super_admin(user_id, session): 
-            await update.message.reply_text("🚫 <b>Access Denied</b>\nThis command is for Super Admins only.")
-            return
         if not context.args:
-            await update.message.reply_text("ℹ️ <b>Usage:</b> <code>/demote @username</code>")
+            await reply(update.message, "ℹ️ <b>Usage:</b> <code>/demote @username</code>")
             return
         target_username = context.args[0].lstrip('@')
-        target_admin = session.query(Admin).filter(Admin.username == target_username).first()
+        target_admin = await session.scalar(select(Admin).where(Admin.group_id == group.chat_id, Admin.username == target_username))
         if not target_admin:
-            await update.message.reply_text(f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
+            await reply(update.message, f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
             return
         if target_admin.user_id == OWNER_ID:
-            await update.message.reply_text("🛡️ <b>Action Blocked</b>\nThe bot owner cannot be demoted.")
+            await reply(update.message, "🛡️ <b>Action Blocked</b>\nThe bot owner cannot be demoted.")
             return
         if not target_admin.is_super_admin:
-            await update.message.reply_text(f"⚠️ <b>No Change</b>\n@{target_username} is already a regular Admin.")
+            await reply(update.message, f"⚠️ <b>No Change</b>\n@{target_username} is already a regular Admin.")
             return
         target_admin.is_super_admin = False
-        session.commit()
-        await update.message.reply_text(f"📉 <b>Demotion Successful</b>\n\n@{target_username} has been demoted to a regular <b>Admin</b>.")
+        await session.commit()
+        group.index.set_role(target_username, False)
+        inline_cache.discard(group.index.keys_of(target_username), group.chat_id)  # Cards show the role
+        group.principals.set_role(target_username, False)
+        group.roster.set_role(target_username, False)
+        await reply(update.message, f"📉 <b>Demotion Successful</b>\n\n@{target_username} has been demoted to a regular <b>Admin</b>.")
     except Exception as e:
         logger.error("Error in /demote: %s", e, exc_info=True)
-        await update.message.reply_text("⚙️ Failed to demote admin due to an internal error.")
+        await reply(update.message, "⚙️ Failed to demote admin due to an internal error.")
     finally:
-        session.close()
+        await session.close()
 
-async def set_payment(update: Update, context: ContextTypes.DEFAULT_TYPE, method: str):
-    user_id = update.effective_user.id
+@super_admin_only
+async def set_payment(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup, method: str):
     session = Session()
     try:
-        if not is_super_admin(user_id, session): 
-            await update.message.reply_text("🚫 <b>Access Denied</b>\nThis command is for Super Admins only.")
-            return
         if len(context.args) < 2:
-            await update.message.reply_text(f"ℹ️ <b>Usage:</b> <code>/setadmin_{method} @username VALUE</code>", parse_mode=ParseMode.HTML)
+            await reply(update.message, f"ℹ️ <b>Usage:</b> <code>/setadmin_{method} @username VALUE</code>", parse_mode=ParseMode.HTML)
             return
             
         target_username = context.args[0].lstrip('@')
-        value = ' '.join(context.args[1:])
-        target_admin = session.query(Admin).filter(Admin.username == target_username).first()
+        try:
+            detail = parse_payment_detail(' '.join(context.args[1:]))
+        except InvalidPaymentDetail as e:
+            await reply(update.message, f"❌ <b>Invalid {method.upper()}</b>\n{html.escape(str(e))}", parse_mode=ParseMode.HTML)
+            return
+        if detail.kind != method:
+            await reply(
+                update.message,
+                f"⚠️ <b>Wrong Command</b>\nThat is a {detail.network or 'crypto'} detail. "
+                f"Use <code>/setadmin_{detail.kind} @{html.escape(target_username)} VALUE</code> instead.",
+                parse_mode=ParseMode.HTML
+            )
+            return
+        value, lookup_key = detail.value, detail.lookup_key
+        target_admin = await session.scalar(select(Admin).where(Admin.group_id == group.chat_id, Admin.username == target_username))
 
         if not target_admin:
-            await update.message.reply_text(f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
+            await reply(update.message, f"❓ <b>Admin Not Found</b>\nThe username @{target_username} is not in our database.")
             return
         
         method_emoji = "💰" if method == "crypto" else "💳"
-        if method == "crypto":
-            target_admin.crypto_address = value
-        elif method == "upi":
-            target_admin.upi_id = value
-            
-        session.commit()
-        await update.message.reply_text(
+        existing = await session.scalar(
+            select(PaymentMethod).where(PaymentMethod.group_id == group.chat_id, PaymentMethod.lookup_key == lookup_key)
+        )
+        if existing:
+            owner = "them" if existing.admin_id == target_admin.id else f"@{html.escape(existing.admin.username)}"
+            await reply(
+                update.message,
+                f"⚠️ <b>Already Registered</b>\n<code>{html.escape(existing.value)}</code> already belongs to {owner}.",
+                parse_mode=ParseMode.HTML
+            )
+            return
+
+        target_admin.payment_methods.append(
+            PaymentMethod(group_id=group.chat_id, kind=method, network=detail.network, value=value, lookup_key=lookup_key)
+        )
+        await session.commit()
+        group.index.add_payment(target_username, target_admin.is_super_admin, lookup_key)
+        inline_cache.discard([lookup_key], group.chat_id)
+        group.roster.add_payment(target_username, method, detail.network)
+        await reply(
+            update.message,
             f"✅ <b>Payment Info Updated</b>\n\n"
-            f"{method_emoji} The {method.upper()} for <b>@{target_username}</b> has been set to:\n"
-            f"<code>{value}</code>", 
+            f"{method_emoji} A {method.upper()} for <b>@{html.escape(target_username)}</b> has been added:\n"
+            f"<code>{value}</code> ({detail.network or 'other chain'})", 
             parse_mode=ParseMode.HTML
         )
     except Exception as e:
         logger.error(f"Error in /setadmin_{method}: %s", e, exc_info=True)
-        await update.message.reply_text(f"⚙️ Failed to set {method.upper()} details due to an internal error.")
+        await reply(update.message, f"⚙️ Failed to set {method.upper()} details due to an internal error.")
     finally:
-        session.close()
+        await session.close()
 
 async def setadmin_crypto(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await set_payment(update, context, "crypto")
@@ -425,46 +2708,704 @@ async def setadmin_crypto(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def setadmin_upi(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await set_payment(update, context, "upi")
 
+@super_admin_only
+async def remove_payment(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
+    """Deletes one crypto address or UPI ID, whichever admin of the group it belongs to."""
+    session = Session()
+    try:
+        if not context.args:
+            await reply(update.message, "ℹ️ <b>Usage:</b> <code>/removeadmin_payment VALUE</code>", parse_mode=ParseMode.HTML)
+            return
+
+        value = ' '.join(context.args)
+        try:
+            lookup_key = parse_payment_detail(value).lookup_key
+        except InvalidPaymentDetail:
+            lookup_key = canonical_payment_key(value)  # Stored before validation existed
+        method = await session.scalar(
+            select(PaymentMethod).where(PaymentMethod.group_id == group.chat_id, PaymentMethod.lookup_key == lookup_key)
+        )
+        if not method:
+            await reply(update.message, "❓ <b>Not Found</b>\nThat payment detail is not registered to any admin.", parse_mode=ParseMode.HTML)
+            return
+        username, value = method.admin.username, method.value
+        await session.delete(method)
+        await session.commit()
+        group.index.remove_payment(lookup_key)
+        inline_cache.discard([lookup_key], group.chat_id)
+        group.roster.remove_payment(username, method.kind, method.network)
+        await reply(
+            update.message,
+            f"🗑️ <b>Payment Info Removed</b>\n\n<code>{html.escape(value)}</code> no longer belongs to "
+            f"<b>@{html.escape(username)}</b>.",
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        logger.error("Error in /removeadmin_payment: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ Failed to remove the payment detail due to an internal error.")
+    finally:
+        await session.close()
+
+@owner_only
+async def report_scam(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Adds one payment detail to the scam blocklist, which every group shares."""
+    session = Session()
+    try:
+        if not context.args:
+            await reply(update.message, "ℹ️ <b>Usage:</b> <code>/report_scam VALUE</code>", parse_mode=ParseMode.HTML)
+            return
+        try:
+            detail = parse_payment_detail(' '.join(context.args))
+        except InvalidPaymentDetail as e:
+            await reply(update.message, f"❌ <b>Invalid Detail</b>\n{html.escape(str(e))}", parse_mode=ParseMode.HTML)
+            return
+        value, lookup_key = detail.value, detail.lookup_key
+        # The blocklist is shared by all groups, so check every group's admins.
+        owned = await session.scalar(select(PaymentMethod).where(PaymentMethod.lookup_key == lookup_key).limit(1))
+        if owned:
+            where = ""
+            if len(groups) > 1 and owned.group_id in groups:
+                where = f" in {html.escape(groups.config(owned.group_id).title)}"
+            await reply(
+                update.message,
+                f"🛡️ <b>Action Blocked</b>\n<code>{html.escape(value)}</code> belongs to our admin "
+                f"@{html.escape(owned.admin.username)}{where}. Remove it from their profile first.",
+                parse_mode=ParseMode.HTML
+            )
+            return
+        if scam_blocklist.contains(lookup_key):
+            await reply(update.message, "⚠️ <b>No Change</b>\nThat payment detail is already on the scam blocklist.", parse_mode=ParseMode.HTML)
+            return
+        session.add(ScamReport(value=value, lookup_key=lookup_key, reported_by=update.effective_user.id))
+        await session.commit()
+        scam_blocklist.report(lookup_key)
+        inline_cache.discard([lookup_key])
+        await reply(
+            update.message,
+            f"⛔ <b>Scam Reported</b>\n\n<code>{html.escape(value)}</code> will now be flagged as a <b>KNOWN SCAM</b>.",
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        logger.error("Error in /report_scam: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ Failed to report the scam due to an internal error.")
+    finally:
+        await session.close()
+
+@owner_only
+async def blocklist_load(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Merges an uploaded text file (one address per line) into the scam blocklist, which every group shares."""
+    message = update.message
+    document, _ = command_document(update, context)
+    if not document:
+        await reply(
+            message,
+            "ℹ️ <b>Usage:</b> send a text file with one address per line and the caption "
+            "<code>/blocklist_load</code>, or reply to one with the command.",
+            parse_mode=ParseMode.HTML
+        )
+        return
+    if document.file_size and document.file_size > BLOCKLIST_UPLOAD_MAX_BYTES:
+        await reply(
+            message,
+            "⚠️ <b>File Too Large</b>\nTelegram limits bot downloads to 20 MB. "
+            "Load bigger lists on the server with <code>--load-blocklist FILE</code>.",
+            parse_mode=ParseMode.HTML
+        )
+        return
+    try:
+        file = await context.bot.get_file(document.file_id)
+        content = bytes(await file.download_as_bytearray()).decode("utf-8", errors="replace")
+        before = len(scam_blocklist)
+        await asyncio.to_thread(
+            write_blocklist, BLOCKLIST_PATH, blocklist_keys(content.splitlines()), scam_blocklist
+        )
+        scam_blocklist.open()
+        inline_cache.clear()
+        await reply(
+            message,
+            f"📛 <b>Blocklist Updated</b>\n\nEntries before: {before}\nEntries now: {len(scam_blocklist)}",
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        logger.error("Error in /blocklist_load: %s", e, exc_info=True)
+        await reply(message, "⚙️ Failed to load the blocklist due to an internal error. The old list is still active.")
+
+@super_admin_only
+async def reindex(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
+    """Forces a rebuild of the group's in-memory caches, e.g. after the DB was edited by hand."""
+    try:
+        hits, misses = group.index.hits, group.index.misses
+        await group.refresh()
+        groups.forget_pending()
+        inline_cache.clear(group.chat_id)
+        await reply(
+            update.message,
+            f"🔄 <b>Verification Index Rebuilt</b>\n\n"
+            f"Payment values indexed: {len(group.index)}\n"
+            f"Lookups since startup: {hits} hits / {misses} misses",
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        logger.error("Error in /reindex: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ Failed to rebuild the verification index due to an internal error.")
+
+def parse_report_window(arg: str):
+    """'12h', '7d' or a bare number of hours -> timedelta, or None if invalid."""
+    match = re.fullmatch(r"(\d{1,4})([hd]?)", arg.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        return None
+    amount = int(match.group(1))
+    window = datetime.timedelta(days=amount) if match.group(2) == "d" else datetime.timedelta(hours=amount)
+    return min(window, AUDIT_MAX_WINDOW)
+
+@super_admin_only
+async def verify_report(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
+    """Lists the group's most-checked payment details that did not verify, over a time window."""
+    try:
+        window = parse_report_window(context.args[0]) if context.args else datetime.timedelta(hours=24)
+        if window is None:
+            await reply(
+                update.message,
+                "ℹ️ <b>Usage:</b> <code>/verify_report [WINDOW]</code>\n"
+                "WINDOW is hours or days, e.g. <code>12h</code> or <code>7d</code> (default 24h, max 90d).",
+                parse_mode=ParseMode.HTML
+            )
+            return
+        await audit_log.flush()  # Include lookups still waiting in the queue
+        since = audit_hour(datetime.datetime.now(datetime.timezone.utc) - window)
+        async with Session() as session:
+            totals = dict((await session.execute(
+                select(VerificationTally.status, func.sum(VerificationTally.checks))
+                .where(VerificationTally.group_id == group.chat_id, VerificationTally.hour >= since)
+                .group_by(VerificationTally.status)
+            )).all())
+            checks = func.sum(VerificationTally.checks).label("checks")
+            rows = (await session.execute(
+                select(VerificationTally.lookup_key, VerificationTally.status, func.max(VerificationTally.value), checks)
+                .where(
+                    VerificationTally.group_id == group.chat_id, VerificationTally.hour >= since,
+                    VerificationTally.status != "verified",
+                )
+                .group_by(VerificationTally.lookup_key, VerificationTally.status)
+                .order_by(checks.desc())
+                .limit(AUDIT_REPORT_ROWS)
+            )).all()
+
+        hours = int(window.total_seconds()) // 3600
+        label = f"{hours // 24}d" if hours >= 48 and hours % 24 == 0 else f"{hours}h"
+        markers = {"scam": "⛔", "lookalike": "⚠️", "unverified": "❓"}
+        scope = f" · {html.escape(group.config.title)}" if len(groups) > 1 else ""
+        lines = [
+            f"🔎 <b>Verification Report — last {label}</b>{scope}\n",
+            f"Lookups: {sum(totals.values())} "
+            f"(✅ {totals.get('verified', 0)} verified, ⛔ {totals.get('scam', 0)} scam, "
+            f"⚠️ {totals.get('lookalike', 0)} lookalike, ❓ {totals.get('unverified', 0)} unverified)\n",
+        ]
+        if rows:
+            lines.append("<b>Most-checked unverified details:</b>")
+            for n, (_, status, value, count) in enumerate(rows, start=1):
+                lines.append(f"{n}. {markers.get(status, '❓')} <code>{html.escape(value)}</code> — {count}×")
+        else:
+            lines.append("No unverified lookups in this window.")
+        await reply(update.message, "\n".join(lines), parse_mode=ParseMode.HTML)
+    except Exception as e:
+        logger.error("Error in /verify_report: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ Failed to build the verification report due to an internal error.")
+
+@owner_only
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Shows per-handler call counts, errors, latency percentiles and DB/API time."""
+    try:
+        await reply(update.message, metrics.render_stats(), parse_mode=ParseMode.HTML)
+    except Exception as e:
+        logger.error("Error in /stats: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ Failed to collect statistics due to an internal error.")
+
 # =============================================================================
-# 7. MAIN FUNCTION TO RUN THE BOT
+# 17. BULK IMPORT / EXPORT (Private, Super Admin Only)
 # =============================================================================
-def main() -> None:
-    """Sets up and runs the Telegram bot."""
-    # Ensure owner is in DB at startup
-    setup_owner()
-    
-    application = (
+IMPORT_MAX_BYTES = 5 * 1024 * 1024
+IMPORT_REPORT_LINES = 20
+EXPORT_FIELDS = ("username", "role", "user_id", "crypto", "crypto_networks", "upi")
+
+
+class ImportRejected(Exception):
+    """Raised when an import document is invalid; nothing has been written."""
+
+
+def command_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Returns (document, args) for commands that take an uploaded file, either as
+    the file's caption or as a reply to it.
+    """
+    message = update.message
+    document = message.document or (message.reply_to_message and message.reply_to_message.document)
+    if context.args is None:  # Came in as a document caption
+        args = (message.caption or "").split()[1:]
+    else:
+        args = context.args
+    return document, args
+
+
+def parse_admin_document(filename: str, data: bytes) -> list:
+    """
+    Parses an uploaded CSV or JSON roster into a list of
+    {"username", "role", "crypto": [...], "upi": [...]} dicts.
+    CSV cells may hold several payment values separated by ';'.
+    """
+    try:
+        content = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportRejected("The document is not UTF-8 text.")
+
+    if filename.lower().endswith(".json"):
+        try:
+            records = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ImportRejected(f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise ImportRejected("The JSON document must be a list of admin objects.")
+    else:
+        records = list(csv.DictReader(io.StringIO(content)))
+
+    rows, errors = [], []
+    for number, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            errors.append(f"Row {number}: expected an object.")
+            continue
+        username = str(record.get("username") or "").strip().lstrip('@')
+        role = str(record.get("role") or "").strip().lower()
+        if not username:
+            errors.append(f"Row {number}: missing username.")
+        elif not USERNAME_PATTERN.fullmatch(username):
+            errors.append(f"Row {number}: '{username}' is not a Telegram username (5-32 letters, digits or _).")
+        if role not in ("", "admin", "super_admin"):
+            errors.append(f"Row {number}: unknown role '{role}'.")
+        row = {"username": username, "role": role}
+        for kind in ("crypto", "upi"):
+            values = record.get(kind) or []
+            if isinstance(values, str):
+                values = values.split(";")
+            row[kind] = [str(v).strip() for v in values if str(v).strip()]
+        rows.append(row)
+    if errors:
+        raise ImportRejected("\n".join(errors[:10]))
+    return rows
+
+
+async def apply_admin_import(session, rows: list, group_id: int) -> list:
+    """
+    Upserts `rows` into one group's admins inside the session's transaction with
+    a few bulk statements and returns the diff lines. Existing payment methods
+    are kept; new ones are added. The caller decides whether to commit (import)
+    or roll back (dry run).
+    """
+    admins = {
+        username: (admin_id, user_id, is_super_admin)
+        for admin_id, username, user_id, is_super_admin in await session.execute(
+            select(Admin.id, Admin.username, Admin.user_id, Admin.is_super_admin).where(Admin.group_id == group_id)
+        )
+    }
+    owners = dict((await session.execute(
+        select(PaymentMethod.lookup_key, Admin.username).join(Admin).where(PaymentMethod.group_id == group_id)
+    )).all())
+    diff, errors = [], []
+    new_admins, role_changes, new_methods = [], [], []
+    seen_usernames = set()
+
+    for row in rows:
+        username = row["username"]
+        if username in seen_usernames:
+            errors.append(f"@{username} appears more than once.")
+            continue
+        seen_usernames.add(username)
+
+        wants_super = row["role"] == "super_admin"
+        if username not in admins:
+            new_admins.append({"group_id": group_id, "username": username, "is_super_admin": wants_super})
+            diff.append(f"+ @{username} ({'super admin' if wants_super else 'admin'})")
+        else:
+            admin_id, user_id, is_super = admins[username]
+            if row["role"] and is_super != wants_super:
+                if user_id == OWNER_ID:
+                    errors.append("The bot owner cannot be demoted.")
+                    continue
+                role_changes.append({"id": admin_id, "is_super_admin": wants_super})
+                diff.append(f"~ @{username}: {'promoted to super admin' if wants_super else 'demoted to admin'}")
+
+        for kind, icon in (("crypto", "💰"), ("upi", "💳")):
+            for raw in row[kind]:
+                try:
+                    detail = parse_payment_detail(raw)
+                except InvalidPaymentDetail as e:
+                    errors.append(f"{raw}: {e}")
+                    continue
+                if detail.kind != kind:
+                    errors.append(f"{raw} is a {detail.network or 'crypto'} detail, not {kind}.")
+                    continue
+                value, key = detail.value, detail.lookup_key
+                owner = owners.get(key)
+                if owner == username:
+                    continue
+                if owner is not None:
+                    errors.append(f"{value} already belongs to @{owner}.")
+                    continue
+                owners[key] = username
+                new_methods.append({
+                    "username": username, "group_id": group_id, "kind": kind, "network": detail.network,
+                    "value": value, "lookup_key": key,
+                })
+                diff.append(f"+ @{username} {icon} {value}")
+
+    if errors:
+        raise ImportRejected("\n".join(errors[:10]) + (f"\n…and {len(errors) - 10} more." if len(errors) > 10 else ""))
+
+    admin_ids = {username: admin_id for username, (admin_id, _, _) in admins.items()}
+    if new_admins:
+        inserted = await session.execute(insert(Admin).returning(Admin.id, Admin.username), new_admins)
+        admin_ids.update({username: admin_id for admin_id, username in inserted})
+    if role_changes:
+        await session.execute(sql_update(Admin), role_changes)
+    if new_methods:
+        for method in new_methods:
+            method["admin_id"] = admin_ids[method.pop("username")]
+        await session.execute(insert(PaymentMethod), new_methods)
+    return diff
+
+
+@super_admin_only
+async def import_admins(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
+    """
+    Applies an uploaded CSV/JSON roster in a single transaction. Send the file
+    with the caption /import_admins, or reply to it with the command. Add "dry"
+    to preview the changes without saving them.
+    """
+    message = update.message
+    document, args = command_document(update, context)
+    dry_run = bool(args) and args[0].lower() in ("dry", "dry-run", "dryrun")
+
+    if not document:
+        await reply(
+            message,
+            "ℹ️ <b>Usage:</b> send a CSV or JSON file with the caption <code>/import_admins</code>, "
+            "or reply to one with <code>/import_admins [dry]</code>.\n\n"
+            "<b>CSV columns:</b> <code>username,role,crypto,upi</code> "
+            "(role is <code>admin</code> or <code>super_admin</code>; separate several values with <code>;</code>)",
+            parse_mode=ParseMode.HTML
+        )
+        return
+    if document.file_size and document.file_size > IMPORT_MAX_BYTES:
+        await reply(message, "⚠️ <b>File Too Large</b>\nImports are limited to 5 MB.", parse_mode=ParseMode.HTML)
+        return
+
+    session = Session()
+    try:
+        file = await context.bot.get_file(document.file_id)
+        rows = parse_admin_document(document.file_name or "", bytes(await file.download_as_bytearray()))
+        diff = await apply_admin_import(session, rows, group.chat_id)
+        if dry_run:
+            await session.rollback()
+        else:
+            await session.commit()
+            await group.refresh()
+            groups.sync_pending(group)
+            inline_cache.clear(group.chat_id)
+
+        title = "🔍 <b>Import Preview (dry run)</b>" if dry_run else "📥 <b>Import Complete</b>"
+        shown = "\n".join(html.escape(line) for line in diff[:IMPORT_REPORT_LINES]) or "No changes."
+        more = f"\n…and {len(diff) - IMPORT_REPORT_LINES} more." if len(diff) > IMPORT_REPORT_LINES else ""
+        footer = "\n\nNo changes were saved." if dry_run else ""
+        await reply(
+            message,
+            f"{title}\n\nRows read: {len(rows)}\nChanges: {len(diff)}\n\n<pre>{shown}</pre>{more}{footer}",
+            parse_mode=ParseMode.HTML
+        )
+    except ImportRejected as e:
+        await session.rollback()
+        await reply(
+            message,
+            f"❌ <b>Import Rejected</b>\nNothing was changed.\n\n<pre>{html.escape(str(e))}</pre>",
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        await session.rollback()
+        logger.error("Error in /import_admins: %s", e, exc_info=True)
+        await reply(message, "⚙️ Import failed due to an internal error. Nothing was changed.")
+    finally:
+        await session.close()
+
+
+@super_admin_only
+async def export_admins(update: Update, context: ContextTypes.DEFAULT_TYPE, group: VerificationGroup):
+    """
+    Sends the group's admins back as a CSV (default) or JSON document.
+    crypto_networks lists the chain of each crypto address, in the same order;
+    /import_admins ignores it and works the chain out from the address again.
+    """
+    as_json = bool(context.args) and context.args[0].lower() == "json"
+    session = Session()
+    try:
+        buffer = io.StringIO()
+        writer = None if as_json else csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        if writer:
+            writer.writeheader()
+        else:
+            buffer.write("[\n")
+        count = 0
+        result = await session.stream_scalars(
+            select(Admin).where(Admin.group_id == group.chat_id).order_by(Admin.username).execution_options(yield_per=500)
+        )
+        async for admin in result:
+            crypto = [m for m in admin.payment_methods if m.kind == "crypto"]
+            record = {
+                "username": admin.username,
+                "role": "super_admin" if admin.is_super_admin else "admin",
+                "user_id": admin.user_id,
+                "crypto": [m.value for m in crypto],
+                "crypto_networks": [m.network for m in crypto],
+                "upi": [m.value for m in admin.payment_methods if m.kind == "upi"],
+            }
+            if writer:
+                writer.writerow({
+                    **record,
+                    "crypto": ";".join(record["crypto"]),
+                    "crypto_networks": ";".join(network or "" for network in record["crypto_networks"]),
+                    "upi": ";".join(record["upi"]),
+                })
+            else:
+                buffer.write((",\n" if count else "") + json.dumps(record, ensure_ascii=False))
+            count += 1
+        if not writer:
+            buffer.write("\n]\n")
+
+        filename = "admins.json" if as_json else "admins.csv"
+        await reply_document(
+            update.message,
+            buffer.getvalue().encode("utf-8"),
+            filename,
+            caption=f"📤 Exported {count} admins."
+        )
+    except Exception as e:
+        logger.error("Error in /export_admins: %s", e, exc_info=True)
+        await reply(update.message, "⚙️ Export failed due to an internal error.")
+    finally:
+        await session.close()
+
+
+# =============================================================================
+# 18. CONCURRENT UPDATE PROCESSING
+# =============================================================================
+# Commands that write to the admin tables. Everything else only reads.
+MUTATING_COMMANDS = frozenset({
+    "start",  # Links an admin account on first contact
+    "use_group",  # Changes which group the chat's later commands apply to
+    "add_admin", "remove_admin", "promote", "demote",
+    "setadmin_crypto", "setadmin_upi", "removeadmin_payment",
+    "import_admins", "report_scam", "blocklist_load", "reindex",
+})
+
+def is_mutating_update(update: object) -> bool:
+    """True if the update invokes one of MUTATING_COMMANDS (as text or a document caption)."""
+    message = getattr(update, "effective_message", None)
+    text = message and (message.text or message.caption)
+    if not text or not text.startswith("/"):
+        return False
+    command = text.split(maxsplit=1)[0][1:].split("@", 1)[0].lower()
+    return command in MUTATING_COMMANDS
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Handles up to `max_concurrent_updates` updates at once.
+
+    Read-only updates run in parallel. Writes (see MUTATING_COMMANDS) run one at a
+    time behind a global lock, so two edits to the same Admin row can never race.
+    Within a chat, nothing overtakes an earlier write, and a write waits for every
+    earlier update of its chat, so e.g. /add_admin followed by /admins still shows
+    the new admin.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._write_lock = asyncio.Lock()
+        self._chats = {}  # chat_id -> [future of the latest write, futures of reads since then]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        chat = getattr(update, "effective_chat", None)
+        mutating = is_mutating_update(update)
+        if chat is None:
+            if mutating:
+                async with self._write_lock:
+                    await coroutine
+            else:
+                await coroutine
+            return
+
+        # Register before the first await so the chat keeps arrival order.
+        state = self._chats.setdefault(chat.id, [None, set()])
+        done = asyncio.get_running_loop().create_future()
+        if mutating:
+            waits = [f for f in (state[0], *state[1]) if f is not None]
+            state[0], state[1] = done, set()
+        else:
+            waits = [state[0]] if state[0] is not None else []
+            state[1].add(done)
+
+        try:
+            try:
+                if waits:
+                    await asyncio.gather(*waits)
+            except asyncio.CancelledError:
+                coroutine.close()
+                raise
+            if mutating:
+                async with self._write_lock:
+                    await coroutine
+            else:
+                await coroutine
+        finally:
+            done.set_result(None)
+            state[1].discard(done)
+            if (state[0] is None or state[0].done()) and not state[1] and self._chats.get(chat.id) is state:
+                del self._chats[chat.id]
+
+
+# =============================================================================
+# 19. MAIN FUNCTION TO RUN THE BOT
+# =============================================================================
+def allowed_update_types(application: Application) -> list:
+    """Returns only the update types that the registered handlers can consume."""
+    # Commands are filtered to new messages in build_application; only the
+    # group scanner (a MessageHandler) reads edited messages.
+    handler_types = {
+        CallbackQueryHandler: (Update.CALLBACK_QUERY,),
+        InlineQueryHandler: (Update.INLINE_QUERY,),
+        CommandHandler: (Update.MESSAGE,),
+        MessageHandler: (Update.MESSAGE, Update.EDITED_MESSAGE),
+    }
+    allowed = set()
+    for group in application.handlers.values():
+        for handler in group:
+            for handler_type, update_types in handler_types.items():
+                if isinstance(handler, handler_type):
+                    allowed.update(update_types)
+    return sorted(allowed)
+
+def webhook_options(allowed_updates: list) -> dict:
+    """Keyword arguments for Application.run_webhook / Updater.start_webhook, from the WEBHOOK_* settings."""
+    return dict(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET,
+        cert=WEBHOOK_CERT or None,
+        key=WEBHOOK_KEY or None,
+        allowed_updates=allowed_updates,
+    )
+
+def webhook_settings_error():
+    """Why the WEBHOOK_* settings cannot be served safely, or None if they can."""
+    if not WEBHOOK_URL:
+        return "BOT_MODE=webhook requires WEBHOOK_URL to be set."
+    if not WEBHOOK_SECRET:
+        return "BOT_MODE=webhook requires WEBHOOK_SECRET, or anyone who can reach the listener could forge updates."
+    if not re.fullmatch(r"[A-Za-z0-9_\-]{1,256}", WEBHOOK_SECRET):
+        return "WEBHOOK_SECRET may only contain letters, digits, '_' and '-' (at most 256 characters)."
+    return None
+
+def build_application(request: HTTPXRequest = None) -> Application:
+    """
+    Creates the Application and registers every handler. `request` replaces
+    the Bot API transport, e.g. an InstrumentedRequest over a fake backend in
+    benchmarks/bench_load.py.
+    """
+    builder = (
         ApplicationBuilder()
         .token(TOKEN)
-        .connect_timeout(30) # Increased timeouts for stability
-        .read_timeout(30)
-        .build()
+        .request(request or InstrumentedRequest(connect_timeout=30, read_timeout=30)) # Increased timeouts for stability
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
     )
+    if CONCURRENT_UPDATES > 1:
+        builder = builder.concurrent_updates(ChatOrderedUpdateProcessor(CONCURRENT_UPDATES))
+    application = builder.build()
     
-    # Define chat filters
-    private_filter = filters.ChatType.PRIVATE
-    # The group filter ensures these commands only work in your specific group
-    group_filter = filters.Chat(chat_id=VERIFICATION_GROUP_ID)
+    # Define chat filters. Commands only answer new messages: edits arrive
+    # with update.message set to None, and re-running a command on every edit
+    # would repeat its side effects anyway.
+    new_message = filters.UpdateType.MESSAGE
+    private_filter = filters.ChatType.PRIVATE & new_message
+    # The group filter ensures these commands only work in the configured groups
+    group_chats = filters.Chat(chat_id=groups.chat_ids)
+    group_filter = group_chats & new_message
     
     # --- Register Handlers ---
     # Core command available to everyone
-    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("start", start, filters=new_message))
+    application.add_handler(CommandHandler("use_group", use_group, filters=private_filter))
     
     # Admin commands (private chat only)
     application.add_handler(CommandHandler("admins", list_admins, filters=private_filter))
+    application.add_handler(CallbackQueryHandler(roster_page, pattern=r"^roster:-?\d+:\d+$"))
     application.add_handler(CommandHandler("add_admin", add_admin, filters=private_filter))
     application.add_handler(CommandHandler("remove_admin", remove_admin, filters=private_filter))
     application.add_handler(CommandHandler("promote", promote, filters=private_filter))
     application.add_handler(CommandHandler("demote", demote, filters=private_filter))
     application.add_handler(CommandHandler("setadmin_crypto", setadmin_crypto, filters=private_filter))
     application.add_handler(CommandHandler("setadmin_upi", setadmin_upi, filters=private_filter))
+    application.add_handler(CommandHandler("removeadmin_payment", remove_payment, filters=private_filter))
+    application.add_handler(CommandHandler("report_scam", report_scam, filters=private_filter))
+    application.add_handler(CommandHandler("blocklist_load", blocklist_load, filters=private_filter))
+    application.add_handler(MessageHandler(
+        private_filter & filters.Document.ALL & filters.CaptionRegex(r"^/blocklist_load\b"), blocklist_load
+    ))
+    application.add_handler(CommandHandler("reindex", reindex, filters=private_filter))
+    application.add_handler(CommandHandler("verify_report", verify_report, filters=private_filter))
+    application.add_handler(CommandHandler("stats", stats, filters=private_filter))
+    application.add_handler(CommandHandler("import_admins", import_admins, filters=private_filter))
+    application.add_handler(MessageHandler(
+        private_filter & filters.Document.ALL & filters.CaptionRegex(r"^/import_admins\b"), import_admins
+    ))
+    application.add_handler(CommandHandler("export_admins", export_admins, filters=private_filter))
     
     # Group command (verification group only)
     application.add_handler(CommandHandler("verify", verify, filters=group_filter))
-    
-    logger.info("Bot is starting polling...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    # Inline mode (enable it with BotFather's /setinline). Non-blocking so the
+    # debounce sleep never holds up other updates.
+    application.add_handler(InlineQueryHandler(inline_verify, block=False))
+    # Passive scanner for payment details pasted without /verify. It also
+    # sees edits, since a detail can be edited into a message after the fact.
+    application.add_handler(MessageHandler(
+        group_chats & (filters.TEXT | filters.CAPTION) & ~filters.COMMAND, scan_group_message
+    ))
+    instrument_handlers(application)
+    return application
+
+def main() -> None:
+    """Sets up and runs the Telegram bot."""
+    if BOT_MODE == "webhook" and (problem := webhook_settings_error()):
+        logger.critical(f"FATAL: {problem} Exiting.")
+        return
+    application = build_application()
+    allowed_updates = allowed_update_types(application)
+
+    if BOT_MODE == "webhook":
+        logger.info(f"Bot is starting webhook listener on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}...")
+        application.run_webhook(**webhook_options(allowed_updates))
+    else:
+        logger.info("Bot is starting polling...")
+        application.run_polling(allowed_updates=allowed_updates)
     logger.info("Bot has stopped.")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    if len(sys.argv) == 3 and sys.argv[1] == "--load-blocklist":
+        load_blocklist_file(sys.argv[2])
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""
+Parsing and validation of payment details: crypto addresses and UPI IDs.
+
+Everything that stores or looks up a crypto address or UPI ID first parses it
+here, so malformed input is rejected before it reaches the database or the
+caches, and every spelling of one detail ends up under the same key. The
+checksums (EIP-55 over Keccak-256, Base58Check, Bech32/Bech32m) are
+implemented here in pure Python, so the bot needs no extra dependency.
+"""
+import functools
+import hashlib
+import re
+import urllib.parse
+
+
+class InvalidPaymentDetail(ValueError):
+    """Raised for input that is not a well-formed payment detail. The message is shown to users as plain text."""
+
+
+class PaymentDetail:
+    """
+    A validated crypto address or UPI ID. `value` is its canonical written form
+    (EIP-55 checksum case for EVM, lowercase for bech32 and UPI, unchanged for
+    base58 and other chains) and `lookup_key` the key the database, the index
+    and the blocklist use (see canonical_payment_key). `network` is None for
+    addresses of other chains.
+    """
+    __slots__ = ("kind", "network", "lookup_key", "_value")
+
+    def __init__(self, kind: str, network: str, value: str):
+        self.kind = kind  # "crypto" or "upi", as in PaymentMethod.kind
+        self.network = network
+        self.lookup_key = canonical_payment_key(value)
+        self._value = value
+
+    @property
+    def value(self) -> str:
+        # The EIP-55 case costs a Keccak hash, so it is only worked out once the
+        # detail is shown or stored, not for every address the scanner checks.
+        if self.network == "EVM":
+            return eip55_address(self.lookup_key[2:])
+        return self._value
+
+def canonical_payment_key(value: str) -> str:
+    """
+    The lookup key of a payment value: whitespace removed, and lowercased only
+    for formats whose case carries no information (hex, bech32, UPI). Base58
+    and other chains' addresses are case-sensitive, so a variant differing
+    only in case is a different address and keeps its own key.
+    """
+    value = "".join(value.split())
+    return value.lower() if CASE_INSENSITIVE_SHAPE.fullmatch(value) else value
+
+def parse_payment_detail(raw: str) -> PaymentDetail:
+    """
+    Validates an EVM, Bitcoin or TRON address, a UPI ID or a upi:// link.
+    Whitespace is ignored. Input shaped like one of those formats must pass
+    its checksum and syntax checks; an address of any other chain (Litecoin,
+    Solana, TON, ...) is accepted as written, with no network, and found by
+    its exact spelling.
+    """
+    value = "".join(raw.split())
+    if not value:
+        raise InvalidPaymentDetail("Nothing to check.")
+    if value[:4].lower() == "upi:":
+        return parse_upi_id(upi_link_payee(value))
+    if "@" in value:
+        return parse_upi_id(value)
+    if EVM_SHAPE.fullmatch(value):
+        return PaymentDetail("crypto", "EVM", evm_address(value))
+    if value[:3].lower() == "bc1":
+        return PaymentDetail("crypto", "Bitcoin", segwit_address(value))
+    if BITCOIN_BASE58_SHAPE.fullmatch(value):
+        if base58check_version(value) not in BITCOIN_BASE58_VERSIONS:
+            raise InvalidPaymentDetail("This is not a Bitcoin mainnet address.")
+        return PaymentDetail("crypto", "Bitcoin", value)
+    if TRON_SHAPE.fullmatch(value):
+        if base58check_version(value) != TRON_ADDRESS_VERSION:
+            raise InvalidPaymentDetail("This is not a TRON address.")
+        return PaymentDetail("crypto", "TRON", value)
+    if OTHER_ADDRESS_PATTERN.fullmatch(value):
+        return PaymentDetail("crypto", None, value)
+    raise InvalidPaymentDetail("This is not a crypto address or a UPI ID.")
+
+# Input shaped like a known format, including one mistyped by a few characters
+# or still being typed, is held to that format's rules rather than accepted as
+# another chain's address. Longer strings (e.g. 0x + 64 hex digits on Sui or
+# Aptos, 44-character Solana addresses) are left to OTHER_ADDRESS_PATTERN.
+EVM_SHAPE = re.compile(r"0[xX][0-9A-Za-z]{0,50}")
+BITCOIN_BASE58_SHAPE = re.compile(r"[13][0-9A-Za-z]{0,40}")
+TRON_SHAPE = re.compile(r"T[0-9A-Za-z]{0,40}")
+# Any other chain: a single token of address characters, long enough not to be
+# a word, with both digits and letters so run-together text is not an address.
+OTHER_ADDRESS_PATTERN = re.compile(r"(?=[^0-9]*[0-9])(?=[^A-Za-z]*[A-Za-z])[0-9A-Za-z:_+/=\-]{20,128}")
+# Hex (0x...), bech32 (bc1...) and UPI IDs or links, whose letters may be written in either case.
+CASE_INSENSITIVE_SHAPE = re.compile(r"0[xX][0-9a-fA-F]+|[bB][cC]1[0-9A-Za-z]+|[uU][pP][iI]:.*|[^@]+@.*")
+
+
+# --- UPI ---
+UPI_ID_PATTERN = re.compile(r"[A-Za-z0-9._\-]{2,256}@[A-Za-z]{2,64}")
+
+def parse_upi_id(value: str) -> PaymentDetail:
+    if not UPI_ID_PATTERN.fullmatch(value):
+        raise InvalidPaymentDetail(
+            "A UPI ID looks like name@bank: letters, digits, '.', '-' or '_', then '@' and the bank's handle."
+        )
+    return PaymentDetail("upi", "UPI", value.lower())
+
+def upi_link_payee(link: str) -> str:
+    """The payee address (pa=) of a upi://pay?... link."""
+    payees = urllib.parse.parse_qs(urllib.parse.urlsplit(link).query).get("pa")
+    if not payees:
+        raise InvalidPaymentDetail("This UPI link has no payee address (pa=).")
+    return payees[0]
+
+
+# --- EVM (Ethereum, BSC, Polygon, ...) ---
+EVM_ADDRESS_PATTERN = re.compile(r"0[xX][0-9a-fA-F]{40}")
+
+def evm_address(value: str) -> str:
+    """The lowercase form of an EVM address. Mixed-case input must carry a valid EIP-55 checksum."""
+    if not EVM_ADDRESS_PATTERN.fullmatch(value):
+        raise InvalidPaymentDetail("An EVM address is 0x followed by 40 hex digits.")
+    digits = value[2:]
+    lowered = digits.lower()
+    if digits not in (lowered, digits.upper()) and digits != eip55_address(lowered)[2:]:
+        raise InvalidPaymentDetail(
+            "The upper/lower case letters do not match the address checksum (EIP-55), so a character was probably mistyped."
+        )
+    return "0x" + lowered
+
+@functools.lru_cache(maxsize=4096)
+def eip55_address(digits: str) -> str:
+    """'0x' + 40 lowercase hex digits, each letter uppercased where the Keccak-256 of the digits has a high nibble."""
+    digest = keccak256(digits.encode("ascii")).hex()
+    return "0x" + "".join(char.upper() if nibble in "89abcdef" else char for char, nibble in zip(digits, digest))
+
+# Keccak-256 as Ethereum uses it: the original padding, not hashlib's FIPS SHA3-256.
+KECCAK_RATE = 136  # Bytes absorbed per permutation for a 256-bit digest
+KECCAK_ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+KECCAK_ROTATIONS = (  # Rotation of lane x + 5y
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+)
+# Theta, rho and pi as one gather per output lane: lane x + 5y lands on
+# y + 5(2x + 3y). Each entry is (source lane, its column, rotation, 64 - rotation).
+KECCAK_GATHER = tuple(
+    (source, source % 5, KECCAK_ROTATIONS[source], 64 - KECCAK_ROTATIONS[source])
+    for _, source in sorted((y + 5 * ((2 * x + 3 * y) % 5), x + 5 * y) for x in range(5) for y in range(5))
+)
+KECCAK_CHI = tuple((i - i % 5 + (i + 1) % 5, i - i % 5 + (i + 2) % 5) for i in range(25))
+MASK64 = (1 << 64) - 1
+
+def keccak_f1600(lanes: list) -> list:
+    mask, gather, chi = MASK64, KECCAK_GATHER, KECCAK_CHI
+    for round_constant in KECCAK_ROUND_CONSTANTS:
+        c0, c1, c2, c3, c4 = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        d = (
+            c4 ^ (((c1 << 1) | (c1 >> 63)) & mask),
+            c0 ^ (((c2 << 1) | (c2 >> 63)) & mask),
+            c1 ^ (((c3 << 1) | (c3 >> 63)) & mask),
+            c2 ^ (((c4 << 1) | (c4 >> 63)) & mask),
+            c3 ^ (((c0 << 1) | (c0 >> 63)) & mask),
+        )
+        b = [
+            (((lane := lanes[source] ^ d[column]) << shift) | (lane >> back)) & mask
+            for source, column, shift, back in gather
+        ]
+        lanes = [lane ^ (~b[right] & b[far]) for lane, (right, far) in zip(b, chi)]
+        lanes[0] ^= round_constant
+    return lanes
+
+def keccak256(data: bytes) -> bytes:
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(bytes(-len(padded) % KECCAK_RATE))
+    padded[-1] |= 0x80
+    lanes = [0] * 25
+    for start in range(0, len(padded), KECCAK_RATE):
+        for i in range(KECCAK_RATE // 8):
+            lanes[i] ^= int.from_bytes(padded[start + 8 * i:start + 8 * i + 8], "little")
+        lanes = keccak_f1600(lanes)
+    return b"".join(lane.to_bytes(8, "little") for lane in lanes[:4])
+
+
+# --- Base58Check (Bitcoin P2PKH/P2SH, TRON) ---
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE58_DIGITS = {char: digit for digit, char in enumerate(BASE58_ALPHABET)}
+BITCOIN_BASE58_VERSIONS = (0x00, 0x05)  # P2PKH ("1..."), P2SH ("3...")
+TRON_ADDRESS_VERSION = 0x41  # "T..."
+
+def base58check_version(value: str) -> int:
+    """The version byte of a 25-byte Base58Check address (version, 20-byte hash, 4-byte checksum)."""
+    number = 0
+    for char in value:
+        digit = BASE58_DIGITS.get(char)
+        if digit is None:
+            raise InvalidPaymentDetail(f"'{char}' never appears in Bitcoin or TRON addresses (there is no 0, O, I or l).")
+        number = number * 58 + digit
+    zeros = len(value) - len(value.lstrip("1"))  # Each leading '1' encodes a zero byte
+    if zeros + (number.bit_length() + 7) // 8 != 25:
+        raise InvalidPaymentDetail("This address has the wrong length.")
+    payload = bytes(zeros) + number.to_bytes(25 - zeros, "big")
+    if hashlib.sha256(hashlib.sha256(payload[:21]).digest()).digest()[:4] != payload[21:]:
+        raise InvalidPaymentDetail("The address checksum does not match, so a character was probably mistyped.")
+    return payload[0]
+
+
+# --- Bech32 / Bech32m (Bitcoin SegWit "bc1...", BIP 173 and BIP 350) ---
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32_DIGITS = {char: digit for digit, char in enumerate(BECH32_CHARSET)}
+BECH32_CONSTANT = 1  # SegWit v0
+BECH32M_CONSTANT = 0x2BC830A3  # SegWit v1+ (Taproot)
+BECH32_GENERATOR = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+# XOR of the generators selected by each possible 5-bit top of the checksum.
+BECH32_FEEDBACK = tuple(
+    functools.reduce(lambda a, b: a ^ b, (g for i, g in enumerate(BECH32_GENERATOR) if top >> i & 1), 0)
+    for top in range(32)
+)
+
+def bech32_polymod(values) -> int:
+    checksum = 1
+    for value in values:
+        checksum = (checksum & 0x1FFFFFF) << 5 ^ value ^ BECH32_FEEDBACK[checksum >> 25]
+    return checksum
+
+def segwit_address(value: str) -> str:
+    """The lowercase form of a mainnet SegWit address, after checking its checksum and witness program."""
+    malformed = InvalidPaymentDetail("This bc1 address is malformed or a character was mistyped.")
+    if len(value) > 90 or value not in (value.lower(), value.upper()):
+        raise malformed
+    address = value.lower()
+    data = [BECH32_DIGITS.get(char, -1) for char in address[3:]]
+    if len(data) < 7 or -1 in data:
+        raise malformed
+    version = data[0]
+    constant = BECH32_CONSTANT if version == 0 else BECH32M_CONSTANT
+    if version > 16 or bech32_polymod([3, 3, 0, 2, 3] + data) != constant:  # [3, 3, 0, 2, 3]: "bc" expanded
+        raise malformed
+    # Regroup the 5-bit program into bytes; leftover bits must be fewer than 5 and zero.
+    accumulator = bits = 0
+    program = bytearray()
+    for digit in data[1:-6]:
+        accumulator = (accumulator << 5 | digit) & 0xFFF  # Never more than 12 pending bits
+        bits += 5
+        if bits >= 8:
+            bits -= 8
+            program.append(accumulator >> bits & 0xFF)
+    if bits >= 5 or accumulator & ((1 << bits) - 1):
+        raise malformed
+    if not 2 <= len(program) <= 40 or (version == 0 and len(program) not in (20, 32)):
+        raise malformed
+    return address
@@ -0,0 +1,186 @@
+"""
+Shared fixtures. The bot script is loaded once as a module (see
+benchmarks/botmodule.py); each test gets a fresh working directory, so a fresh
+SQLite database and blocklist file, and fresh copies of the module-level
+caches and queues.
+"""
+import asyncio
+import collections
+import contextlib
+import itertools
+import pathlib
+import sys
+import time
+import urllib.parse
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from telegram import Update
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "benchmarks"))
+from botmodule import load_bot  # noqa: E402
+
+BOT_USER = {"id": 1000000001, "is_bot": True, "first_name": "Verification Bot", "username": "test_verify_bot"}
+
+
+class FakeBotAPI:
+    """
+    Stands in for api.telegram.org behind an httpx.MockTransport. Records every
+    call with its parameters and every sent message, and how many calls were
+    in flight at once. Each call waits `latency` seconds first.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = []  # (method, params)
+        self.messages = []  # (chat_id, text) of sendMessage calls
+        self.documents = []  # Raw multipart bodies of sendDocument calls
+        self.files = {}  # file_id -> bytes, served by getFile and the file download URL
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.message_id = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.startswith("/file/"):
+            return httpx.Response(200, content=self.files[request.url.path.rsplit("/", 1)[-1]])
+        method = request.url.path.rsplit("/", 1)[-1]
+        params = {}
+        if request.headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+            params = dict(urllib.parse.parse_qsl(request.content.decode()))
+        self.calls.append((method, params))
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "getFile":
+            file_id = params["file_id"]
+            result = {"file_id": file_id, "file_unique_id": file_id, "file_size": len(self.files[file_id]),
+                      "file_path": f"documents/{file_id}"}
+        elif method in ("sendMessage", "editMessageText", "sendDocument"):
+            chat_id = int(params.get("chat_id", 1))
+            if method == "sendMessage":
+                self.messages.append((chat_id, params.get("text", "")))
+            elif method == "sendDocument":
+                self.documents.append(request.content)
+            self.message_id += 1
+            result = {
+                "message_id": self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        else:
+            result = True
+        return httpx.Response(200, json={"ok": True, "result": result})
+
+    def methods(self) -> collections.Counter:
+        return collections.Counter(method for method, _ in self.calls)
+
+    def texts(self, chat_id: int = None) -> list:
+        return [text for chat, text in self.messages if chat_id is None or chat == chat_id]
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    module = load_bot()
+    monkeypatch.chdir(tmp_path)  # For the blocklist file
+    # SQLAlchemy made the database path absolute when the module created its engine.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'payment_verification.db'}")
+    event.listen(engine.sync_engine, "before_cursor_execute", module._query_started)
+    event.listen(engine.sync_engine, "after_cursor_execute", module._query_finished)
+    monkeypatch.setattr(module, "engine", engine)
+    monkeypatch.setattr(module, "Session", async_sessionmaker(engine, expire_on_commit=False))
+    monkeypatch.setattr(module, "groups", module.GroupRegistry(module.load_group_configs()))
+    monkeypatch.setattr(module, "outbox", module.OutboundScheduler())
+    monkeypatch.setattr(module, "audit_log", module.AuditLog())
+    monkeypatch.setattr(module, "scam_blocklist", module.ScamBlocklist(module.BLOCKLIST_PATH))
+    monkeypatch.setattr(module, "inline_cache", module.InlineResultCache())
+    return module
+
+
+@pytest.fixture
+def api():
+    return FakeBotAPI()
+
+
+@pytest.fixture
+def run(bot):
+    """Runs a coroutine in a fresh event loop, then closes the pooled DB connections bound to it."""
+    def run(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await bot.engine.dispose()
+        return asyncio.run(main())
+    return run
+
+
+@pytest.fixture
+def start_app(bot, api):
+    """
+    Async context manager yielding a started Application, built like main()
+    does but talking to `api`. post_init is not run, so the outbound queue is
+    off and replies go straight to the (fake) Bot API from the handler.
+    """
+    @contextlib.asynccontextmanager
+    async def start_app():
+        request = bot.InstrumentedRequest(httpx_kwargs={"transport": httpx.MockTransport(api)})
+        app = bot.build_application(request)
+        await app.initialize()
+        await bot.init_db()
+        await app.start()
+        try:
+            yield app
+        finally:
+            await app.stop()
+            await app.shutdown()
+    return start_app
+
+
+@pytest.fixture
+def make_update(bot):
+    """Builds update JSON for a message from `user_id` in `chat_id` (negative ids are groups)."""
+    update_ids = itertools.count(1)
+
+    def make_update(chat_id: int, user_id: int, text: str = None, username: str = None, **message) -> dict:
+        update_id = next(update_ids)
+        if chat_id < 0:
+            chat = {"id": chat_id, "type": "supergroup", "title": "Verification"}
+        else:
+            chat = {"id": chat_id, "type": "private", "first_name": f"User {user_id}"}
+        message = {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": chat,
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}",
+                     "username": username or f"user{user_id}"},
+            **message,
+        }
+        if text is not None:
+            message["text"] = text
+        body = message.get("text") or message.get("caption") or ""
+        if body.startswith("/"):
+            entities = "entities" if "text" in message else "caption_entities"
+            message[entities] = [{"type": "bot_command", "offset": 0, "length": len(body.split()[0])}]
+        return {"update_id": update_id, "message": message}
+    return make_update
+
+
+@pytest.fixture
+def feed():
+    """Puts update JSON on the Application's queue and waits until every update has been handled."""
+    async def feed(app, *updates):
+        for data in updates:
+            await app.update_queue.put(Update.de_json(data, app.bot))
+        await asyncio.wait_for(app.update_queue.join(), timeout=30)
+    return feed
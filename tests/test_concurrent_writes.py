@@ -0,0 +1,132 @@
+"""
+Mixed concurrent updates through ChatOrderedUpdateProcessor: several super
+admins editing the roster at once, racing for the same rows, while the group
+keeps verifying. Afterwards the in-memory caches must match the database.
+"""
+import logging
+import random
+
+from sqlalchemy import select
+
+SUPER_ADMINS = 4
+WORKERS_EACH = 8
+VERIFIERS = 40
+
+
+def super_admin(i: int):
+    return 500 + i, f"super_{i}"  # (user_id / private chat_id, username)
+
+
+def worker_commands(i: int) -> list:
+    """One super admin's writes, on usernames no other super admin touches."""
+    commands = []
+    for j in range(WORKERS_EACH):
+        name = f"worker{i}_{j}"
+        commands += [f"/add_admin @{name}", f"/setadmin_upi @{name} {name}@ybl", f"/setadmin_upi @{name} {name}.alt@ybl"]
+        if j % 3 == 0:
+            commands.append(f"/promote @{name}")
+        if j % 4 == 3:
+            commands.append(f"/removeadmin_payment {name}@ybl")
+        if j % 5 == 4:
+            commands.append(f"/remove_admin @{name}")
+        if j == WORKERS_EACH // 2:
+            commands.append("/admins")
+    # Every super admin races for the same two rows.
+    commands += ["/add_admin @contested_admin", "/setadmin_upi @shared_admin contested@ybl"]
+    return commands
+
+
+def expected_workers() -> dict:
+    """username -> (is_super_admin, payment values) after every worker_commands() ran."""
+    expected = {}
+    for i in range(SUPER_ADMINS):
+        for j in range(WORKERS_EACH):
+            if j % 5 == 4:
+                continue
+            name = f"worker{i}_{j}"
+            values = {f"{name}.alt@ybl"} | (set() if j % 4 == 3 else {f"{name}@ybl"})
+            expected[name] = (j % 3 == 0, values)
+    return expected
+
+
+def index_state(index) -> tuple:
+    admins = {username: (entry.is_super_admin, frozenset(entry.keys)) for username, entry in index._by_username.items()}
+    owners = {key: entry.username for key, entry in index._by_value.items()}
+    lookalikes = {
+        bucket: frozenset(keys)
+        for buckets in (index._lookalikes._segments, index._lookalikes._affixes)
+        for bucket, keys in buckets.items() if keys
+    }
+    return admins, owners, lookalikes
+
+
+def principal_state(principals) -> tuple:
+    linked = {user_id: (p.username, p.is_super_admin) for user_id, p in principals._by_user_id.items()}
+    return linked, dict(principals._user_id_by_username), set(principals.pending_usernames)
+
+
+def test_mixed_concurrent_updates_keep_caches_coherent(
+        bot, api, run, start_app, make_update, feed, monkeypatch, caplog):
+    monkeypatch.setattr(bot, "CONCURRENT_UPDATES", 16)
+    owner, group_id = bot.OWNER_ID, bot.VERIFICATION_GROUP_ID
+    rng = random.Random(7)
+
+    async def scenario():
+        async with start_app() as app:
+            group = await bot.groups.get(group_id)
+            for i in range(SUPER_ADMINS):
+                user_id, username = super_admin(i)
+                await feed(app, make_update(owner, owner, f"/add_admin @{username}"))
+                await feed(app, make_update(owner, owner, f"/promote @{username}"))
+                await feed(app, make_update(user_id, user_id, "/start", username=username))
+            await feed(app, make_update(owner, owner, "/add_admin @shared_admin"))
+
+            # Interleave every chat's updates; each chat keeps its own order.
+            streams = [
+                [make_update(super_admin(i)[0], super_admin(i)[0], text, username=super_admin(i)[1])
+                 for text in worker_commands(i)]
+                for i in range(SUPER_ADMINS)
+            ]
+            streams.append([
+                make_update(group_id, 9_000 + n, f"/verify worker{n % SUPER_ADMINS}_{n % WORKERS_EACH}@ybl")
+                for n in range(VERIFIERS)
+            ])
+            burst = []
+            while any(streams):
+                stream = rng.choice([s for s in streams if s])
+                burst.append(stream.pop(0))
+            api.latency = 0.005
+            with caplog.at_level(logging.ERROR):
+                await feed(app, *burst)
+
+            fresh = bot.VerificationGroup(group.config)
+            await fresh.refresh()
+            async with bot.Session() as session:
+                rows = (await session.execute(
+                    select(bot.Admin.username, bot.Admin.is_super_admin, bot.PaymentMethod.value)
+                    .outerjoin(bot.PaymentMethod).where(bot.Admin.group_id == group_id)
+                )).all()
+            pages = [group.roster.page(n) for n in range(group.roster.page_count)]
+            fresh_pages = [fresh.roster.page(n) for n in range(fresh.roster.page_count)]
+            return (index_state(group.index), index_state(fresh.index), principal_state(group.principals),
+                    principal_state(fresh.principals), pages, fresh_pages, rows)
+
+    index, fresh_index, principals, fresh_principals, pages, fresh_pages, rows = run(scenario())
+    assert not caplog.records
+    assert api.peak_in_flight > 1  # Updates really overlapped
+    assert index == fresh_index
+    assert principals == fresh_principals
+    assert pages == fresh_pages
+
+    stored = {}
+    for username, is_super_admin, value in rows:
+        stored.setdefault(username, (bool(is_super_admin), set()))[1].update({value} if value else set())
+    workers = {username: state for username, state in stored.items() if username.startswith("worker")}
+    assert workers == expected_workers()
+    assert stored["shared_admin"] == (False, {"contested@ybl"})
+    assert "contested_admin" in stored
+    replies = [text for user_id, _ in map(super_admin, range(SUPER_ADMINS)) for text in api.texts(user_id)]
+    assert sum("Admin Added" in text and "contested_admin" in text for text in replies) == 1
+    assert sum("Already Exists" in text and "contested_admin" in text for text in replies) == SUPER_ADMINS - 1
+    assert sum("Already Registered" in text for text in replies) == SUPER_ADMINS - 1
+    assert len(api.texts(group_id)) == VERIFIERS
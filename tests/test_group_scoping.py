@@ -0,0 +1,122 @@
+"""Data of one verification group must not show up in another's reports, and the shared blocklist is the owner's."""
+import sqlite3
+
+from sqlalchemy import event, select
+
+ALPHA, BETA = -1001111111111, -1002222222222
+
+
+def two_groups(bot, monkeypatch):
+    monkeypatch.setattr(bot, "groups", bot.GroupRegistry([
+        bot.GroupConfig(ALPHA, "alpha", "Alpha", ""),
+        bot.GroupConfig(BETA, "beta", "Beta", ""),
+    ]))
+
+
+def test_verify_report_counts_only_the_selected_group(bot, api, run, start_app, make_update, feed, monkeypatch):
+    two_groups(bot, monkeypatch)
+    owner = bot.OWNER_ID
+
+    async def scenario():
+        async with start_app() as app:
+            await feed(app, *(make_update(ALPHA, 10_000 + n, "/verify alpha.stranger@ybl") for n in range(3)))
+            await feed(app, make_update(BETA, 20_000, "/verify beta.stranger@ybl"))
+            for name in ("beta", "alpha"):
+                await feed(app, make_update(owner, owner, f"/use_group {name}"))
+                await feed(app, make_update(owner, owner, "/verify_report"))
+
+    run(scenario())
+    beta_report, alpha_report = api.texts(owner)[1], api.texts(owner)[3]
+    assert "Beta" in beta_report and "Lookups: 1 " in beta_report
+    assert "beta.stranger@ybl" in beta_report and "alpha.stranger" not in beta_report
+    assert "Alpha" in alpha_report and "Lookups: 3 " in alpha_report
+    assert "alpha.stranger@ybl</code> — 3×" in alpha_report and "beta.stranger" not in alpha_report
+
+
+def test_blocklist_commands_are_owner_only(bot, api, run, start_app, make_update, feed, monkeypatch):
+    two_groups(bot, monkeypatch)
+    owner, bob = bot.OWNER_ID, 777
+
+    async def scenario():
+        async with start_app() as app:
+            for text in ("/use_group beta", "/add_admin @bob_admin", "/promote @bob_admin"):
+                await feed(app, make_update(owner, owner, text))
+            await feed(app, make_update(bob, bob, "/start", username="bob_admin"))
+            await feed(app, make_update(bob, bob, "/report_scam bob.scam@ybl", username="bob_admin"))
+            await feed(app, make_update(bob, bob, "/blocklist_load", username="bob_admin"))
+            await feed(app, make_update(owner, owner, "/report_scam owner.scam@ybl"))
+            async with bot.Session() as session:
+                return list(await session.scalars(select(bot.ScamReport.value)))
+
+    reported = run(scenario())
+    assert reported == ["owner.scam@ybl"]
+    denied = api.texts(bob)[-2:]
+    assert all("for the bot owner only" in text for text in denied)
+    assert "Scam Reported" in api.texts(owner)[-1]
+
+
+def test_migration_scopes_existing_tallies(bot, run):
+    # verification_log and verification_tallies as they were before group_id.
+    with sqlite3.connect(bot.engine.url.database) as db:
+        db.executescript(f"""
+            CREATE TABLE verification_log (
+                id INTEGER PRIMARY KEY, checked_at DATETIME NOT NULL, source VARCHAR NOT NULL,
+                chat_id INTEGER, user_id INTEGER, value VARCHAR NOT NULL, lookup_key VARCHAR NOT NULL,
+                status VARCHAR NOT NULL);
+            CREATE TABLE verification_tallies (
+                hour DATETIME NOT NULL, lookup_key VARCHAR NOT NULL, status VARCHAR NOT NULL,
+                value VARCHAR NOT NULL, checks INTEGER NOT NULL, PRIMARY KEY (hour, lookup_key, status));
+            INSERT INTO verification_log (checked_at, source, chat_id, user_id, value, lookup_key, status) VALUES
+                ('2026-10-18 09:05:00.000000', 'verify', {ALPHA}, 1, 'x@ybl', 'x@ybl', 'unverified'),
+                ('2026-10-18 09:40:00.000000', 'verify', {ALPHA}, 2, 'X@ybl', 'x@ybl', 'unverified'),
+                ('2026-10-18 09:50:00.000000', 'verify', {BETA}, 3, 'x@ybl', 'x@ybl', 'unverified'),
+                ('2026-10-18 10:10:00.000000', 'inline', NULL, 4, 'x@ybl', 'x@ybl', 'unverified');
+            INSERT INTO verification_tallies VALUES ('2026-10-18 09:00:00.000000', 'x@ybl', 'unverified', 'x@ybl', 3);
+        """)
+
+    async def migrate():
+        await bot.init_db()
+        async with bot.Session() as session:
+            return (await session.execute(
+                select(bot.VerificationTally.group_id, bot.VerificationTally.hour,
+                       bot.VerificationTally.value, bot.VerificationTally.checks)
+                .order_by(bot.VerificationTally.group_id)
+            )).all()
+
+    tallies = run(migrate())
+    assert [(group_id, hour.hour, value, checks) for group_id, hour, value, checks in tallies] == [
+        (BETA, 9, "x@ybl", 1),
+        (ALPHA, 9, "X@ybl", 2),  # The most recent spelling
+    ]
+
+
+def test_start_only_queries_for_pending_usernames(bot, api, run, start_app, make_update, feed, monkeypatch):
+    two_groups(bot, monkeypatch)
+    owner, carol = bot.OWNER_ID, 888
+    linking_queries = []
+
+    def count_linking_query(conn, cursor, statement, parameters, context, executemany):
+        if "WHERE admins.username = ? AND admins.user_id IS NULL" in statement:
+            linking_queries.append(parameters)
+
+    async def scenario():
+        event.listen(bot.engine.sync_engine, "before_cursor_execute", count_linking_query)
+        async with start_app() as app:
+            for text in ("/use_group alpha", "/add_admin @carol_admin", "/use_group beta", "/add_admin @carol_admin",
+                         "/add_admin @dave_admin", "/remove_admin @carol_admin"):
+                await feed(app, make_update(owner, owner, text))
+            await feed(app, *(make_update(9_000 + n, 9_000 + n, "/start") for n in range(5)))
+            strangers = len(linking_queries)
+            await feed(app, make_update(carol, carol, "/start", username="carol_admin"))
+            await feed(app, make_update(carol, carol, "/start", username="carol_admin"))
+            async with bot.Session() as session:
+                linked = set((await session.execute(
+                    select(bot.Admin.group_id, bot.Admin.username).where(bot.Admin.user_id == carol)
+                )).all())
+            return strangers, linked
+
+    strangers, linked = run(scenario())
+    assert strangers == 0
+    assert linking_queries == [("carol_admin",)]  # Once: after linking she is no longer pending
+    assert linked == {(ALPHA, "carol_admin")}
+    assert "Admin Account Activated" in api.texts(carol)[0]
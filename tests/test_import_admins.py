@@ -0,0 +1,112 @@
+"""/import_admins end to end: a large roster in one transaction, all or nothing, and only valid usernames."""
+import html
+import time
+
+from sqlalchemy import func, select, text
+
+IMPORT_ROWS = 10_000
+IMPORT_TIME_LIMIT = 10.0  # Seconds; about 1 s here
+
+
+def roster_csv(rows) -> bytes:
+    lines = ["username,role,crypto,upi"]
+    lines += [f"{username},{role},{crypto},{upi}" for username, role, crypto, upi in rows]
+    return "\n".join(lines).encode()
+
+
+def generated_rows(count: int):
+    # One UPI ID each, every hundredth a super admin; the first also has a TRON address.
+    return [
+        (f"admin_{n:05d}", "super_admin" if n % 100 == 0 else "admin",
+         "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t" if n == 0 else "", f"admin{n}@ybl")
+        for n in range(count)
+    ]
+
+
+def import_update(make_update, owner: int, file_id: str, filename: str = "admins.csv"):
+    document = {"file_id": file_id, "file_unique_id": file_id, "file_name": filename}
+    return make_update(owner, owner, caption="/import_admins", document=document)
+
+
+async def table_counts(bot):
+    async with bot.Session() as session:
+        admins = await session.scalar(select(func.count()).select_from(bot.Admin))
+        methods = await session.scalar(select(func.count()).select_from(bot.PaymentMethod))
+    return admins, methods
+
+
+def test_large_import_is_fast_and_indexed(bot, api, run, start_app, make_update, feed):
+    owner, group_id = bot.OWNER_ID, bot.VERIFICATION_GROUP_ID
+    api.files["roster"] = roster_csv(generated_rows(IMPORT_ROWS))
+
+    async def scenario():
+        async with start_app() as app:
+            await bot.groups.get(group_id)  # Creates the owner's row outside the timing
+            started = time.perf_counter()
+            await feed(app, import_update(make_update, owner, "roster"))
+            elapsed = time.perf_counter() - started
+            await feed(app, make_update(group_id, 10_001, f"/verify admin{IMPORT_ROWS - 1}@ybl"))
+            return elapsed, await table_counts(bot)
+
+    elapsed, (admins, methods) = run(scenario())
+    assert "Import Complete" in api.texts(owner)[-1]
+    assert f"Rows read: {IMPORT_ROWS}" in api.texts(owner)[-1]
+    assert admins == IMPORT_ROWS + 1  # And the owner
+    assert methods == IMPORT_ROWS + 1
+    assert elapsed < IMPORT_TIME_LIMIT
+    assert f"@admin_{IMPORT_ROWS - 1:05d}" in api.texts(group_id)[-1]
+
+
+def test_rejected_or_failed_import_changes_nothing(bot, api, run, start_app, make_update, feed):
+    owner = bot.OWNER_ID
+    api.files["first"] = roster_csv([("existing_admin", "admin", "", "taken@ybl")])
+    # Row 3 claims a UPI ID that already belongs to existing_admin.
+    api.files["conflict"] = roster_csv(generated_rows(2) + [("late_admin", "admin", "", "taken@ybl")])
+    api.files["failing"] = roster_csv(generated_rows(5) + [("boom_admin", "admin", "", "boom@ybl")])
+
+    async def scenario():
+        async with start_app() as app:
+            await feed(app, import_update(make_update, owner, "first"))
+            before = await table_counts(bot)
+            await feed(app, import_update(make_update, owner, "conflict"))
+            after_conflict = await table_counts(bot)
+            # The database refuses the last payment insert, after the admins went in.
+            async with bot.engine.begin() as conn:
+                await conn.execute(text(
+                    "CREATE TRIGGER refuse_boom BEFORE INSERT ON payment_methods WHEN NEW.value = 'boom@ybl' "
+                    "BEGIN SELECT RAISE(ABORT, 'disk I/O error'); END"
+                ))
+            await feed(app, import_update(make_update, owner, "failing"))
+            return before, after_conflict, await table_counts(bot)
+
+    before, after_conflict, after_failure = run(scenario())
+    conflict_reply, failure_reply = api.texts(owner)[-2:]
+    assert "Import Rejected" in conflict_reply and "already belongs to @existing_admin" in conflict_reply
+    assert "Import failed" in failure_reply and "Nothing was changed" in failure_reply
+    assert before == after_conflict == after_failure == (2, 1)  # The owner, existing_admin and their UPI ID
+
+
+def test_usernames_are_validated_and_escaped(bot, api, run, start_app, make_update, feed):
+    owner, group_id = bot.OWNER_ID, bot.VERIFICATION_GROUP_ID
+    api.files["bad"] = roster_csv([("<b>boss</b>", "admin", "", ""), ("abc", "admin", "", ""), ("good_name", "admin", "", "")])
+
+    async def scenario():
+        async with start_app() as app:
+            await feed(app, import_update(make_update, owner, "bad"))
+            await feed(app, make_update(owner, owner, "/add_admin @<i>x</i>_admin"))
+            # A name stored before validation existed.
+            async with bot.Session() as session:
+                session.add(bot.Admin(group_id=group_id, username="old<name>"))
+                await session.commit()
+            await (await bot.groups.get(group_id)).refresh()
+            await feed(app, make_update(owner, owner, "/admins"))
+            return await table_counts(bot)
+
+    admins, _ = run(scenario())
+    import_reply, add_reply, roster = api.texts(owner)[-3:]
+    assert "Import Rejected" in import_reply
+    assert html.escape("Row 1: '<b>boss</b>' is not a Telegram username") in import_reply
+    assert html.escape("Row 2: 'abc' is not a Telegram username") in import_reply
+    assert "Invalid Username" in add_reply
+    assert admins == 2  # The owner and the legacy row
+    assert "@old&lt;name&gt;" in roster and "old<name>" not in roster
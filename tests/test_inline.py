@@ -0,0 +1,50 @@
+"""Inline verification: cached answers never outlive the admin data they were built from."""
+import asyncio
+import itertools
+import json
+
+USER = 4242
+
+
+def test_writes_invalidate_cached_answers(bot, api, run, start_app, make_update, feed, monkeypatch):
+    monkeypatch.setattr(bot, "INLINE_DEBOUNCE", 0)
+    owner = bot.OWNER_ID
+    query_ids = itertools.count(1)
+
+    async def ask(app, text: str) -> str:
+        """Sends an inline query and returns the title of the answer's first result."""
+        answered = api.methods()["answerInlineQuery"]
+        query_id = next(query_ids)
+        await feed(app, {"update_id": 100_000 + query_id, "inline_query": {
+            "id": str(query_id), "query": text, "offset": "",
+            "from": {"id": USER, "is_bot": False, "first_name": "Asker"},
+        }})
+        while api.methods()["answerInlineQuery"] == answered:  # The handler does not block the queue
+            await asyncio.sleep(0.01)
+        params = [params for method, params in api.calls if method == "answerInlineQuery"][-1]
+        return json.loads(params["results"])[0]["title"]
+
+    async def scenario():
+        async with start_app() as app:
+            titles = []
+            for text in ("/add_admin @alice_admin", "/setadmin_upi @alice_admin alice.pay@ybl",
+                         "/setadmin_upi @alice_admin alice.alt@ybl"):
+                await feed(app, make_update(owner, owner, text))
+            titles.append(await ask(app, "alice.pay@ybl"))
+            await feed(app, make_update(owner, owner, "/removeadmin_payment alice.pay@ybl"))
+            titles.append(await ask(app, "alice.pay@ybl"))  # A removed detail
+            titles.append(await ask(app, "alice.alt@ybl"))
+            await feed(app, make_update(owner, owner, "/remove_admin @alice_admin"))
+            titles.append(await ask(app, "alice.alt@ybl"))  # A removed admin's detail
+            await feed(app, make_update(owner, owner, "/report_scam alice.alt@ybl"))
+            titles.append(await ask(app, "alice.alt@ybl"))
+            return titles
+
+    titles = run(scenario())
+    assert titles == [
+        "✅ Verified — @alice_admin",
+        "🚨 Not verified — do not pay",
+        "✅ Verified — @alice_admin",
+        "🚨 Not verified — do not pay",
+        "⛔ KNOWN SCAM — do not pay",
+    ]
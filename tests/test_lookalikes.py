@@ -0,0 +1,23 @@
+"""/verify lookalike warnings: near misses and vanity copies of addresses, but not unrelated UPI handles."""
+import pytest
+
+TRON = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+
+
+@pytest.mark.parametrize("registered, query", [
+    ("rahul.sharma.official@okaxis", "rahul.verma.payments@okaxis"),
+    ("9876543210.shop@paytm", "9876500001.mart@paytm"),
+])
+def test_unrelated_upi_ids_are_not_lookalikes(bot, registered, query):
+    index = bot.VerificationIndex()
+    index.add_payment("alice_admin", False, registered)
+    assert index.similar(query) == []
+
+
+def test_vanity_and_near_miss_addresses_are_lookalikes(bot):
+    index = bot.VerificationIndex()
+    index.add_payment("alice_admin", False, TRON)
+    index.add_payment("bob_admin", False, "alice.shop@ybl")
+    vanity = TRON[:5] + "x" * (len(TRON) - 10) + TRON[-5:]
+    assert [(entry.username, distance) for entry, distance in index.similar(vanity)] == [("alice_admin", None)]
+    assert [(entry.username, distance) for entry, distance in index.similar("alice.shap@ybl")] == [("bob_admin", 1)]
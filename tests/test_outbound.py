@@ -0,0 +1,121 @@
+"""OutboundScheduler against a fake bot: per-chat order, RetryAfter, merging only under rate limits."""
+import asyncio
+import datetime
+import time
+
+from telegram.error import RetryAfter
+
+GROUP, ALICE, BOB = -100123, 501, 502
+
+
+class FakeBot:
+    """Records (seconds since start, chat_id, text or filename); raises RetryAfter for chats in `flood`."""
+
+    def __init__(self, latency: float = 0.0, flood: dict = None):
+        self.latency = latency
+        self.flood = dict(flood or {})  # chat_id -> seconds, for its next send only
+        self.started = time.monotonic()
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(self.latency)
+        if chat_id in self.flood:
+            raise RetryAfter(datetime.timedelta(seconds=self.flood.pop(chat_id)))
+        self.sent.append((time.monotonic() - self.started, chat_id, text))
+        return text
+
+    async def send_document(self, chat_id, document, filename, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.sent.append((time.monotonic() - self.started, chat_id, filename))
+        return filename
+
+    def texts(self, chat_id) -> list:
+        return [text for _, chat, text in self.sent if chat == chat_id]
+
+
+def send_all(bot, fake, messages) -> list:
+    """Queues (chat_id, text) pairs in one go and returns what each future resolved to."""
+    async def scenario():
+        outbox = bot.OutboundScheduler()
+        outbox.start(fake)
+        futures = [outbox.enqueue(chat_id, text) for chat_id, text in messages]
+        results = await asyncio.gather(*futures)
+        await outbox.stop()
+        return results
+    return asyncio.run(scenario())
+
+
+def test_replies_are_separate_while_the_chat_has_tokens(bot, monkeypatch):
+    monkeypatch.setattr(bot, "GROUP_CHAT_SEND_RATE", 10)
+    fake = FakeBot()
+    send_all(bot, fake, [(GROUP, f"answer {n}") for n in range(bot.CHAT_SEND_BURST)])
+    assert fake.texts(GROUP) == [f"answer {n}" for n in range(bot.CHAT_SEND_BURST)]
+    assert all(at < 0.05 for at, _, _ in fake.sent)  # A full bucket: nothing waited
+
+
+def test_backlog_is_merged_once_the_chat_is_rate_limited(bot, monkeypatch):
+    monkeypatch.setattr(bot, "GROUP_CHAT_SEND_RATE", 10)
+    fake = FakeBot()
+    burst = bot.CHAT_SEND_BURST
+    results = send_all(bot, fake, [(GROUP, f"answer {n}") for n in range(burst + 4)])
+    sent = fake.texts(GROUP)
+    assert sent[:burst] == [f"answer {n}" for n in range(burst)]
+    assert sent[burst:] == ["\n\n— — — — —\n\n".join(f"answer {n}" for n in range(burst, burst + 4))]
+    assert results[burst:] == [sent[burst]] * 4  # Every merged reply resolves to the shared message
+
+
+def test_retry_after_pauses_only_that_chat(bot):
+    fake = FakeBot(flood={ALICE: 0.3})
+    send_all(bot, fake, [(ALICE, "alice 1"), (BOB, "bob 1"), (ALICE, "alice 2"), (BOB, "bob 2")])
+    assert fake.texts(BOB) == ["bob 1", "bob 2"]
+    # Alice's first reply is retried before her second; both waited, so they went out together.
+    assert fake.texts(ALICE) == ["alice 1\n\n— — — — —\n\nalice 2"]
+    alice_at = [at for at, chat, _ in fake.sent if chat == ALICE]
+    bob_at = [at for at, chat, _ in fake.sent if chat == BOB]
+    assert alice_at[0] >= 0.3 and max(bob_at) < 0.3
+
+
+def test_each_chat_keeps_its_order(bot, monkeypatch):
+    monkeypatch.setattr(bot, "PRIVATE_CHAT_SEND_RATE", 1000)
+    monkeypatch.setattr(bot, "CHAT_SEND_BURST", 100)
+    fake = FakeBot(latency=0.002)
+    chats = [600 + n for n in range(4)]
+    send_all(bot, fake, [(chat_id, f"{chat_id}:{n}") for n in range(10) for chat_id in chats])
+    for chat_id in chats:
+        assert fake.texts(chat_id) == [f"{chat_id}:{n}" for n in range(10)]
+    assert {chat for _, chat, _ in fake.sent[:4]} == set(chats)  # Chats are interleaved, not drained one by one
+
+
+def test_identical_replies_are_sent_once(bot):
+    fake = FakeBot()
+
+    async def scenario():
+        outbox = bot.OutboundScheduler()
+        outbox.start(fake)
+        first = outbox.enqueue(GROUP, "NOT FOUND", coalesce_key="verify:x@ybl")
+        second = outbox.enqueue(GROUP, "NOT FOUND", coalesce_key="verify:x@ybl")
+        results = await asyncio.gather(first, second)
+        await outbox.stop()
+        return first is second, results, outbox.coalesced
+
+    same_future, results, coalesced = asyncio.run(scenario())
+    assert same_future and results == ["NOT FOUND", "NOT FOUND"] and coalesced == 1
+    assert fake.texts(GROUP) == ["NOT FOUND"]
+
+
+def test_export_goes_through_the_queue(bot, api, run, start_app, make_update, feed):
+    owner = bot.OWNER_ID
+
+    async def scenario():
+        async with start_app() as app:
+            bot.outbox.start(app.bot)
+            try:
+                await feed(app, make_update(owner, owner, "/add_admin @alice_admin"))
+                await feed(app, make_update(owner, owner, "/export_admins"))
+            finally:
+                await bot.outbox.stop()
+            return bot.outbox.sent
+
+    sent = run(scenario())
+    assert sent == 2  # The confirmation and the file
+    assert len(api.documents) == 1 and b"alice_admin" in api.documents[0]
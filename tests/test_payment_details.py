@@ -0,0 +1,67 @@
+"""parse_payment_detail: checked formats must validate, other chains' addresses are looked up exactly as written."""
+import pytest
+
+from payment_details import InvalidPaymentDetail, parse_payment_detail
+
+SOLANA = "7EcDhSYGxXyscszYEp35KHN8vvw3svAuLKTzXwCFLtV"
+
+
+@pytest.mark.parametrize("value, network, canonical", [
+    ("0x5aaeb6053f3e94c9b9a09f33669435e7ef1beaed", "EVM", "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"),
+    ("BC1QW508D6QEJXTDG4Y5R3ZARVARY0C5XW7KV8F3T4", "Bitcoin", "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4"),
+    ("1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", "Bitcoin", "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"),
+    ("TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t", "TRON", "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"),
+    ("upi://pay?pa=Shop.Name@ybl&pn=Shop", "UPI", "shop.name@ybl"),
+    ("LQL9pVH1LsMfKwt3E1NjM4QGkS2Ba4tdC9", None, "LQL9pVH1LsMfKwt3E1NjM4QGkS2Ba4tdC9"),
+    (f" {SOLANA[:20]} {SOLANA[20:]}", None, SOLANA),
+    ("EQDtFpEwcFAEcRe5mLVh2N6C0x-_hJEM7W61_JLnSF74p4q2", None, "EQDtFpEwcFAEcRe5mLVh2N6C0x-_hJEM7W61_JLnSF74p4q2"),
+    ("0x" + "5d47c8e2" * 8, None, "0x" + "5d47c8e2" * 8),  # Sui / Aptos
+])
+def test_accepted(value, network, canonical):
+    detail = parse_payment_detail(value)
+    assert (detail.kind, detail.network, detail.value) == ("upi" if network == "UPI" else "crypto", network, canonical)
+    # Only hex, bech32 and UPI are case-insensitive; a base58 key keeps its case.
+    assert detail.lookup_key == (canonical.lower() if network in ("EVM", "UPI") or canonical[:2] in ("0x", "bc") else canonical)
+
+
+@pytest.mark.parametrize("value", [
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeD",  # EIP-55 case flipped
+    "0x5aaeb6053f3e94c9b9a09f33669435e7ef1beae",  # One digit short
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb",  # Base58Check checksum
+    "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6tX",  # One character too many
+    "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t5",  # Bech32 checksum
+    "name@bank1",
+    "hello",
+    "thisisjustalongenglishwordsentence",  # Letters only: text, not another chain's address
+    "12345678901234567890123",  # Digits only
+    "",
+])
+def test_rejected(value):
+    with pytest.raises(InvalidPaymentDetail):
+        parse_payment_detail(value)
+
+
+def test_case_sensitive_keys():
+    assert parse_payment_detail(SOLANA).lookup_key != parse_payment_detail(SOLANA.swapcase()).lookup_key
+    assert parse_payment_detail("So11111111111111111111111111111111111111112").lookup_key \
+        != parse_payment_detail("SO11111111111111111111111111111111111111112").lookup_key
+    evm = "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"
+    assert parse_payment_detail(evm).lookup_key == parse_payment_detail(evm.upper().replace("0X", "0x")).lookup_key
+
+
+def test_other_chain_can_be_registered_and_verified(bot, api, run, start_app, make_update, feed):
+    owner, group_id = bot.OWNER_ID, bot.VERIFICATION_GROUP_ID
+
+    async def scenario():
+        async with start_app() as app:
+            await feed(app, make_update(owner, owner, "/add_admin @alice_admin"))
+            await feed(app, make_update(owner, owner, f"/setadmin_crypto @alice_admin {SOLANA}"))
+            await feed(app, make_update(group_id, 10_001, f"/verify {SOLANA}"))
+            await feed(app, make_update(group_id, 10_001, f"/verify {SOLANA.lower()}"))
+
+    run(scenario())
+    assert "(other chain)" in api.texts(owner)[-1]
+    exact, case_variant = api.texts(group_id)[-2:]
+    assert "VERIFIED" in exact and "@alice_admin" in exact
+    # Base58 is case-sensitive: the lowercase spelling is another address.
+    assert "NOT FOUND" in case_variant and "@alice_admin" not in case_variant
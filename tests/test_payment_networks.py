@@ -0,0 +1,74 @@
+"""payment_methods.network: backfilled by the migration, stored for new details, shown in /admins and exports."""
+import sqlite3
+
+from sqlalchemy import select
+
+EVM = "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"
+BITCOIN = "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4"
+TRON = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+
+
+def test_migration_backfills_networks(bot, run):
+    group_id = bot.VERIFICATION_GROUP_ID
+    # The schema and user_version of a database written before the network column existed.
+    with sqlite3.connect(bot.engine.url.database) as db:
+        db.executescript(f"""
+            CREATE TABLE admins (
+                id INTEGER PRIMARY KEY, group_id INTEGER NOT NULL, user_id INTEGER, username VARCHAR NOT NULL,
+                is_super_admin BOOLEAN, UNIQUE (group_id, username), UNIQUE (group_id, user_id));
+            CREATE TABLE payment_methods (
+                id INTEGER PRIMARY KEY, admin_id INTEGER NOT NULL REFERENCES admins (id) ON DELETE CASCADE,
+                group_id INTEGER NOT NULL, kind VARCHAR NOT NULL, value VARCHAR NOT NULL,
+                lookup_key VARCHAR NOT NULL, UNIQUE (group_id, lookup_key));
+            INSERT INTO admins VALUES (1, {group_id}, NULL, 'alice_admin', 0);
+            INSERT INTO payment_methods VALUES
+                (1, 1, {group_id}, 'crypto', '{EVM}', '{EVM.lower()}'),
+                (2, 1, {group_id}, 'crypto', '{BITCOIN}', '{BITCOIN}'),
+                (3, 1, {group_id}, 'crypto', '{TRON}', '{TRON.lower()}'),
+                (4, 1, {group_id}, 'upi', 'alice@okaxis', 'alice@okaxis'),
+                (5, 1, {group_id}, 'crypto', 'not-an-address', 'not-an-address');
+            PRAGMA user_version = 1;
+        """)
+
+    async def migrate():
+        await bot.init_db()
+        async with bot.Session() as session:
+            networks = dict((await session.execute(select(bot.PaymentMethod.id, bot.PaymentMethod.network))).all())
+            keys = dict((await session.execute(select(bot.PaymentMethod.id, bot.PaymentMethod.lookup_key))).all())
+        async with bot.engine.connect() as conn:
+            version = (await conn.exec_driver_sql("PRAGMA user_version")).scalar()
+        return networks, keys, version
+
+    networks, keys, version = run(migrate())
+    assert networks == {1: "EVM", 2: "Bitcoin", 3: "TRON", 4: "UPI", 5: None}
+    # Base58 keys were stored lowercased; they get their case back.
+    assert keys == {1: EVM.lower(), 2: BITCOIN, 3: TRON, 4: "alice@okaxis", 5: "not-an-address"}
+    assert version == bot.CASE_SENSITIVE_KEYS_VERSION
+
+
+def test_roster_and_export_show_networks(bot, api, run, start_app, make_update, feed):
+    owner = bot.OWNER_ID
+
+    async def scenario():
+        async with start_app() as app:
+            await feed(app, *(make_update(owner, owner, text) for text in (
+                "/add_admin @alice_admin",
+                f"/setadmin_crypto @alice_admin {EVM}",
+                f"/setadmin_crypto @alice_admin {TRON}",
+                f"/setadmin_crypto @alice_admin {BITCOIN}",
+                "/setadmin_upi @alice_admin alice@okaxis",
+                "/admins",
+                "/export_admins",
+            )))
+            async with bot.Session() as session:
+                return set((await session.execute(
+                    select(bot.PaymentMethod.value, bot.PaymentMethod.network)
+                )).all())
+
+    stored = run(scenario())
+    assert stored == {(EVM, "EVM"), (TRON, "TRON"), (BITCOIN, "Bitcoin"), ("alice@okaxis", "UPI")}
+    roster = api.texts(owner)[-1]
+    assert "@alice_admin" in roster and "💰 Bitcoin, EVM, TRON · 💳" in roster
+    export = api.documents[-1].decode()
+    assert "username,role,user_id,crypto,crypto_networks,upi" in export
+    assert f"alice_admin,admin,,{EVM};{TRON};{BITCOIN},EVM;TRON;Bitcoin,alice@okaxis" in export
@@ -0,0 +1,52 @@
+"""/admins pages kept up to date in place: after any sequence of writes they match a full rebuild."""
+import random
+
+OWNER_PAGES_SEEN = 4  # Pages shown (and so cached) before the writes
+
+
+def all_pages(roster) -> list:
+    return [roster.page(number) for number in range(roster.page_count)]
+
+
+def test_incremental_updates_match_a_rebuild(bot, api, run, start_app, make_update, feed):
+    owner, group_id = bot.OWNER_ID, bot.VERIFICATION_GROUP_ID
+    rng = random.Random(7)
+    names = [f"member_{n:02d}" for n in range(30)]
+
+    async def scenario():
+        async with start_app() as app:
+            group = await bot.groups.get(group_id)
+            await feed(app, *(make_update(owner, owner, f"/add_admin @{name}") for name in names))
+            for number in range(OWNER_PAGES_SEEN):
+                group.roster.page(number)
+            commands = []
+            for n, name in enumerate(rng.sample(names, 20)):
+                commands += [
+                    f"/promote @{name}" if n % 3 == 0 else f"/setadmin_upi @{name} {name}@ybl",
+                    f"/setadmin_crypto @{name} TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t" if n == 0 else f"/add_admin @late_{n:02d}",
+                ]
+            commands += [
+                f"/remove_admin @{names[3]}", f"/demote @{names[9]}", f"/removeadmin_payment {names[5]}@ybl",
+                "/removeadmin_payment TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+            ]
+            for command in commands:
+                await feed(app, make_update(owner, owner, command))
+                group.roster.page(rng.randrange(group.roster.page_count))  # Keep some pages cached
+            # An added admin links their account.
+            await feed(app, make_update(4242, 4242, "/start", username=names[10]))
+
+            incremental = all_pages(group.roster)
+            fresh = bot.RosterCache(group_id)
+            await fresh.rebuild()
+            return incremental, all_pages(fresh), len(group.roster)
+
+    incremental, rebuilt, count = run(scenario())
+    assert count == 1 + 30 + 19 - 1  # Owner, members, late admins, one removed
+    assert len(incremental) == -(-count // bot.ROSTER_PAGE_SIZE)
+    assert incremental == rebuilt
+    assert "Page 1 of 5" in incremental[0][0] and "👑 Super Admin" in incremental[0][0]
+
+
+def test_long_legacy_names_are_clipped(bot):
+    entry = bot.render_roster_entry("x" * 200, False, False, {})
+    assert "@" + "x" * (bot.ROSTER_NAME_MAX - 1) + "…</b>" in entry
@@ -0,0 +1,52 @@
+"""The scam blocklist file and the overlay of single reports made through the bot."""
+import datetime
+
+
+def test_bulk_load_folds_in_reported_details(bot, tmp_path):
+    blocklist = bot.ScamBlocklist(str(tmp_path / "scam_blocklist.bin"))
+    blocklist.report("reported@ybl")
+    assert len(blocklist) == 1 and blocklist.contains("reported@ybl")
+
+    count = bot.write_blocklist(blocklist.path, ["bulk1@ybl", "bulk2@ybl", "reported@ybl"], blocklist)
+    blocklist.open()
+    try:
+        assert count == blocklist.count == len(blocklist) == 3
+        assert blocklist.reported_digests() == []  # The file holds the report now
+        assert all(blocklist.contains(key) for key in ("bulk1@ybl", "bulk2@ybl", "reported@ybl"))
+
+        # Reporting a listed detail again is a no-op; a new one goes to the overlay.
+        blocklist.report("bulk1@ybl")
+        blocklist.report("new@ybl")
+        assert len(blocklist) == 4
+
+        # The next bulk load keeps the file's entries and the new report.
+        count = bot.write_blocklist(blocklist.path, [], blocklist)
+        blocklist.open()
+        assert count == len(blocklist) == 4
+        assert blocklist.reported_digests() == [] and blocklist.contains("new@ybl")
+        assert not blocklist.contains("other@ybl")
+    finally:
+        blocklist.close()
+
+
+def test_startup_skips_reports_already_in_the_file(bot, run):
+    bot.write_blocklist(bot.BLOCKLIST_PATH, ["bulk@ybl"])
+
+    async def startup():
+        await bot.init_db()
+        async with bot.Session() as session:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            session.add_all([
+                bot.ScamReport(value=value, lookup_key=value, reported_by=bot.OWNER_ID, reported_at=now)
+                for value in ("bulk@ybl", "reported@ybl")
+            ])
+            await session.commit()
+        await bot.load_scam_blocklist()
+
+    run(startup())
+    try:
+        assert bot.scam_blocklist.count == 1
+        assert len(bot.scam_blocklist) == 2
+        assert bot.scam_blocklist.contains("bulk@ybl") and bot.scam_blocklist.contains("reported@ybl")
+    finally:
+        bot.scam_blocklist.close()
@@ -0,0 +1,40 @@
+"""Group scanner: pasted payment details get a warning, ordinary chat gets nothing."""
+import pytest
+
+TRON = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+
+
+@pytest.mark.parametrize("text", [
+    "thanks@all for the help",
+    "lol@lol",
+    "write to support@telegram about it",
+    "mail me at someone@gmail.com",
+    "ping @trustedseller123, rates @ 91",
+    "gm everyone, anyone selling USDT today?",
+])
+def test_ordinary_chat_has_no_payment_details(bot, text):
+    assert bot.find_payment_details(text) == []
+
+
+@pytest.mark.parametrize("text, found", [
+    ("pay seller.one@okaxis now", ["seller.one@okaxis"]),
+    ("9876543210@YBL or shop@paytm", ["9876543210@YBL", "shop@paytm"]),
+    (f"usdt to {TRON}, inr to seller@upi", [TRON, "seller@upi"]),
+])
+def test_payment_details_are_found(bot, text, found):
+    assert bot.find_payment_details(text) == found
+
+
+def test_only_payment_details_get_a_reply(bot, api, run, start_app, make_update, feed):
+    group_id = bot.VERIFICATION_GROUP_ID
+
+    async def scenario():
+        async with start_app() as app:
+            await feed(app, *(make_update(group_id, 10_001, text) for text in (
+                "thanks@all, see you tomorrow", "lol@lol", "ask support@telegram", "send to seller.one@okaxis",
+            )))
+
+    run(scenario())
+    replies = api.texts(group_id)
+    assert len(replies) == 1
+    assert "Automatic payment check" in replies[0] and "seller.one@okaxis" in replies[0]
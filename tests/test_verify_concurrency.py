@@ -0,0 +1,45 @@
+"""Concurrent /verify handling: updates from different users must not wait for each other."""
+import time
+
+VERIFY_BURST = 20
+API_LATENCY = 0.05  # Every reply takes this long, like a real round-trip to Telegram
+
+
+def verify_burst(bot, make_update):
+    return [
+        make_update(bot.VERIFICATION_GROUP_ID, 10_000 + n, f"/verify stranger{n}@ybl")
+        for n in range(VERIFY_BURST)
+    ]
+
+
+def test_verify_updates_run_interleaved(bot, api, run, start_app, make_update, feed):
+    api.latency = API_LATENCY
+
+    async def scenario():
+        async with start_app() as app:
+            assert app.update_processor.max_concurrent_updates == bot.CONCURRENT_UPDATES > 1
+            await bot.groups.get(bot.VERIFICATION_GROUP_ID)  # Load the index outside the timing
+            started = time.perf_counter()
+            await feed(app, *verify_burst(bot, make_update))
+            return time.perf_counter() - started
+
+    elapsed = run(scenario())
+    replies = api.texts(bot.VERIFICATION_GROUP_ID)
+    assert len(replies) == VERIFY_BURST
+    assert all("NOT FOUND" in text for text in replies)
+    # Handlers were waiting on their replies at the same time, not one after another.
+    assert api.peak_in_flight >= VERIFY_BURST // 2
+    assert elapsed < VERIFY_BURST * API_LATENCY / 2
+
+
+def test_sequential_mode_handles_one_update_at_a_time(bot, api, run, start_app, make_update, feed, monkeypatch):
+    monkeypatch.setattr(bot, "CONCURRENT_UPDATES", 0)
+    api.latency = API_LATENCY
+
+    async def scenario():
+        async with start_app() as app:
+            await feed(app, *verify_burst(bot, make_update))
+
+    run(scenario())
+    assert len(api.texts(bot.VERIFICATION_GROUP_ID)) == VERIFY_BURST
+    assert api.peak_in_flight == 1
@@ -0,0 +1,73 @@
+"""Webhook mode: updates POSTed to the local listener reach the handlers."""
+import asyncio
+import json
+import logging
+import socket
+
+import httpx
+import pytest
+
+SECRET = "s3cret-token"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_posted_updates_reach_verify(bot, api, run, start_app, make_update, monkeypatch, caplog):
+    port = free_port()
+    monkeypatch.setattr(bot, "WEBHOOK_LISTEN", "127.0.0.1")
+    monkeypatch.setattr(bot, "WEBHOOK_PORT", port)
+    monkeypatch.setattr(bot, "WEBHOOK_URL", "https://bot.example.com/")
+    monkeypatch.setattr(bot, "WEBHOOK_SECRET", SECRET)
+    group_id = bot.VERIFICATION_GROUP_ID
+    verify = make_update(group_id, 10_001, "/verify stranger@ybl")
+    # The same command, edited: update.message is None for these.
+    edited = make_update(group_id, 10_002, "/verify edited@ybl")
+    edited["edited_message"] = edited.pop("message")
+    edited["edited_message"]["edit_date"] = edited["edited_message"]["date"]
+
+    async def scenario():
+        async with start_app() as app:
+            allowed_updates = bot.allowed_update_types(app)
+            await app.updater.start_webhook(**bot.webhook_options(allowed_updates))
+            try:
+                url = f"http://127.0.0.1:{port}/{bot.WEBHOOK_PATH}"
+                async with httpx.AsyncClient() as client:
+                    denied = await client.post(url, json=verify, headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+                    statuses = [denied.status_code]
+                    for data in (verify, edited):
+                        response = await client.post(url, json=data, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET})
+                        statuses.append(response.status_code)
+                await asyncio.wait_for(app.update_queue.join(), timeout=30)
+            finally:
+                await app.updater.stop()
+            return allowed_updates, statuses
+
+    with caplog.at_level(logging.ERROR):
+        allowed_updates, statuses = run(scenario())
+    assert statuses == [403, 200, 200]
+    replies = api.texts(group_id)
+    assert len(replies) == 1 and "NOT FOUND" in replies[0] and "stranger@ybl" in replies[0]
+    assert not caplog.records  # The edited command was ignored, not crashed on
+
+    set_webhook = [params for method, params in api.calls if method == "setWebhook"]
+    assert len(set_webhook) == 1
+    assert set_webhook[0]["url"] == f"https://bot.example.com/{bot.WEBHOOK_PATH}"
+    assert set_webhook[0]["secret_token"] == SECRET
+    assert json.loads(set_webhook[0]["allowed_updates"]) == allowed_updates
+
+
+def test_webhook_mode_refuses_to_start_without_a_secret(bot, monkeypatch, caplog):
+    monkeypatch.setattr(bot, "BOT_MODE", "webhook")
+    monkeypatch.setattr(bot, "WEBHOOK_URL", "https://bot.example.com/")
+    monkeypatch.setattr(bot, "build_application", lambda: pytest.fail("started without a usable secret"))
+    for secret in ("", "has spaces", "x" * 257):
+        monkeypatch.setattr(bot, "WEBHOOK_SECRET", secret)
+        with caplog.at_level(logging.CRITICAL):
+            bot.main()
+        assert "WEBHOOK_SECRET" in caplog.records[-1].getMessage()
+    monkeypatch.setattr(bot, "WEBHOOK_SECRET", SECRET)
+    assert bot.webhook_settings_error() is None